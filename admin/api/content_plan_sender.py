@@ -6,15 +6,18 @@ import asyncio
 import html
 import logging
 import re
+import time
 from datetime import datetime
 from typing import Any
 from urllib.parse import urlparse
 
 import httpx
-from sqlalchemy import select
+from sqlalchemy import exists, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from admin.api import telegram_sender as tg
+from admin.api.telegram_spool import get_spool
 from config.settings import get_settings
 from database.models import (
     ContentPlan,
@@ -290,21 +293,220 @@ def _normalize_channel_ref(ref: str) -> str:
     return ref
 
 
+def _is_wrong_type_error(err: str | None) -> bool:
+    return err is not None and (
+        "wrong type of the web page content" in err.lower()
+        or "type of file mismatch" in err.lower()
+    )
+
+
+class _PreparedMessage:
+    """
+    Сообщение, подготовленное к рассылке: запросы к Bot API сериализуются один раз
+    (tg.compile_*), на каждого получателя подставляется только chat_id.
+    Файл для загрузки (fallback, когда Telegram не может скачать URL) скачивается один раз;
+    после первой успешной загрузки остальным получателям уходит file_id.
+    """
+
+    def __init__(
+        self,
+        bot_token: str,
+        text: str,
+        media_url_public: str | None,
+        kind: str,
+        reply_markup: dict | None,
+    ) -> None:
+        self.bot_token = bot_token
+        self.text = text
+        self.media_url = media_url_public
+        self.kind = kind
+        self.reply_markup = reply_markup
+        self.text_template = tg.compile_text(bot_token, text, reply_markup=reply_markup)
+        self.media_template = (
+            tg.compile_media(bot_token, kind, media_url_public, caption=text, reply_markup=reply_markup)
+            if media_url_public
+            else None
+        )
+        self._video_template: tg.RequestTemplate | None = None
+        self._upload_template: tg.RequestTemplate | None = None
+        self._upload_loaded = False
+        self._upload_lock = asyncio.Lock()
+
+    @property
+    def video_template(self) -> tg.RequestTemplate:
+        if self._video_template is None:
+            self._video_template = tg.compile_media(
+                self.bot_token, "video", self.media_url or "", caption=self.text, reply_markup=self.reply_markup
+            )
+        return self._video_template
+
+    async def upload_template(self) -> tg.RequestTemplate | None:
+        async with self._upload_lock:
+            if not self._upload_loaded:
+                self._upload_loaded = True
+                body, fname, ct = await _fetch_media_bytes(self.media_url or "")
+                if body:
+                    default_name, default_ct = {
+                        "video": ("video.mp4", "video/mp4"),
+                        "photo": ("photo.jpg", "image/jpeg"),
+                    }.get(self.kind, ("document.bin", "application/octet-stream"))
+                    self._upload_template = tg.compile_media_upload(
+                        self.bot_token,
+                        self.kind,
+                        body,
+                        fname or default_name,
+                        ct if ct and self.kind != "document" else default_ct,
+                        caption=self.text,
+                        reply_markup=self.reply_markup,
+                    )
+            return self._upload_template
+
+    def remember_upload(self, template: tg.RequestTemplate, data: dict[str, Any] | None) -> None:
+        """Файл загружен — дальше отправляем по file_id, без повторной загрузки."""
+        file_id = tg.uploaded_file_id(template, data)
+        if file_id and template is self._upload_template:
+            self._upload_template = tg.compile_media(
+                self.bot_token, self.kind, file_id, caption=self.text, reply_markup=self.reply_markup
+            )
+
+
+async def _send_media(
+    message: _PreparedMessage,
+    chat_id: str | int,
+    telegram_client: httpx.AsyncClient | None,
+) -> tuple[bool, str | None]:
+    """Отправить медиа: сначала по URL, при ошибке — скачать и отправить файлом (video/photo/document)."""
+    if message.media_template is None:
+        return False, None
+    result, err = await tg.send_template(message.media_template, chat_id, client=telegram_client)
+    if result:
+        return True, None
+    if err == tg.CIRCUIT_OPEN_ERROR:
+        return False, err
+    if _is_wrong_type_error(err) and message.kind == "photo":
+        result, err = await tg.send_template(message.video_template, chat_id, client=telegram_client)
+        if result:
+            return True, None
+    # Fallback: скачать и отправить файлом (работает с приватным S3 и любым типом)
+    logger.info("URL send failed, trying fetch+send: %s", err[:60] if err else "")
+    upload = await message.upload_template()
+    if upload is not None:
+        result, err = await tg.send_template(upload, chat_id, client=telegram_client)
+        if result:
+            message.remember_upload(upload, result)
+            return True, None
+    return False, err
+
+
+async def _deliver_message(
+    message: _PreparedMessage,
+    chat_id: str | int,
+    telegram_client: httpx.AsyncClient | None,
+) -> tuple[bool, str | None]:
+    """Медиа (если есть), при неудаче — текстом. Возвращает (успех, ошибка)."""
+    if message.media_template is not None:
+        ok, err = await _send_media(message, chat_id, telegram_client)
+        if ok:
+            return True, None
+        if err == tg.CIRCUIT_OPEN_ERROR:
+            return False, err
+    txt_resp, err_msg = await tg.send_template(message.text_template, chat_id, client=telegram_client)
+    return txt_resp is not None, err_msg
+
+
+def _should_spool(err: str | None) -> bool:
+    """
+    Сбой из-за недоступности транспорта: отправку откладываем в спул, а не пишем как ошибку.
+    Ошибки получателя (4xx) пишутся в журнал сразу, в каком бы состоянии ни был breaker.
+    """
+    return tg.is_transport_error(err)
+
+
+# Получатель рассылки: (channel_type, target для журнала, chat_id для Bot API)
+DeliveryTarget = tuple[str, str, str | int]
+
+
+async def _resolve_targets(db: AsyncSession, rows: list) -> list[DeliveryTarget]:
+    """Получатели по каналам плана: подписчики бота и Telegram-каналы."""
+    targets: list[DeliveryTarget] = []
+    for ch in rows:
+        if ch.channel_type == DistributionChannelType.BOT:
+            users = (await db.scalars(select(User.id).where(User.is_active.is_(True), User.deleted_at.is_(None)))).all()
+            targets.extend(("bot", f"user:{uid}", uid) for uid in users)
+        elif ch.channel_type == DistributionChannelType.TELEGRAM_CHANNEL and ch.telegram_ref:
+            chat = _normalize_channel_ref(ch.telegram_ref)
+            targets.append(("telegram_channel", chat, chat))
+    return targets
+
+
+# Неудачные отправки плана к повтору: пункт плана (None — сообщение из полей плана) → получатели
+FailedDeliveries = dict[int | None, list[DeliveryTarget]]
+
+
+async def failed_deliveries(db: AsyncSession, plan_id: int) -> FailedDeliveries:
+    """
+    Неудачные отправки плана по парам (получатель, пункт плана), после которых этот пункт
+    не был доставлен этому получателю успешно (по журналу telegram_delivery_log; индекс (plan_id, success)).
+    """
+    later_success = aliased(TelegramDeliveryLog)
+    rows = (
+        await db.execute(
+            select(TelegramDeliveryLog.channel_type, TelegramDeliveryLog.target, TelegramDeliveryLog.item_id)
+            .where(
+                TelegramDeliveryLog.plan_id == plan_id,
+                TelegramDeliveryLog.success.is_(False),
+                ~exists().where(
+                    later_success.plan_id == plan_id,
+                    later_success.success.is_(True),
+                    later_success.target == TelegramDeliveryLog.target,
+                    later_success.item_id.is_not_distinct_from(TelegramDeliveryLog.item_id),
+                    later_success.id > TelegramDeliveryLog.id,
+                ),
+            )
+            .group_by(TelegramDeliveryLog.channel_type, TelegramDeliveryLog.target, TelegramDeliveryLog.item_id)
+            .order_by(func.min(TelegramDeliveryLog.id))
+        )
+    ).all()
+    failed: FailedDeliveries = {}
+    for chan_type, target, item_id in rows:
+        if chan_type == "bot":
+            if not target.startswith("user:") or not target[5:].lstrip("-").isdigit():
+                continue
+            failed.setdefault(item_id, []).append((chan_type, target, int(target[5:])))
+        else:
+            failed.setdefault(item_id, []).append((chan_type, target, target))
+    return failed
+
+
+async def retryable_deliveries(db: AsyncSession, plan_id: int, failed: FailedDeliveries) -> FailedDeliveries:
+    """
+    Неудачные отправки, которые ещё можно повторить: пункты плана пересоздаются при правке,
+    и отправки удалённых пунктов повторить нельзя. У плана без пунктов сообщение — из полей плана (None).
+    """
+    item_ids = set((await db.scalars(select(ContentPlanItem.id).where(ContentPlanItem.plan_id == plan_id))).all())
+    current: set[int | None] = item_ids or {None}
+    return {item_id: targets for item_id, targets in failed.items() if item_id in current}
+
+
 async def _send_one_message(
     db: AsyncSession,
     bot_token: str,
-    rows: list,
+    targets: list[DeliveryTarget],
     title: str,
     description: str,
     media_url: str | None,
     *,
     event_id: int | None = None,
+    item_id: int | None = None,
     plan_id: int,
     plan_title: str,
     admin_id: int | None = None,
     telegram_client: httpx.AsyncClient | None = None,
-) -> tuple[int, int, list[str]]:
-    """Отправить одно сообщение (title, description, media) во все каналы из rows. Если event_id задан — под сообщением кнопка «Записаться»."""
+) -> tuple[int, int, int, list[str]]:
+    """
+    Отправить одно сообщение (title, description, media) всем получателям targets. Если event_id задан — под сообщением кнопка «Записаться».
+    Возвращает (sent_bot, sent_channel, spooled, errors); spooled — отложено в спул из-за недоступности Telegram.
+    """
     text = _build_text(title, description)
     reply_markup = _event_registration_reply_markup(event_id) if event_id is not None else None
     media_url_public = _ensure_public_media_url(media_url)
@@ -324,12 +526,14 @@ async def _send_one_message(
     sent_bot = 0
     sent_channel = 0
     errors: list[str] = []
+    spool_jobs: list[dict[str, Any]] = []
 
     def _log(chan_type: str, target: str, success: bool, err: str | None = None) -> None:
         db.add(
             TelegramDeliveryLog(
                 plan_id=plan_id,
                 plan_title=plan_title,
+                item_id=item_id,
                 channel_type=chan_type,
                 target=target,
                 success=success,
@@ -338,108 +542,51 @@ async def _send_one_message(
             )
         )
 
-    def _is_wrong_type_error(err: str | None) -> bool:
-        return err is not None and (
-            "wrong type of the web page content" in err.lower()
-            or "type of file mismatch" in err.lower()
+    def _spool(chan_type: str, target: str, chat_id: str | int) -> None:
+        spool_jobs.append(
+            {
+                "chat_id": chat_id,
+                "channel_type": chan_type,
+                "target": target,
+                "text": text,
+                "media_url": media_url_public,
+                "kind": kind,
+                "reply_markup": reply_markup,
+                "plan_id": plan_id,
+                "plan_title": plan_title,
+                "item_id": item_id,
+                "admin_id": admin_id,
+            }
         )
 
-    async def _send_media(chat_id: str | int) -> tuple[bool, str | None]:
-        """Отправить медиа: сначала по URL, при ошибке — скачать и отправить файлом (video/photo/document)."""
-        if not media_url_public:
-            return False, None
-        if kind == "video":
-            result, err = await tg.send_video(
-                bot_token, chat_id, media_url_public, caption=text, reply_markup=reply_markup, client=telegram_client
-            )
-        elif kind == "photo":
-            result, err = await tg.send_photo(
-                bot_token, chat_id, media_url_public, caption=text, reply_markup=reply_markup, client=telegram_client
-            )
-        else:
-            result, err = await tg.send_document(
-                bot_token, chat_id, media_url_public, caption=text, reply_markup=reply_markup, client=telegram_client
-            )
-        if result:
-            return True, None
-        if _is_wrong_type_error(err) and kind == "photo":
-            result, err = await tg.send_video(
-                bot_token, chat_id, media_url_public, caption=text, reply_markup=reply_markup, client=telegram_client
-            )
-            if result:
-                return True, None
-        # Fallback: скачать и отправить файлом (работает с приватным S3 и любым типом)
-        logger.info("URL send failed, trying fetch+send: %s", err[:60] if err else "")
-        body, fname, ct = await _fetch_media_bytes(media_url_public)
-        if body and len(body) > 0:
-            if kind == "video":
-                result, err = await tg.send_video_by_bytes(
-                    bot_token, chat_id, body, fname or "video.mp4", ct or "video/mp4",
-                    caption=text, reply_markup=reply_markup, client=telegram_client
-                )
-            elif kind == "photo":
-                result, err = await tg.send_photo_by_bytes(
-                    bot_token, chat_id, body, fname or "photo.jpg", ct or "image/jpeg",
-                    caption=text, reply_markup=reply_markup, client=telegram_client
-                )
-            else:
-                result, err = await tg.send_document_by_bytes(
-                    bot_token, chat_id, body, fname or "document.bin",
-                    caption=text, reply_markup=reply_markup, client=telegram_client
-                )
-            if result:
-                return True, None
-        return False, err
+    message = _PreparedMessage(bot_token, text, media_url_public, kind, reply_markup)
 
-    for ch in rows:
-        if ch.channel_type == DistributionChannelType.BOT:
-            users = list((await db.scalars(select(User.id).where(User.is_active.is_(True), User.deleted_at.is_(None)))).all())
-            for uid in users:
-                if media_url_public:
-                    ok, err_msg = await _send_media(uid)
-                    if not ok:
-                        txt_resp, err_msg = await tg.send_text(
-                            bot_token, uid, text, reply_markup=reply_markup, client=telegram_client
-                        )
-                        result = txt_resp is not None
-                    else:
-                        result = True
-                else:
-                    txt_resp, err_msg = await tg.send_text(
-                        bot_token, uid, text, reply_markup=reply_markup, client=telegram_client
-                    )
-                    result = txt_resp is not None
-                target = f"user:{uid}"
-                if result:
+    async def _deliver(chat_id: str | int) -> tuple[bool, str | None]:
+        return await _deliver_message(message, chat_id, telegram_client)
+
+    # Получателям шлём пачками параллельно: реальное число запросов в полёте
+    # ограничивает адаптивный лимитер в telegram_sender.
+    fanout_batch = max(1, get_settings().telegram_send_concurrency_max)
+    for start in range(0, len(targets), fanout_batch):
+        chunk = targets[start:start + fanout_batch]
+        results = await asyncio.gather(*(_deliver(chat_id) for _, _, chat_id in chunk))
+        for (chan_type, target, chat_id), (result, err_msg) in zip(chunk, results):
+            if result:
+                if chan_type == "bot":
                     sent_bot += 1
-                    _log("bot", target, True)
-                else:
-                    errors.append(f"bot user {uid}" + (f": {err_msg}" if err_msg else ""))
-                    _log("bot", target, False, err_msg)
-        elif ch.channel_type == DistributionChannelType.TELEGRAM_CHANNEL and ch.telegram_ref:
-            chat = _normalize_channel_ref(ch.telegram_ref)
-            if media_url_public:
-                ok, err_msg = await _send_media(chat)
-                if not ok:
-                    txt_resp, err_msg = await tg.send_text(
-                        bot_token, chat, text, reply_markup=reply_markup, client=telegram_client
-                    )
-                    result = txt_resp is not None
                 else:
-                    result = True
-            else:
-                txt_resp, err_msg = await tg.send_text(
-                    bot_token, chat, text, reply_markup=reply_markup, client=telegram_client
-                )
-                result = txt_resp is not None
-            target = chat
-            if result:
-                sent_channel += 1
-                _log("telegram_channel", target, True)
+                    sent_channel += 1
+                _log(chan_type, target, True)
+            elif _should_spool(err_msg):
+                _spool(chan_type, target, chat_id)
             else:
-                errors.append(f"канал {chat}" + (f": {err_msg}" if err_msg else ""))
-                _log("telegram_channel", target, False, err_msg)
-    return sent_bot, sent_channel, errors
+                label = f"bot user {chat_id}" if chan_type == "bot" else f"канал {chat_id}"
+                errors.append(label + (f": {err_msg}" if err_msg else ""))
+                _log(chan_type, target, False, err_msg)
+    if spool_jobs:
+        await get_spool().enqueue_many(spool_jobs)
+        logger.warning("Plan %s: Telegram unavailable, %s send(s) moved to spool", plan_id, len(spool_jobs))
+    return sent_bot, sent_channel, len(spool_jobs), errors
 
 
 async def send_plan_to_telegram(
@@ -449,16 +596,20 @@ async def send_plan_to_telegram(
     *,
     admin_id: int | None = None,
     telegram_client: httpx.AsyncClient | None = None,
+    retry: FailedDeliveries | None = None,
 ) -> dict[str, Any]:
     """
-    Отправить контент плана во все привязанные каналы.
+    Отправить контент плана во все привязанные каналы. С retry — повтор неудачных: каждый пункт
+    только тем получателям, кому не ушёл именно он (пункты, удалённые правкой плана, пропускаются).
     Если у плана есть пункты (items) — отправляет по очереди все сообщения с разными типами.
     Иначе — одно сообщение из полей плана.
-    Возвращает {"sent_bot": N, "sent_channel": M, "errors": [...]}.
+    Возвращает {"sent_bot": N, "sent_channel": M, "spooled": K, "errors": [...]}.
     """
     if telegram_client is None:
         async with httpx.AsyncClient(**tg.telegram_http_kwargs(120.0)) as c:
-            return await send_plan_to_telegram(db, plan, bot_token, admin_id=admin_id, telegram_client=c)
+            return await send_plan_to_telegram(
+                db, plan, bot_token, admin_id=admin_id, telegram_client=c, retry=retry
+            )
     rows = (
         await db.execute(
             select(DistributionChannel)
@@ -470,8 +621,10 @@ async def send_plan_to_telegram(
         )
     ).scalars().all()
     channels_count = len(rows)
+    targets = await _resolve_targets(db, rows) if retry is None else []
     sent_bot = 0
     sent_channel = 0
+    spooled = 0
     errors: list[str] = []
 
     items = (
@@ -487,21 +640,42 @@ async def send_plan_to_telegram(
     if items:
         # Несколько сообщений в плане: отправляем по порядку
         for item_entity in items:
+            item_targets = targets if retry is None else retry.get(item_entity.id, [])
+            if not item_targets:
+                continue
             title, description, media_url, event_id = await get_item_message(db, item_entity)
-            sb, sc, errs = await _send_one_message(
-                db, bot_token, rows, title, description, media_url, event_id=event_id, **send_kw
+            sb, sc, sp, errs = await _send_one_message(
+                db,
+                bot_token,
+                item_targets,
+                title,
+                description,
+                media_url,
+                event_id=event_id,
+                item_id=item_entity.id,
+                **send_kw,
             )
             sent_bot += sb
             sent_channel += sc
+            spooled += sp
             errors.extend(errs)
     else:
         # Одно сообщение из полей плана (как раньше)
-        title, description, media_url, event_id = await get_plan_message(db, plan)
-        sent_bot, sent_channel, errors = await _send_one_message(
-            db, bot_token, rows, title, description, media_url, event_id=event_id, **send_kw
-        )
+        if retry is not None:
+            targets = retry.get(None, [])
+        if targets:
+            title, description, media_url, event_id = await get_plan_message(db, plan)
+            sent_bot, sent_channel, spooled, errors = await _send_one_message(
+                db, bot_token, targets, title, description, media_url, event_id=event_id, **send_kw
+            )
 
-    return {"sent_bot": sent_bot, "sent_channel": sent_channel, "errors": errors, "channels_count": channels_count}
+    return {
+        "sent_bot": sent_bot,
+        "sent_channel": sent_channel,
+        "spooled": spooled,
+        "errors": errors,
+        "channels_count": channels_count,
+    }
 
 
 async def process_due_content_plans(db: AsyncSession, bot_token: str) -> int:
@@ -531,13 +705,86 @@ async def process_due_content_plans(db: AsyncSession, bot_token: str) -> int:
             db.add(plan)
             await db.commit()
             logger.info(
-                "Content plan %s sent: bot=%s channel=%s errors=%s",
+                "Content plan %s sent: bot=%s channel=%s spooled=%s errors=%s",
                 plan.id,
                 result["sent_bot"],
                 result["sent_channel"],
+                result["spooled"],
                 result["errors"],
             )
         except Exception as e:
             await db.rollback()
             logger.exception("Content plan %s send failed: %s", plan.id, e)
     return len(due)
+
+
+async def drain_telegram_spool(db: AsyncSession, bot_token: str) -> int:
+    """
+    Дослать отправки, отложенные в спул, пока Telegram был недоступен.
+    Если breaker ещё не замкнут — сначала одна пробная отправка; дальше пачками
+    не быстрее TELEGRAM_SPOOL_DRAIN_RATE сообщений в секунду.
+    Возвращает число заданий, снятых со спула (доставленных или окончательно неудачных).
+    """
+    breaker = tg.get_circuit_breaker()
+    if not breaker.ready():
+        return 0
+    spool = get_spool()
+    rate = max(1, get_settings().telegram_spool_drain_rate)
+    plan_ids: set[int] | None = None
+    done_total = 0
+    async with httpx.AsyncClient(**tg.telegram_http_kwargs(120.0)) as client:
+        while True:
+            # Пока breaker не замкнут — по одному заданию (проба), затем полная пачка
+            jobs = await spool.fetch(rate if breaker.closed else 1)
+            if not jobs:
+                break
+            started = time.monotonic()
+            results = await asyncio.gather(
+                *(
+                    _deliver_message(
+                        _PreparedMessage(
+                            bot_token,
+                            job["text"],
+                            job.get("media_url"),
+                            job.get("kind") or "document",
+                            job.get("reply_markup"),
+                        ),
+                        job["chat_id"],
+                        client,
+                    )
+                    for _, job in jobs
+                )
+            )
+            if plan_ids is None:
+                plan_ids = set((await db.scalars(select(ContentPlan.id))).all())
+            done_ids: list[int] = []
+            stop = False
+            for (job_id, job), (ok, err) in zip(jobs, results):
+                if not ok and _should_spool(err):
+                    stop = True
+                    continue
+                done_ids.append(job_id)
+                if job.get("plan_id") in plan_ids:
+                    db.add(
+                        TelegramDeliveryLog(
+                            plan_id=job["plan_id"],
+                            plan_title=job.get("plan_title") or "План",
+                            item_id=job.get("item_id"),
+                            channel_type=job["channel_type"],
+                            target=job["target"],
+                            success=ok,
+                            error_message=None if ok else err,
+                            admin_id=job.get("admin_id"),
+                        )
+                    )
+            await db.commit()
+            await spool.remove(done_ids)
+            done_total += len(done_ids)
+            if stop:
+                break
+            elapsed = time.monotonic() - started
+            if len(jobs) >= rate and elapsed < 1.0:
+                await asyncio.sleep(1.0 - elapsed)
+    if done_total:
+        logger.info("Telegram spool drained: %s send(s) delivered or finalized", done_total)
+    return done_total
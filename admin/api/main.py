@@ -10,7 +10,7 @@ from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from prometheus_client import Counter, Gauge, Histogram, generate_latest
 
-from admin.api.content_plan_sender import process_due_content_plans
+from admin.api.content_plan_sender import drain_telegram_spool, process_due_content_plans
 from admin.api.deps import get_current_admin
 from admin.api.routers.admins import router as admins_router
 from admin.api.routers.analytics import router as analytics_router
@@ -29,7 +29,9 @@ from admin.api.routers.users import router as users_router
 from admin.api.s3_cleanup import run_daily_s3_cleanup
 from admin.api.schemas import GenericMessage
 from admin.api.security import clear_revoked_tokens
+from admin.api.telegram_proxy_transport import probe_proxy
 from config.logging import configure_logging
+from config.proxy_pool import get_proxy_pool
 from config.settings import get_settings
 from database.models import SystemSetting, User
 from database.seed import ensure_default_admin, ensure_default_system_settings
@@ -58,9 +60,12 @@ SCHEDULED_DURATION = Histogram("scheduled_task_duration_seconds", "Run duration"
 SCHEDULED_ITEMS = Counter("scheduled_task_items_total", "Items processed (plans sent, files deleted)", ["task"])
 _scheduler_task: asyncio.Task | None = None
 _s3_cleanup_task: asyncio.Task | None = None
+_spool_task: asyncio.Task | None = None
+_proxy_health_task: asyncio.Task | None = None
 _scheduled_task_status: dict[str, dict] = {
     "content_plan": {"last_run": None, "success_count": 0, "error_count": 0, "last_error": None},
     "s3_cleanup": {"last_run": None, "success_count": 0, "error_count": 0, "last_error": None},
+    "telegram_spool": {"last_run": None, "success_count": 0, "error_count": 0, "last_error": None},
 }
 
 
@@ -99,8 +104,14 @@ async def startup() -> None:
         await ensure_default_system_settings(session)
         n = await session.scalar(select(func.count(User.id))) or 0
         log.info("API startup: users in DB = %s", n)
-    global _scheduler_task, _s3_cleanup_task
+    global _scheduler_task, _s3_cleanup_task, _spool_task, _proxy_health_task
     _scheduler_task = asyncio.create_task(_scheduled_content_plan_worker())
+    _spool_task = asyncio.create_task(_scheduled_telegram_spool_worker())
+    proxy_pool = get_proxy_pool()
+    if proxy_pool is not None:
+        _proxy_health_task = asyncio.create_task(
+            proxy_pool.run_health_checks(probe_proxy, max(5, settings.telegram_proxy_health_interval_seconds))
+        )
     if settings.use_s3:
         _s3_cleanup_task = asyncio.create_task(_scheduled_s3_cleanup_worker())
 
@@ -115,6 +126,14 @@ async def shutdown() -> None:
         _s3_cleanup_task.cancel()
         with contextlib.suppress(asyncio.CancelledError):
             await _s3_cleanup_task
+    if _spool_task:
+        _spool_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await _spool_task
+    if _proxy_health_task:
+        _proxy_health_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await _proxy_health_task
     await engine.dispose()
 
 
@@ -149,6 +168,36 @@ async def _scheduled_content_plan_worker() -> None:
         await asyncio.sleep(interval)
 
 
+async def _scheduled_telegram_spool_worker() -> None:
+    """Дочищает спул отправок, отложенных при разомкнутом circuit breaker Telegram."""
+    import logging
+    import time
+    log = logging.getLogger(__name__)
+    task = "telegram_spool"
+    interval = max(1, settings.telegram_spool_drain_interval_seconds)
+    while True:
+        start = time.monotonic()
+        try:
+            async with SessionLocal() as db:
+                n = await drain_telegram_spool(db, settings.bot_token)
+                SCHEDULED_ITEMS.labels(task=task).inc(n)
+            SCHEDULED_LAST_RUN.labels(task=task).set(time.time())
+            SCHEDULED_RUNS.labels(task=task, status="success").inc()
+            _scheduled_task_status[task]["last_run"] = datetime.utcnow().isoformat()
+            _scheduled_task_status[task]["success_count"] += 1
+            _scheduled_task_status[task]["last_error"] = None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.exception("Telegram spool worker error (will retry): %s", e)
+            SCHEDULED_RUNS.labels(task=task, status="error").inc()
+            _scheduled_task_status[task]["error_count"] += 1
+            _scheduled_task_status[task]["last_error"] = str(e)
+        finally:
+            SCHEDULED_DURATION.labels(task=task).observe(time.monotonic() - start)
+        await asyncio.sleep(interval)
+
+
 async def _scheduled_s3_cleanup_worker() -> None:
     import logging
     import time
@@ -205,6 +254,7 @@ async def scheduled_tasks_status(admin=Depends(get_current_admin)) -> dict:
     status = {k: dict(v) for k, v in _scheduled_task_status.items()}
     status["content_plan"]["running"] = _scheduler_task is not None and not _scheduler_task.done()
     status["s3_cleanup"]["running"] = _s3_cleanup_task is not None and not _s3_cleanup_task.done()
+    status["telegram_spool"]["running"] = _spool_task is not None and not _spool_task.done()
     return {"tasks": status}
 
 
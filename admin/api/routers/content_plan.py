@@ -7,7 +7,7 @@ from sqlalchemy import delete, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from admin.api.content_plan_sender import send_plan_to_telegram
+from admin.api.content_plan_sender import failed_deliveries, retryable_deliveries, send_plan_to_telegram
 from admin.api.deps import get_current_admin, require_roles, verify_csrf
 from admin.api.html_sanitizer import sanitize_html_for_telegram
 from admin.api.schemas import (
@@ -288,7 +288,12 @@ async def send_plan_now(
     total = result["sent_bot"] + result["sent_channel"]
     channels_count = result.get("channels_count", 0)
     hint = None
-    if total == 0:
+    if result.get("spooled"):
+        hint = (
+            "Telegram сейчас недоступен: %s сообщений поставлено в очередь и будет дослано автоматически "
+            "после восстановления связи."
+        ) % result["spooled"]
+    elif total == 0:
         if channels_count == 0:
             hint = (
                 "К плану не привязаны активные каналы. Откройте план на редактирование, "
@@ -307,6 +312,7 @@ async def send_plan_now(
         data={
             "sent_bot": result["sent_bot"],
             "sent_channel": result["sent_channel"],
+            "spooled": result.get("spooled", 0),
             "errors": result["errors"],
             "hint": hint,
             "channels_count": channels_count,
@@ -314,6 +320,53 @@ async def send_plan_now(
     )
 
 
+@router.post("/{plan_id}/retry-failed", response_model=GenericMessage, dependencies=[Depends(verify_csrf)])
+async def retry_failed_plan(
+    plan_id: int,
+    db: AsyncSession = Depends(get_db),
+    admin: AdminUser = Depends(require_roles("superadmin", "admin", "manager")),
+) -> GenericMessage:
+    """Повторить отправку плана только тем получателям, кому она не удалась (по журналу отправок)."""
+    plan = await db.get(ContentPlan, plan_id)
+    if not plan:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    settings = get_settings()
+    if not (settings.bot_token or "").strip():
+        raise HTTPException(
+            status_code=500,
+            detail="BOT_TOKEN не задан в .env. Укажите токен бота для отправки в Telegram.",
+        )
+    failed = await failed_deliveries(db, plan_id)
+    if not failed:
+        raise HTTPException(status_code=400, detail="Нет неудачных отправок для повтора")
+    retry = await retryable_deliveries(db, plan_id, failed)
+    if not retry:
+        raise HTTPException(
+            status_code=409,
+            detail="План изменён после отправки: неудачные отправки относятся к удалённым пунктам. Отправьте план заново.",
+        )
+    targets = sum(len(item_targets) for item_targets in retry.values())
+    result = await send_plan_to_telegram(db, plan, settings.bot_token, admin_id=admin.id, retry=retry)
+    db.add(
+        ActivityLog(
+            admin_id=admin.id,
+            action="retry_failed_content_plan",
+            details=f"plan_id={plan_id} targets={targets}",
+        )
+    )
+    await db.commit()
+    return GenericMessage(
+        message="sent",
+        data={
+            "targets": targets,
+            "sent_bot": result["sent_bot"],
+            "sent_channel": result["sent_channel"],
+            "spooled": result.get("spooled", 0),
+            "errors": result["errors"],
+        },
+    )
+
+
 @router.delete("/{plan_id}", response_model=GenericMessage, dependencies=[Depends(verify_csrf)])
 async def delete_plan(
     plan_id: int,
@@ -3,7 +3,7 @@ from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func, or_, select
+from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from admin.api.deps import get_current_admin, require_roles, verify_csrf
@@ -15,6 +15,7 @@ from admin.api.schemas import (
     GenericMessage,
 )
 from config.settings import get_settings
+from database.cache_versions import EVENTS_VERSION, bump_cache_version
 from database.models import ActivityLog, AdminUser, Event, EventRegistration, User, UserType
 from database.session import get_db
 
@@ -36,10 +37,7 @@ def _naive_utc(dt: datetime | None) -> datetime | None:
         return dt
 
 
-async def _event_to_out(db: AsyncSession, event: Event) -> EventOut:
-    cnt = await db.scalar(
-        select(func.count()).select_from(EventRegistration).where(EventRegistration.event_id == event.id)
-    )
+def _event_to_out(event: Event) -> EventOut:
     return EventOut(
         id=event.id,
         title=event.title,
@@ -51,7 +49,7 @@ async def _event_to_out(db: AsyncSession, event: Event) -> EventOut:
         is_active=event.is_active,
         max_places=event.max_places,
         created_at=event.created_at,
-        registered_count=cnt or 0,
+        registered_count=event.registered_count or 0,
     )
 
 
@@ -66,7 +64,7 @@ async def list_events(
     if user_type:
         query = query.where(or_(Event.user_type == user_type, Event.user_type == UserType.ALL))
     events = list((await db.scalars(query)).all())
-    return [await _event_to_out(db, e) for e in events]
+    return [_event_to_out(e) for e in events]
 
 
 @router.get("/{event_id}", response_model=EventOut)
@@ -79,7 +77,7 @@ async def get_event(
     event = await db.get(Event, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
-    return await _event_to_out(db, event)
+    return _event_to_out(event)
 
 
 @router.get("/{event_id}/registrations", response_model=list[EventRegistrationOut])
@@ -126,9 +124,10 @@ async def create_event(
         event = Event(**data)
         db.add(event)
         db.add(ActivityLog(admin_id=admin.id, action="create_event", details=f"event={event.title}"))
+        await bump_cache_version(db, EVENTS_VERSION)
         await db.commit()
         await db.refresh(event)
-        return await _event_to_out(db, event)
+        return _event_to_out(event)
     except Exception as e:
         await db.rollback()
         logger.exception("create_event failed: %s", e)
@@ -150,11 +149,13 @@ async def update_event(
         data["event_date"] = _naive_utc(data["event_date"])
     for key, value in data.items():
         setattr(event, key, value)
+    event.updated_at = datetime.utcnow()
     db.add(event)
     db.add(ActivityLog(admin_id=admin.id, action="update_event", details=f"event_id={event_id}"))
+    await bump_cache_version(db, EVENTS_VERSION)
     await db.commit()
     await db.refresh(event)
-    return await _event_to_out(db, event)
+    return _event_to_out(event)
 
 
 @router.delete("/{event_id}", response_model=GenericMessage, dependencies=[Depends(verify_csrf)])
@@ -168,5 +169,6 @@ async def delete_event(
         raise HTTPException(status_code=404, detail="Event not found")
     await db.delete(event)
     db.add(ActivityLog(admin_id=admin.id, action="delete_event", details=f"event_id={event_id}"))
+    await bump_cache_version(db, EVENTS_VERSION)
     await db.commit()
     return GenericMessage(message="deleted")
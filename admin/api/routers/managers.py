@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from admin.api.deps import get_current_admin, require_roles, verify_csrf
 from admin.api.schemas import GenericMessage, ManagerCreate, ManagerOut, ManagerUpdate
+from database.cache_versions import MANAGERS_VERSION, bump_cache_version
 from database.models import ActivityLog, AdminUser, Manager
 from database.session import get_db
 
@@ -43,6 +44,7 @@ async def create_manager(
     item = Manager(**payload.model_dump())
     db.add(item)
     db.add(ActivityLog(admin_id=admin.id, action="create_manager", details=f"manager_id={item.id}"))
+    await bump_cache_version(db, MANAGERS_VERSION)
     await db.commit()
     await db.refresh(item)
     return item
@@ -62,6 +64,7 @@ async def update_manager(
         setattr(item, key, value)
     db.add(item)
     db.add(ActivityLog(admin_id=admin.id, action="update_manager", details=f"manager_id={manager_id}"))
+    await bump_cache_version(db, MANAGERS_VERSION)
     await db.commit()
     await db.refresh(item)
     return item
@@ -78,5 +81,6 @@ async def delete_manager(
         raise HTTPException(status_code=404, detail="Manager not found")
     await db.delete(item)
     db.add(ActivityLog(admin_id=admin.id, action="delete_manager", details=f"manager_id={manager_id}"))
+    await bump_cache_version(db, MANAGERS_VERSION)
     await db.commit()
     return GenericMessage(message="deleted")
@@ -10,6 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from admin.api.deps import require_roles, verify_csrf
 from admin.api.schemas import GenericMessage, SettingBatch
 from config.settings import get_settings
+from database.cache_versions import is_cache_version_key
 from database.models import ActivityLog, AdminUser, SystemSetting
 from database.session import get_db
 
@@ -25,7 +26,9 @@ async def get_settings_api(
 ) -> GenericMessage:
     _ = admin
     items = list((await db.scalars(select(SystemSetting))).all())
-    return GenericMessage(message="ok", data={item.key: item.value for item in items})
+    return GenericMessage(
+        message="ok", data={item.key: item.value for item in items if not is_cache_version_key(item.key)}
+    )
 
 
 @router.put("", response_model=GenericMessage, dependencies=[Depends(verify_csrf)])
@@ -53,7 +56,7 @@ async def create_backup(
 ) -> GenericMessage:
     BACKUP_DIR.mkdir(parents=True, exist_ok=True)
     items = list((await db.scalars(select(SystemSetting))).all())
-    data = {item.key: item.value for item in items}
+    data = {item.key: item.value for item in items if not is_cache_version_key(item.key)}
     filename = f"settings_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json"
     target = BACKUP_DIR / filename
     target.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
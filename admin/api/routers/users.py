@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from admin.api.deps import get_current_admin, require_roles, verify_csrf
 from admin.api.schemas import GenericMessage, UserCreate, UserOut, UserStatsOut, UserUpdate
 from admin.api.services import users_csv
+from database.cache_versions import USERS_VERSION, bump_cache_version
 from database.models import ActivityLog, AdminUser, Establishment, User, UserType
 from database.session import get_db
 
@@ -34,6 +35,7 @@ async def create_user(
     user = User(**payload.model_dump())
     db.add(user)
     db.add(ActivityLog(admin_id=admin.id, action="create_user", details=f"user={user.id}"))
+    await bump_cache_version(db, USERS_VERSION)
     await db.commit()
     await db.refresh(user)
     return user
@@ -151,6 +153,7 @@ async def update_user(
         setattr(user, key, value)
     db.add(user)
     db.add(ActivityLog(admin_id=admin.id, action="update_user", details=f"user={user_id}"))
+    await bump_cache_version(db, USERS_VERSION)
     await db.commit()
     await db.refresh(user)
     return user
@@ -169,6 +172,7 @@ async def delete_user(
     user.is_active = False
     db.add(user)
     db.add(ActivityLog(admin_id=admin.id, action="soft_delete_user", details=f"user={user_id}"))
+    await bump_cache_version(db, USERS_VERSION)
     await db.commit()
     return GenericMessage(message="deleted")
 
@@ -204,5 +208,6 @@ async def bulk_users(
         db.add(user)
         changed += 1
     db.add(ActivityLog(admin_id=admin.id, action="bulk_users", details=f"op={operation};count={changed}"))
+    await bump_cache_version(db, USERS_VERSION)
     await db.commit()
     return GenericMessage(message="ok", data={"updated": changed})
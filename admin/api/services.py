@@ -5,6 +5,7 @@ from fastapi import HTTPException
 from sqlalchemy import and_, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from database.cache_versions import CONTENT_VERSION, bump_cache_version
 from database.models import Delivery, News, Promotion, User, UserType
 
 
@@ -48,6 +49,7 @@ async def create_content(model, payload: dict, db: AsyncSession):
     data = {k: v for k, v in data.items() if k in allowed}
     item = model(**data)
     db.add(item)
+    await bump_cache_version(db, CONTENT_VERSION)
     await db.commit()
     await db.refresh(item)
     return item
@@ -59,6 +61,7 @@ async def update_content(model, item_id: int, payload: dict, db: AsyncSession):
         setattr(item, key, value)
     item.updated_at = datetime.utcnow()
     db.add(item)
+    await bump_cache_version(db, CONTENT_VERSION)
     await db.commit()
     await db.refresh(item)
     return item
@@ -67,6 +70,7 @@ async def update_content(model, item_id: int, payload: dict, db: AsyncSession):
 async def delete_content(model, item_id: int, db: AsyncSession):
     item = await get_content_by_id(model, item_id, db)
     await db.delete(item)
+    await bump_cache_version(db, CONTENT_VERSION)
     await db.commit()
 
 
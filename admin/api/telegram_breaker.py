@@ -0,0 +1,112 @@
+"""
+Circuit breaker для транспорта до api.telegram.org (напрямую или через TELEGRAM_PROXY).
+После N подряд сетевых ошибок (таймауты, ошибки прокси, 5xx) размыкается: запросы не уходят в сеть,
+а отправки откладываются в спул (telegram_spool). Через TELEGRAM_BREAKER_RESET_SECONDS пропускает
+один пробный запрос (half-open): успех — замыкается, ошибка — снова размыкается.
+"""
+import logging
+import time
+
+from prometheus_client import Gauge
+
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_STATE = Gauge("telegram_circuit_state", "Telegram transport circuit state (0=closed, 1=half_open, 2=open)")
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self._failure_threshold = max(1, failure_threshold)
+        self._reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        CIRCUIT_STATE.set(_STATE_VALUES[CLOSED])
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @property
+    def closed(self) -> bool:
+        return self._state == CLOSED
+
+    def ready(self) -> bool:
+        """Можно ли сейчас пытаться отправлять (замкнут или истёк таймаут размыкания)."""
+        if self._state == OPEN:
+            return time.monotonic() - self._opened_at >= self._reset_timeout
+        return self._state == CLOSED or not self._probe_in_flight
+
+    def allow(self) -> bool:
+        """Пропустить запрос в сеть? В half-open — только один пробный запрос."""
+        if self._state == CLOSED:
+            return True
+        if self._state == OPEN:
+            if time.monotonic() - self._opened_at < self._reset_timeout:
+                return False
+            self._set_state(HALF_OPEN)
+            self._probe_in_flight = False
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        """Транспорт работает (включая 4xx от Telegram)."""
+        if self._state == OPEN:
+            # Ответ на запрос, ушедший до размыкания, — не повод замыкаться.
+            return
+        self._failures = 0
+        self._probe_in_flight = False
+        if self._state == HALF_OPEN:
+            logger.info("Telegram circuit breaker closed: probe succeeded")
+        self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        """Сетевая ошибка / таймаут / 5xx."""
+        if self._state == OPEN:
+            return
+        if self._state == HALF_OPEN:
+            self._trip()
+            return
+        self._failures += 1
+        if self._failures >= self._failure_threshold:
+            self._trip()
+
+    def _trip(self) -> None:
+        logger.warning(
+            "Telegram circuit breaker opened (consecutive failures=%s, retry in %ss)",
+            max(self._failures, 1),
+            self._reset_timeout,
+        )
+        self._failures = 0
+        self._probe_in_flight = False
+        self._opened_at = time.monotonic()
+        self._set_state(OPEN)
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        CIRCUIT_STATE.set(_STATE_VALUES[state])
+
+
+_breaker: CircuitBreaker | None = None
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Общий на процесс breaker для всех вызовов telegram_sender."""
+    global _breaker
+    if _breaker is None:
+        st = get_settings()
+        _breaker = CircuitBreaker(
+            failure_threshold=st.telegram_breaker_failure_threshold,
+            reset_timeout=float(st.telegram_breaker_reset_seconds),
+        )
+    return _breaker
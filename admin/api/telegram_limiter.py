@@ -0,0 +1,112 @@
+"""
+Адаптивный лимит одновременных запросов к Telegram Bot API (AIMD).
+Пока вызовы успешны и укладываются в целевую задержку — лимит растёт аддитивно (~+1 за «окно»),
+на 429, таймаутах и ошибках прокси — уменьшается мультипликативно.
+Текущий лимит экспортируется в Prometheus (telegram_send_concurrency_limit).
+"""
+import asyncio
+import time
+from collections import deque
+
+from prometheus_client import Gauge
+
+from config.settings import get_settings
+
+SEND_CONCURRENCY_LIMIT = Gauge(
+    "telegram_send_concurrency_limit", "Current adaptive limit of in-flight Telegram API requests"
+)
+SEND_IN_FLIGHT = Gauge("telegram_send_in_flight", "Telegram API requests in flight")
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Семафор с изменяемым лимитом. Не держит asyncio-примитивов, привязанных к циклу событий,
+    поэтому один экземпляр на процесс безопасен и в тестах (каждый тест — свой event loop).
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        latency_target: float,
+        backoff_factor: float = 0.5,
+    ) -> None:
+        self._min = max(1, minimum)
+        self._max = max(self._min, maximum)
+        self._limit = float(min(max(initial, self._min), self._max))
+        self._latency_target = latency_target
+        self._backoff_factor = min(max(backoff_factor, 0.1), 0.9)
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        SEND_CONCURRENCY_LIMIT.set(self.limit)
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self) -> None:
+        while self._in_flight >= self.limit:
+            fut = asyncio.get_running_loop().create_future()
+            self._waiters.append(fut)
+            try:
+                await fut
+            finally:
+                if fut in self._waiters:
+                    self._waiters.remove(fut)
+        self._in_flight += 1
+        SEND_IN_FLIGHT.set(self._in_flight)
+
+    def release(self) -> None:
+        self._in_flight = max(0, self._in_flight - 1)
+        SEND_IN_FLIGHT.set(self._in_flight)
+        self._wake_waiters()
+
+    def on_success(self, latency: float) -> None:
+        """Успешный вызов: при задержке в пределах цели — аддитивное увеличение."""
+        if latency > self._latency_target or self._limit >= self._max:
+            return
+        self._limit = min(float(self._max), self._limit + 1.0 / self._limit)
+        SEND_CONCURRENCY_LIMIT.set(self.limit)
+        self._wake_waiters()
+
+    def on_overload(self) -> None:
+        """429 / таймаут / ошибка прокси: мультипликативное уменьшение (не чаще раза за окно задержки)."""
+        now = time.monotonic()
+        if now - self._last_decrease < self._latency_target:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self._min), self._limit * self._backoff_factor)
+        SEND_CONCURRENCY_LIMIT.set(self.limit)
+
+    def _wake_waiters(self) -> None:
+        free = self.limit - self._in_flight
+        while free > 0 and self._waiters:
+            fut = self._waiters.popleft()
+            if fut.done() or fut.get_loop().is_closed():
+                continue
+            fut.set_result(None)
+            free -= 1
+
+
+_limiter: AdaptiveConcurrencyLimiter | None = None
+
+
+def get_send_limiter() -> AdaptiveConcurrencyLimiter:
+    """Общий на процесс лимитер для всех вызовов telegram_sender."""
+    global _limiter
+    if _limiter is None:
+        st = get_settings()
+        _limiter = AdaptiveConcurrencyLimiter(
+            initial=st.telegram_send_concurrency_initial,
+            minimum=st.telegram_send_concurrency_min,
+            maximum=st.telegram_send_concurrency_max,
+            latency_target=st.telegram_send_latency_target_ms / 1000.0,
+            backoff_factor=st.telegram_send_backoff_factor,
+        )
+    return _limiter
@@ -0,0 +1,46 @@
+"""
+httpx-транспорт, распределяющий запросы к Telegram по пулу прокси (config.proxy_pool).
+На каждый прокси — свой AsyncHTTPTransport с собственным пулом соединений;
+задержка до заголовков ответа и сетевые ошибки учитываются в оценке прокси.
+"""
+import time
+
+import httpx
+
+from config.proxy_pool import PROBE_URL, ProxyPool
+
+# Ошибки, при которых виноват путь до Telegram (прокси), а не сам запрос
+_PROXY_ERRORS = (httpx.TimeoutException, httpx.ProxyError, httpx.NetworkError)
+
+
+class PooledProxyTransport(httpx.AsyncBaseTransport):
+    def __init__(self, pool: ProxyPool) -> None:
+        self._pool = pool
+        self._transports = {url: httpx.AsyncHTTPTransport(proxy=url) for url in pool.urls}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        url = self._pool.pick()
+        self._pool.begin(url)
+        start = time.monotonic()
+        try:
+            response = await self._transports[url].handle_async_request(request)
+        except _PROXY_ERRORS:
+            self._pool.record_failure(url)
+            raise
+        finally:
+            self._pool.end(url)
+        if response.status_code >= 500:
+            self._pool.record_failure(url)
+        else:
+            self._pool.record_success(url, time.monotonic() - start)
+        return response
+
+    async def aclose(self) -> None:
+        for transport in self._transports.values():
+            await transport.aclose()
+
+
+async def probe_proxy(url: str) -> None:
+    """Проба для ProxyPool.run_health_checks: любой HTTP-ответ от api.telegram.org через прокси."""
+    async with httpx.AsyncClient(proxy=url, timeout=10.0) as client:
+        await client.head(PROBE_URL)
@@ -1,38 +1,45 @@
 """
 Отправка сообщений в Telegram (Bot API).
 Используется для рассылки в бот (подписчикам) и в каналы.
+Все вызовы проходят через адаптивный лимит одновременных запросов (telegram_limiter)
+и circuit breaker (telegram_breaker): при разомкнутом breaker запрос не уходит в сеть.
 В тестах можно подставить mock-клиент и проверять вызовы.
 """
 import json
 import logging
-import os
+import secrets
+import time
 from typing import Any
 
 import httpx
 
-from config.settings import get_settings
+from admin.api.telegram_breaker import CircuitBreaker, get_circuit_breaker
+from admin.api.telegram_limiter import AdaptiveConcurrencyLimiter, get_send_limiter
+from admin.api.telegram_proxy_transport import PooledProxyTransport
+from config.proxy_pool import get_proxy_pool, telegram_proxy_urls
 
 TELEGRAM_API = "https://api.telegram.org"
 PARSE_MODE_HTML = "HTML"
+CIRCUIT_OPEN_ERROR = "Telegram API недоступен (circuit breaker разомкнут), отправка отложена"
+# Telegram не ответил (сеть, таймаут, прокси) или ответил 5xx — сбой транспорта, а не получателя
+TRANSPORT_ERROR_PREFIX = "Сбой связи с Telegram: "
 
 logger = logging.getLogger(__name__)
 
 
 def telegram_http_kwargs(timeout: float = 30.0) -> dict[str, Any]:
-    """Параметры httpx.AsyncClient для api.telegram.org (TELEGRAM_PROXY / HTTPS_PROXY, как у бота)."""
-    settings = get_settings()
-    proxy: str | None = None
-    if settings.telegram_proxy and settings.telegram_proxy.strip():
-        proxy = settings.telegram_proxy.strip()
-    else:
-        for key in ("HTTPS_PROXY", "https_proxy", "HTTP_PROXY", "http_proxy"):
-            v = os.environ.get(key)
-            if v and v.strip():
-                proxy = v.strip()
-                break
+    """
+    Параметры httpx.AsyncClient для api.telegram.org (TELEGRAM_PROXY / HTTPS_PROXY, как у бота).
+    Если в TELEGRAM_PROXY несколько адресов — транспорт с балансировкой по пулу прокси.
+    """
     kw: dict[str, Any] = {"timeout": timeout}
-    if proxy:
-        kw["proxy"] = proxy
+    pool = get_proxy_pool()
+    if pool is not None:
+        kw["transport"] = PooledProxyTransport(pool)
+        return kw
+    proxies = telegram_proxy_urls()
+    if proxies:
+        kw["proxy"] = proxies[0]
     return kw
 
 
@@ -199,6 +206,167 @@ async def send_document_by_bytes(
     return await _post_multipart(client, api_url, data, files, timeout=60.0)
 
 
+# --- Шаблоны запросов для массовой рассылки ---
+# Сообщение сериализуется один раз (JSON или multipart), на каждого получателя
+# подставляется только chat_id — без повторной сборки payload и json.dumps(reply_markup).
+
+_MEDIA_METHODS = {
+    "photo": ("sendPhoto", "photo"),
+    "video": ("sendVideo", "video"),
+    "document": ("sendDocument", "document"),
+}
+
+
+class RequestTemplate:
+    """Готовое тело запроса к Bot API со «слотом» под chat_id."""
+
+    __slots__ = ("method", "url", "fields", "content_type", "timeout", "_head", "_tail")
+
+    def __init__(
+        self,
+        method: str,
+        url: str,
+        fields: dict[str, Any],
+        content_type: str,
+        head: bytes,
+        tail: bytes,
+        timeout: float,
+    ) -> None:
+        self.method = method
+        self.url = url
+        self.fields = fields
+        self.content_type = content_type
+        self.timeout = timeout
+        self._head = head
+        self._tail = tail
+
+    def body(self, chat_id: str | int) -> bytes:
+        if self.content_type == "application/json":
+            chat = json.dumps(chat_id, ensure_ascii=False).encode()
+        else:
+            chat = str(chat_id).encode()
+        return self._head + chat + self._tail
+
+
+def _caption_fields(caption: str | None, parse_mode: str, reply_markup: dict[str, Any] | None) -> dict[str, Any]:
+    fields: dict[str, Any] = {}
+    if caption:
+        fields["caption"] = caption[:1024]
+        fields["parse_mode"] = parse_mode
+    if reply_markup is not None:
+        fields["reply_markup"] = reply_markup
+    return fields
+
+
+def _json_template(bot_token: str, method: str, fields: dict[str, Any], timeout: float) -> RequestTemplate:
+    rest = json.dumps(fields, ensure_ascii=False, separators=(",", ":")).encode()
+    # '{"chat_id":' + <chat_id> + ',' + остальные поля без открывающей скобки
+    tail = (b"," + rest[1:]) if fields else b"}"
+    return RequestTemplate(
+        method, f"{TELEGRAM_API}/bot{bot_token}/{method}", fields, "application/json", b'{"chat_id":', tail, timeout
+    )
+
+
+def compile_text(
+    bot_token: str,
+    text: str,
+    parse_mode: str = PARSE_MODE_HTML,
+    *,
+    reply_markup: dict[str, Any] | None = None,
+) -> RequestTemplate:
+    """Шаблон sendMessage (как send_text)."""
+    fields: dict[str, Any] = {"text": text[:4096], "parse_mode": parse_mode}
+    if reply_markup is not None:
+        fields["reply_markup"] = reply_markup
+    return _json_template(bot_token, "sendMessage", fields, 30.0)
+
+
+def compile_media(
+    bot_token: str,
+    kind: str,
+    media_url: str,
+    caption: str | None = None,
+    parse_mode: str = PARSE_MODE_HTML,
+    *,
+    reply_markup: dict[str, Any] | None = None,
+) -> RequestTemplate:
+    """Шаблон sendPhoto / sendVideo / sendDocument по URL или file_id (kind: photo, video, document)."""
+    method, field = _MEDIA_METHODS.get(kind, _MEDIA_METHODS["document"])
+    fields = {field: media_url, **_caption_fields(caption, parse_mode, reply_markup)}
+    return _json_template(bot_token, method, fields, 30.0 if kind == "photo" else 60.0)
+
+
+def compile_media_upload(
+    bot_token: str,
+    kind: str,
+    file_bytes: bytes,
+    filename: str,
+    content_type: str,
+    caption: str | None = None,
+    parse_mode: str = PARSE_MODE_HTML,
+    *,
+    reply_markup: dict[str, Any] | None = None,
+) -> RequestTemplate:
+    """Шаблон загрузки файла (multipart): тело с файлом собирается один раз на всю рассылку."""
+    method, field = _MEDIA_METHODS.get(kind, _MEDIA_METHODS["document"])
+    fields = _caption_fields(caption, parse_mode, reply_markup)
+    boundary = secrets.token_hex(16).encode()
+    parts: list[bytes] = []
+    for name, value in fields.items():
+        if not isinstance(value, str):
+            value = json.dumps(value, ensure_ascii=False)
+        parts.append(
+            b"--" + boundary + b"\r\n"
+            + f'Content-Disposition: form-data; name="{name}"\r\n\r\n'.encode()
+            + value.encode() + b"\r\n"
+        )
+    safe_name = filename.replace("\\", "\\\\").replace('"', "%22").replace("\r", "").replace("\n", "")
+    parts.append(
+        b"--" + boundary + b"\r\n"
+        + f'Content-Disposition: form-data; name="{field}"; filename="{safe_name}"\r\n'.encode()
+        + f"Content-Type: {content_type}\r\n\r\n".encode()
+        + file_bytes + b"\r\n"
+    )
+    head = b"--" + boundary + b'\r\nContent-Disposition: form-data; name="chat_id"\r\n\r\n'
+    tail = b"\r\n" + b"".join(parts) + b"--" + boundary + b"--\r\n"
+    return RequestTemplate(
+        method,
+        f"{TELEGRAM_API}/bot{bot_token}/{method}",
+        {**fields, field: filename},
+        f"multipart/form-data; boundary={boundary.decode()}",
+        head,
+        tail,
+        60.0,
+    )
+
+
+def uploaded_file_id(template: RequestTemplate, data: dict[str, Any] | None) -> str | None:
+    """file_id загруженного файла из ответа Telegram — чтобы следующим получателям слать без повторной загрузки."""
+    result = (data or {}).get("result") or {}
+    if template.method == "sendPhoto":
+        sizes = result.get("photo") or []
+        return sizes[-1].get("file_id") if sizes else None
+    media = result.get("video") or result.get("document") or result.get("animation") or {}
+    return media.get("file_id")
+
+
+async def send_template(
+    template: RequestTemplate,
+    chat_id: str | int,
+    *,
+    client: httpx.AsyncClient | None = None,
+) -> tuple[dict[str, Any] | None, str | None]:
+    """Отправить заранее собранный запрос одному получателю (подставляется только chat_id)."""
+    return await _request(
+        client,
+        template.url,
+        template.timeout,
+        "Telegram",
+        content=template.body(chat_id),
+        headers={"Content-Type": template.content_type},
+    )
+
+
 def _error_description(data: dict[str, Any]) -> str:
     """Текст ошибки из ответа Telegram API для показа пользователю."""
     desc = data.get("description") or data.get("error") or ""
@@ -208,21 +376,45 @@ def _error_description(data: dict[str, Any]) -> str:
     return desc or "неизвестная ошибка"
 
 
+def is_transport_error(err: str | None) -> bool:
+    """
+    Отправку есть смысл повторить позже: breaker разомкнут или сбой транспорта.
+    Ошибки API 4xx (бот заблокирован, чат не найден) относятся к получателю — повтор не поможет.
+    """
+    return err is not None and (err == CIRCUIT_OPEN_ERROR or err.startswith(TRANSPORT_ERROR_PREFIX))
+
+
+def _is_overload_exception(e: Exception) -> bool:
+    """Таймауты и сетевые/прокси-ошибки — признак перегрузки канала до Telegram."""
+    return isinstance(e, (httpx.TimeoutException, httpx.ProxyError, httpx.NetworkError))
+
+
+def _record_response(
+    limiter: AdaptiveConcurrencyLimiter, breaker: CircuitBreaker, r: httpx.Response, latency: float
+) -> None:
+    """
+    Обратная связь лимитеру и breaker: успех — возможно увеличить лимит, 429 и 5xx — уменьшить.
+    Для breaker сбой транспорта — только 5xx (Telegram/прокси); 4xx означает, что API доступен.
+    """
+    if r.is_success:
+        limiter.on_success(latency)
+        breaker.record_success()
+    elif r.status_code >= 500:
+        limiter.on_overload()
+        breaker.record_failure()
+    else:
+        if r.status_code == 429:
+            limiter.on_overload()
+        breaker.record_success()
+
+
 async def _post(client: httpx.AsyncClient, url: str, json: dict[str, Any]) -> tuple[dict[str, Any] | None, str | None]:
     """
     Возвращает (data, None) при успехе или (None, error_message) при ошибке.
+    Число одновременных запросов ограничивает адаптивный лимитер; при разомкнутом breaker —
+    сразу (None, CIRCUIT_OPEN_ERROR) без обращения к сети.
     """
-    try:
-        r = await client.post(url, json=json)
-        data = r.json() if r.content else {}
-        if not r.is_success:
-            msg = _error_description(data)
-            logger.warning("Telegram API error: %s %s", r.status_code, data)
-            return None, msg
-        return data, None
-    except Exception as e:
-        logger.exception("Telegram send failed: %s", e)
-        return None, str(e)
+    return await _request(client, url, 30.0, "Telegram", json=json)
 
 
 async def _post_multipart(
@@ -233,18 +425,46 @@ async def _post_multipart(
     timeout: float = 30.0,
 ) -> tuple[dict[str, Any] | None, str | None]:
     """POST multipart/form-data. Возвращает (data, None) при успехе или (None, error_message)."""
+    return await _request(client, url, timeout, "Telegram multipart", data=data, files=files)
+
+
+async def _request(
+    client: httpx.AsyncClient | None,
+    url: str,
+    timeout: float,
+    label: str,
+    **request_kw: Any,
+) -> tuple[dict[str, Any] | None, str | None]:
+    """Общий POST к Bot API: breaker, адаптивный лимит, разбор ответа."""
+    breaker = get_circuit_breaker()
+    if not breaker.allow():
+        return None, CIRCUIT_OPEN_ERROR
+    limiter = get_send_limiter()
+    await limiter.acquire()
+    started = time.monotonic()
+    responded = False
     try:
         if client is None:
             async with httpx.AsyncClient(**telegram_http_kwargs(timeout)) as c:
-                r = await c.post(url, data=data, files=files)
+                r = await c.post(url, **request_kw)
         else:
-            r = await client.post(url, data=data, files=files)
+            r = await client.post(url, **request_kw)
+        responded = True
+        _record_response(limiter, breaker, r, time.monotonic() - started)
         result = r.json() if r.content else {}
         if not r.is_success:
             msg = _error_description(result)
-            logger.warning("Telegram API multipart error: %s %s", r.status_code, result)
-            return None, msg
+            logger.warning("%s API error: %s %s", label, r.status_code, result)
+            return None, (TRANSPORT_ERROR_PREFIX + msg) if r.status_code >= 500 else msg
         return result, None
     except Exception as e:
-        logger.exception("Telegram multipart send failed: %s", e)
-        return None, str(e)
+        if _is_overload_exception(e):
+            limiter.on_overload()
+        if not responded:
+            breaker.record_failure()
+        logger.exception("%s send failed: %s", label, e)
+        msg = str(e) or type(e).__name__
+        # Ответа нет или это не JSON от 5xx (страница ошибки прокси) — сбой транспорта
+        return None, (TRANSPORT_ERROR_PREFIX + msg) if not responded or r.status_code >= 500 else msg
+    finally:
+        limiter.release()
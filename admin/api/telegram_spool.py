@@ -0,0 +1,102 @@
+"""
+Локальный durable-спул отложенных отправок в Telegram (SQLite-файл).
+Когда circuit breaker разомкнут, рассылка складывает сюда задания (получатель + сообщение),
+а воркер в main.py дочищает спул с заданной скоростью после успешной пробы.
+"""
+import asyncio
+import json
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any
+
+from prometheus_client import Gauge
+
+from config.settings import get_settings
+
+SPOOL_PENDING = Gauge("telegram_spool_pending", "Telegram sends waiting in the local spool")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS telegram_spool (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL
+)
+"""
+
+
+class TelegramSpool:
+    """Очередь FIFO на SQLite. Вызовы sqlite3 выполняются в потоке, чтобы не блокировать event loop."""
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self._path, timeout=30.0)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def _enqueue_many(self, jobs: list[dict[str, Any]]) -> int:
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT INTO telegram_spool (created_at, payload) VALUES (?, ?)",
+                [(now, json.dumps(job, ensure_ascii=False)) for job in jobs],
+            )
+            return conn.execute("SELECT COUNT(*) FROM telegram_spool").fetchone()[0]
+
+    def _fetch(self, limit: int) -> list[tuple[int, dict[str, Any]]]:
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute(
+                "SELECT id, payload FROM telegram_spool ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def _remove(self, ids: list[int]) -> int:
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("DELETE FROM telegram_spool WHERE id = ?", [(i,) for i in ids])
+            return conn.execute("SELECT COUNT(*) FROM telegram_spool").fetchone()[0]
+
+    def _count(self) -> int:
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("SELECT COUNT(*) FROM telegram_spool").fetchone()[0]
+
+    async def enqueue_many(self, jobs: list[dict[str, Any]]) -> None:
+        if not jobs:
+            return
+        pending = await asyncio.to_thread(self._enqueue_many, jobs)
+        SPOOL_PENDING.set(pending)
+
+    async def fetch(self, limit: int) -> list[tuple[int, dict[str, Any]]]:
+        """Первые limit заданий (id, payload). Задание удаляется только через remove()."""
+        return await asyncio.to_thread(self._fetch, limit)
+
+    async def remove(self, ids: list[int]) -> None:
+        if not ids:
+            return
+        pending = await asyncio.to_thread(self._remove, ids)
+        SPOOL_PENDING.set(pending)
+
+    async def count(self) -> int:
+        pending = await asyncio.to_thread(self._count)
+        SPOOL_PENDING.set(pending)
+        return pending
+
+
+_spool: TelegramSpool | None = None
+
+
+def get_spool() -> TelegramSpool:
+    global _spool
+    if _spool is None:
+        _spool = TelegramSpool(get_settings().telegram_spool_path)
+    return _spool
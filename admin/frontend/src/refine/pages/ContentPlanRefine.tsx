@@ -66,6 +66,36 @@ export function ContentPlanList() {
     message?: string;
     data?: { sent_bot?: number; sent_channel?: number; errors?: string[]; hint?: string; channels_count?: number };
   }>();
+  const { mutate: retryFailed, isPending: retryPending } = useCustomMutation<{
+    message?: string;
+    data?: { targets?: number; sent_bot?: number; sent_channel?: number; spooled?: number; errors?: string[] };
+  }>();
+
+  const handleRetryFailed = (record: ContentPlanRecord) => {
+    retryFailed(
+      {
+        url: `/content-plan/${record.id}/retry-failed`,
+        method: "post",
+        values: {},
+      },
+      {
+        onSuccess: (res) => {
+          const data = res?.data ?? {};
+          const delivered = (data.sent_bot ?? 0) + (data.sent_channel ?? 0);
+          const errs = data.errors ?? [];
+          const text = `Повтор: получателей ${data.targets ?? 0}, доставлено ${delivered}.${errs.length ? ` Ошибки: ${errs.join("; ")}` : ""}`;
+          if (errs.length) {
+            message.warning(text, 12);
+          } else {
+            message.success(text);
+          }
+        },
+        onError: (e) => {
+          message.error(e?.message ?? "Ошибка повтора отправки");
+        },
+      }
+    );
+  };
 
   const handleSend = (record: ContentPlanRecord) => {
     if (record.status === "sent") {
@@ -142,7 +172,7 @@ export function ContentPlanList() {
         />
         <Table.Column<ContentPlanRecord>
           title="Действия"
-          width={180}
+          width={240}
           render={(_, record) => (
             <>
               {record.status !== "sent" && (
@@ -156,6 +186,16 @@ export function ContentPlanList() {
                   Отправить
                 </Button>
               )}
+              {record.status === "sent" && (
+                <Button
+                  size="small"
+                  loading={retryPending}
+                  onClick={() => handleRetryFailed(record)}
+                  style={{ marginRight: 8 }}
+                >
+                  Повторить неудачные
+                </Button>
+              )}
               <EditButton hideText size="small" recordItemId={record.id} />
               <DeleteButton hideText size="small" recordItemId={record.id} />
             </>
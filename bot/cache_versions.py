@@ -0,0 +1,85 @@
+"""
+Фоновое чтение версий кэшей (database.cache_versions) для in-process кэшей бота.
+Пока версия неизвестна (опрос не запущен или БД недоступна), кэши не используются.
+Тем же опросом читаются пользователи, чей профиль изменил бот (users.profile_updated_at), — подписчики
+on_users_changed сбрасывают только их записи.
+"""
+import asyncio
+import logging
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from database.cache_versions import (
+    CONTENT_VERSION,
+    EVENTS_VERSION,
+    MANAGERS_VERSION,
+    USERS_VERSION,
+    read_cache_versions,
+    read_changed_users,
+)
+from database.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+WATCHED_KEYS = [CONTENT_VERSION, EVENTS_VERSION, MANAGERS_VERSION, USERS_VERSION]
+# Версия-заглушка, пока админка ещё ни разу не меняла данные (строки в system_settings нет)
+INITIAL_VERSION = "0"
+# Запас при чтении изменённых профилей: транзакция со штампом могла закоммититься уже после прошлого опроса
+USERS_CHANGED_GRACE = timedelta(seconds=30)
+
+
+class CacheVersionWatcher:
+    def __init__(self, keys: list[str]) -> None:
+        self._keys = list(keys)
+        self._versions: dict[str, str] = {}
+        # Граница чтения изменённых профилей и уже разосланные подписчикам (id → штамп) внутри запаса
+        self._users_since: datetime | None = None
+        self._user_stamps: dict[int, datetime] = {}
+        self._user_listeners: list[Callable[[list[int]], None]] = []
+
+    def version(self, key: str) -> str | None:
+        return self._versions.get(key)
+
+    def on_users_changed(self, callback: Callable[[list[int]], None]) -> None:
+        self._user_listeners.append(callback)
+
+    async def refresh(self) -> None:
+        started = datetime.utcnow()
+        async with SessionLocal() as session:
+            found = await read_cache_versions(session, self._keys)
+            changed = await read_changed_users(session, self._users_since) if self._users_since else {}
+        for key in self._keys:
+            value = found.get(key, INITIAL_VERSION)
+            if self._versions.get(key) not in (None, value):
+                logger.info("Cache version changed: %s", key)
+            self._versions[key] = value
+        self._users_since = started - USERS_CHANGED_GRACE
+        fresh = [user_id for user_id, stamp in changed.items() if self._user_stamps.get(user_id) != stamp]
+        self._user_stamps = changed
+        if fresh:
+            for callback in self._user_listeners:
+                callback(fresh)
+
+    async def run(self, interval: float) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except SQLAlchemyError as e:
+                # Не знаем актуальную версию — не отдаём из кэша возможно устаревшие данные
+                logger.warning("Cache version poll failed: %s", e)
+                self._versions.clear()
+            await asyncio.sleep(interval)
+
+
+_watcher: CacheVersionWatcher | None = None
+
+
+def get_cache_versions() -> CacheVersionWatcher:
+    global _watcher
+    if _watcher is None:
+        _watcher = CacheVersionWatcher(WATCHED_KEYS)
+    return _watcher
@@ -0,0 +1,101 @@
+"""
+Курсоры keyset-пагинации для кнопок «Показать ещё» (callback_data до 64 байт).
+Время кодируется микросекундами от эпохи в base36, id — тоже base36:
+контент — «<published_at>.<created_at>.<id>» (пустой published_at = NULL), мероприятия — «<event_date>.<id>»,
+лента «Что нового» — «<время публикации>.<таблица>.<id>».
+Старые кнопки с числовым offset продолжают работать (см. parse_page_token).
+"""
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+class ContentCursor(NamedTuple):
+    published_at: datetime | None
+    created_at: datetime
+    id: int
+
+
+class EventCursor(NamedTuple):
+    event_date: datetime
+    id: int
+
+
+class FeedCursor(NamedTuple):
+    """Позиция в общей ленте акций, новинок и приходов: время публикации, таблица, id."""
+
+    published: datetime
+    table: str
+    id: int
+
+
+def _b36(n: int) -> str:
+    if n < 0:
+        return "-" + _b36(-n)
+    out = ""
+    while True:
+        n, r = divmod(n, 36)
+        out = _DIGITS[r] + out
+        if n == 0:
+            return out
+
+
+def _ts(dt: datetime) -> str:
+    return _b36((dt.replace(tzinfo=None) - _EPOCH) // _MICROSECOND)
+
+
+def _parse_ts(raw: str) -> datetime:
+    return _EPOCH + int(raw, 36) * _MICROSECOND
+
+
+def encode_content_cursor(published_at: datetime | None, created_at: datetime, item_id: int) -> str:
+    return f"{_ts(published_at) if published_at else ''}.{_ts(created_at)}.{_b36(item_id)}"
+
+
+def encode_event_cursor(event_date: datetime, event_id: int) -> str:
+    return f"{_ts(event_date)}.{_b36(event_id)}"
+
+
+def encode_feed_cursor(published: datetime, table: str, item_id: int) -> str:
+    return f"{_ts(published)}.{table}.{_b36(item_id)}"
+
+
+def parse_page_token(token: str) -> tuple[int, str | None]:
+    """(offset, курсор): числовой токен — offset из старых кнопок, иначе курсор."""
+    if token.isdigit():
+        return int(token), None
+    return 0, token
+
+
+def decode_content_cursor(token: str) -> ContentCursor | None:
+    try:
+        published, created, item_id = token.split(".")
+        return ContentCursor(_parse_ts(published) if published else None, _parse_ts(created), int(item_id, 36))
+    except (ValueError, OverflowError):
+        return None
+
+
+def content_order_key(cursor: ContentCursor) -> tuple:
+    """Ключ по возрастанию для порядка ленты: published_at desc nulls last, created_at desc, id desc."""
+    published_at, created_at, item_id = cursor
+    published = (published_at - _EPOCH) // _MICROSECOND if published_at else 0
+    return (published_at is None, -published, -((created_at - _EPOCH) // _MICROSECOND), -item_id)
+
+
+def decode_event_cursor(token: str) -> EventCursor | None:
+    try:
+        event_date, event_id = token.split(".")
+        return EventCursor(_parse_ts(event_date), int(event_id, 36))
+    except (ValueError, OverflowError):
+        return None
+
+
+def decode_feed_cursor(token: str) -> FeedCursor | None:
+    try:
+        published, table, item_id = token.split(".")
+        return FeedCursor(_parse_ts(published), table, int(item_id, 36))
+    except (ValueError, OverflowError):
+        return None
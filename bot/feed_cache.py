@@ -0,0 +1,82 @@
+"""
+Кэш готовой ленты контента (акции / новинки / приходы) на процесс бота: по (таблица, user_type)
+хранится упорядоченный список карточек с уже собранным HTML-текстом и ссылкой на медиа.
+Лента сбрасывается при смене версии cache_version:content (её меняет админ API).
+"""
+from bisect import bisect_right
+from collections.abc import Awaitable, Callable
+
+from bot.cache_versions import get_cache_versions
+from bot.cursors import ContentCursor, content_order_key
+from database.cache_versions import CONTENT_VERSION
+
+# Лента длиннее — хвост читается из БД (кэшируется только начало)
+FEED_MAX_ITEMS = 500
+
+
+class FeedItem:
+    """Карточка ленты, готовая к отправке."""
+
+    __slots__ = ("table", "id", "image_url", "text", "cursor")
+
+    def __init__(
+        self, table: str, item_id: int, image_url: str | None, text: str, cursor: ContentCursor | None = None
+    ) -> None:
+        self.table = table
+        self.id = item_id
+        self.image_url = image_url
+        self.text = text
+        # Позиция карточки в ленте — для кнопки «Показать ещё» (keyset)
+        self.cursor = cursor
+
+
+class FeedCache:
+    def __init__(self) -> None:
+        # (table, user_type) -> (version, items, complete)
+        self._feeds: dict[tuple[str, str], tuple[str, list[FeedItem], bool]] = {}
+
+    async def page(
+        self,
+        table: str,
+        user_type: str,
+        offset: int,
+        limit: int,
+        load: Callable[[int, int], Awaitable[list[FeedItem]]],
+        *,
+        after: ContentCursor | None = None,
+        seek: Callable[[ContentCursor, int], Awaitable[list[FeedItem]]] | None = None,
+    ) -> list[FeedItem]:
+        """
+        Срез ленты [offset, offset + limit) или, если задан after, limit карточек после курсора.
+        load(offset, limit) / seek(after, limit) читают из БД;
+        при известной версии лента загружается один раз и дальше отдаётся из памяти.
+        """
+        version = get_cache_versions().version(CONTENT_VERSION)
+        if version is None:
+            return await seek(after, limit) if after is not None else await load(offset, limit)
+        key = (table, user_type)
+        cached = self._feeds.get(key)
+        if cached is None or cached[0] != version:
+            items = await load(0, FEED_MAX_ITEMS + 1)
+            complete = len(items) <= FEED_MAX_ITEMS
+            cached = (version, items[:FEED_MAX_ITEMS], complete)
+            self._feeds[key] = cached
+        _, items, complete = cached
+        if after is not None:
+            # Позиция курсора в закэшированной ленте: запись могла исчезнуть — ищем по ключу сортировки
+            offset = bisect_right(items, content_order_key(after), key=lambda item: content_order_key(item.cursor))
+            if not complete and offset + limit > len(items):
+                return await seek(after, limit)
+        elif not complete and offset + limit > len(items):
+            return await load(offset, limit)
+        return items[offset:offset + limit]
+
+
+_feed_cache: FeedCache | None = None
+
+
+def get_feed_cache() -> FeedCache:
+    global _feed_cache
+    if _feed_cache is None:
+        _feed_cache = FeedCache()
+    return _feed_cache
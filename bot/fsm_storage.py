@@ -0,0 +1,162 @@
+"""
+FSM-хранилище aiogram в БД (таблица bot_fsm_state): незавершённая регистрация переживает рестарт,
+а несколько процессов бота видят одно и то же состояние пользователя.
+Состояние, не менявшееся дольше TTL, считается сброшенным и периодически удаляется.
+Write-through кэш в памяти снимает повторные чтения в пределах одного апдейта (короткий срок жизни,
+чтобы соседний процесс не работал с устаревшим состоянием).
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from config.settings import get_settings
+from database.models import BotFsmState
+from database.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+CACHE_MAX_ENTRIES = 10000
+
+
+class DatabaseStorage(BaseStorage):
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        ttl_seconds: float,
+        cache_seconds: float,
+        key_builder: KeyBuilder | None = None,
+        engine: AsyncEngine | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._ttl = timedelta(seconds=ttl_seconds)
+        self._cache_seconds = cache_seconds
+        self._key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        # Собственный движок (отдельная SQLite для одного узла) — таблицу создаём сами и закрываем в close()
+        self._engine = engine
+        self._table_ready = engine is None
+        # key -> (годен до, state, data в JSON)
+        self._cache: OrderedDict[str, tuple[float, str | None, str]] = OrderedDict()
+
+    async def _ensure_table(self) -> None:
+        if self._table_ready:
+            return
+        async with self._engine.begin() as conn:
+            await conn.run_sync(BotFsmState.__table__.create, checkfirst=True)
+        self._table_ready = True
+
+    def _remember(self, key: str, state: str | None, data: str) -> None:
+        if self._cache_seconds <= 0:
+            return
+        self._cache[key] = (time.monotonic() + self._cache_seconds, state, data)
+        self._cache.move_to_end(key)
+        while len(self._cache) > CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
+
+    async def _load(self, key: str) -> tuple[str | None, str]:
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1], cached[2]
+        await self._ensure_table()
+        async with self._session_factory() as session:
+            row = await session.get(BotFsmState, key)
+        if row is None or row.updated_at < datetime.utcnow() - self._ttl:
+            state, data = None, "{}"
+        else:
+            state, data = row.state, row.data
+        self._remember(key, state, data)
+        return state, data
+
+    async def _save(self, key: str, state: str | None, data: str) -> None:
+        await self._ensure_table()
+        # Кэш сбрасываем до записи: при ошибке БД следующее чтение пойдёт в базу
+        self._cache.pop(key, None)
+        for attempt in range(2):
+            try:
+                async with self._session_factory() as session:
+                    row = await session.get(BotFsmState, key)
+                    if state is None and data == "{}":
+                        if row is not None:
+                            await session.delete(row)
+                    elif row is None:
+                        session.add(BotFsmState(key=key, state=state, data=data, updated_at=datetime.utcnow()))
+                    else:
+                        row.state = state
+                        row.data = data
+                        row.updated_at = datetime.utcnow()
+                    await session.commit()
+                break
+            except IntegrityError:
+                # Другой процесс успел вставить ту же строку — повторяем как обновление
+                if attempt:
+                    raise
+        self._remember(key, state, data)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        raw = self._key_builder.build(key)
+        _, data = await self._load(raw)
+        await self._save(raw, state.state if isinstance(state, State) else state, data)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        state, _ = await self._load(self._key_builder.build(key))
+        return state
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        raw = self._key_builder.build(key)
+        state, _ = await self._load(raw)
+        await self._save(raw, state, json.dumps(data, ensure_ascii=False))
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        _, data = await self._load(self._key_builder.build(key))
+        return json.loads(data)
+
+    async def purge_expired(self) -> int:
+        """Удаляет состояния старше TTL, возвращает число удалённых строк."""
+        await self._ensure_table()
+        async with self._session_factory() as session:
+            result = await session.execute(
+                delete(BotFsmState).where(BotFsmState.updated_at < datetime.utcnow() - self._ttl)
+            )
+            await session.commit()
+        return result.rowcount or 0
+
+    async def run_purge(self, interval: float) -> None:
+        while True:
+            try:
+                purged = await self.purge_expired()
+                if purged:
+                    logger.info("Purged %s expired FSM states", purged)
+            except asyncio.CancelledError:
+                raise
+            except SQLAlchemyError as e:
+                logger.warning("FSM state purge failed: %s", e)
+            await asyncio.sleep(interval)
+
+    async def close(self) -> None:
+        self._cache.clear()
+        if self._engine is not None:
+            await self._engine.dispose()
+
+
+def create_fsm_storage() -> BaseStorage:
+    """Хранилище по BOT_FSM_STORAGE: database (общая БД или BOT_FSM_DATABASE_URL) или memory."""
+    settings = get_settings()
+    if settings.bot_fsm_storage.lower() == "memory":
+        return MemoryStorage()
+    ttl = max(60, settings.bot_fsm_state_ttl_hours * 3600)
+    if settings.bot_fsm_database_url:
+        engine = create_async_engine(settings.bot_fsm_database_url, pool_pre_ping=True)
+        factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        return DatabaseStorage(factory, ttl_seconds=ttl, cache_seconds=settings.bot_fsm_cache_seconds, engine=engine)
+    return DatabaseStorage(SessionLocal, ttl_seconds=ttl, cache_seconds=settings.bot_fsm_cache_seconds)
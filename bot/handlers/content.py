@@ -1,8 +1,10 @@
 from aiogram import F, Router
 from aiogram.filters import Command
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
-from sqlalchemy import func, select
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
 
+from bot.cursors import decode_content_cursor, decode_event_cursor, parse_page_token
 from bot.keyboards import (
     BTN_DELIVERIES,
     BTN_EVENTS,
@@ -11,13 +13,16 @@ from bot.keyboards import (
     BTN_NEWS,
     BTN_PROMOTIONS,
     BTN_UPDATE_PROFILE,
+    BTN_WHATS_NEW,
     events_back_keyboard,
     menu_keyboard,
 )
+from bot.manager_index import ManagerCard, get_manager_index
+from bot.middlewares.db_session import get_user_establishment, update_db
 from bot.utils import render_content, render_content_more, render_events, render_events_more
+from bot.whats_new import render_whats_new
 from config.settings import get_settings
-from database.models import Delivery, Event, EventRegistration, Manager, News, Promotion, User
-from database.session import SessionLocal
+from database.models import Delivery, Event, EventRegistration, News, Promotion
 
 router = Router()
 
@@ -26,7 +31,8 @@ HELP_TEXT = (
     "/start — регистрация или обновление профиля\n"
     "/help — справка\n"
     "/menu — показать главное меню\n\n"
-    "После регистрации: <b>Акции</b>, <b>Новости</b>, <b>Приходы</b>, <b>Мероприятия</b>, <b>Мой профиль</b>, связь с менеджером."
+    "После регистрации: <b>Что нового</b> (всё непросмотренное одной лентой), <b>Акции</b>, <b>Новости</b>, <b>Приходы</b>, <b>Мероприятия</b>, <b>Мой профиль</b>, связь с менеджером.\n"
+    "Поиск по акциям, новинкам, приходам и мероприятиям — в любом чате: имя бота через @ и запрос."
 )
 
 
@@ -37,12 +43,7 @@ async def help_command(message: Message) -> None:
 
 @router.message(Command("menu"))
 async def menu_command(message: Message) -> None:
-    establishment = None
-    if message.from_user:
-        async with SessionLocal() as session:
-            user = await session.get(User, message.from_user.id)
-            if user:
-                establishment = user.establishment
+    establishment = await get_user_establishment(message.from_user.id if message.from_user else None)
     kb = await menu_keyboard(user_establishment=establishment)
     await message.answer("<b>Главное меню:</b>", reply_markup=kb, parse_mode="HTML")
 
@@ -62,6 +63,20 @@ async def deliveries_msg(message: Message) -> None:
     await render_content(message, Delivery, "📦 Актуальные приходы:", user_id=message.from_user.id if message.from_user else None)
 
 
+@router.message(F.text == BTN_WHATS_NEW)
+async def whats_new_msg(message: Message) -> None:
+    await render_whats_new(message, user_id=message.from_user.id if message.from_user else None)
+
+
+@router.callback_query(F.data == "whats_new_more")
+async def whats_new_more(callback: CallbackQuery) -> None:
+    if not callback.message:
+        await callback.answer()
+        return
+    await render_whats_new(callback.message, user_id=callback.from_user.id if callback.from_user else None, more=True)
+    await callback.answer()
+
+
 @router.message(F.text == BTN_EVENTS)
 async def events_msg(message: Message) -> None:
     await render_events(message, user_id=message.from_user.id if message.from_user else None)
@@ -70,12 +85,8 @@ async def events_msg(message: Message) -> None:
 
 @router.message(F.text.in_({BTN_MENU, BTN_UPDATE_PROFILE}))
 async def menu_back_msg(message: Message) -> None:
-    kb = await menu_keyboard(with_update_profile=True, user_establishment=None)
-    if message.from_user:
-        async with SessionLocal() as session:
-            user = await session.get(User, message.from_user.id)
-            if user:
-                kb = await menu_keyboard(with_update_profile=True, user_establishment=user.establishment)
+    establishment = await get_user_establishment(message.from_user.id if message.from_user else None)
+    kb = await menu_keyboard(with_update_profile=True, user_establishment=establishment)
     await message.answer("📱 <b>Главное меню</b>\n\nВыберите раздел:", reply_markup=kb, parse_mode="HTML")
 
 
@@ -85,11 +96,7 @@ async def menu_manager_msg(message: Message) -> None:
     user_id = message.from_user.id if message.from_user else None
     if not user_id:
         return
-    user_establishment = None
-    async with SessionLocal() as session:
-        user = await session.get(User, user_id)
-        if user:
-            user_establishment = user.establishment
+    user_establishment = await get_user_establishment(user_id)
     managers = await _get_managers_for_user(user_establishment)
     settings = get_settings()
     if not managers:
@@ -146,27 +153,9 @@ async def menu_manager_msg(message: Message) -> None:
             await message.answer("Нет доступных менеджеров.")
 
 
-async def _get_managers_for_user(user_establishment: str | None) -> list:
+async def _get_managers_for_user(user_establishment: str | None) -> list[ManagerCard]:
     """Менеджеры для показа: один (привязан к заведению) или все из админки."""
-    async with SessionLocal() as session:
-        result = await session.execute(
-            select(Manager).where(
-                Manager.is_active.is_(True), Manager.telegram_username.isnot(None)
-            )
-        )
-        managers = list(result.scalars().all())
-    if not managers:
-        return []
-    establishment_norm = (user_establishment or "").strip().lower()
-    if establishment_norm:
-        for m in managers:
-            names = [e.strip().lower() for e in (m.establishment or "").split(",") if e.strip()]
-            for n in names:
-                if establishment_norm == n or (
-                    len(establishment_norm) >= 3 and establishment_norm in n
-                ):
-                    return [m]
-    return managers
+    return (await get_manager_index()).route(user_establishment)
 
 
 @router.callback_query(F.data == "menu_manager")
@@ -175,12 +164,7 @@ async def menu_manager(callback: CallbackQuery) -> None:
     if not callback.message:
         await callback.answer()
         return
-    user_establishment = None
-    if callback.from_user:
-        async with SessionLocal() as session:
-            user = await session.get(User, callback.from_user.id)
-            if user:
-                user_establishment = user.establishment
+    user_establishment = await get_user_establishment(callback.from_user.id if callback.from_user else None)
     managers = await _get_managers_for_user(user_establishment)
     settings = get_settings()
     if not managers:
@@ -252,35 +236,59 @@ async def manager_contact(callback: CallbackQuery) -> None:
     except ValueError:
         await callback.answer()
         return
-    async with SessionLocal() as session:
-        manager = await session.get(Manager, manager_id)
-        if not manager or not manager.is_active:
-            await callback.answer("Менеджер не найден.", show_alert=True)
-            return
-        uname = (manager.telegram_username or "").strip().lstrip("@")
-        if not uname:
-            await callback.answer("У менеджера не указан Telegram.", show_alert=True)
-            return
-        name = manager.full_name or "Менеджер"
-        phone = manager.phone_number or ""
-        establishment = manager.establishment or ""
-        lines = [f"💬 <b>{name}</b>"]
-        if establishment:
-            lines.append(f"🏢 {establishment}")
-        if phone:
-            lines.append(f"📞 {phone}")
-        lines.append(f"\n@{uname}")
-        lines.append("\nНажмите кнопку ниже, чтобы написать в Telegram.")
-        text = "\n".join(lines)
-        kb = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [InlineKeyboardButton(text="✉️ Написать в Telegram", url=f"https://t.me/{uname}")],
-            ]
-        )
-        await callback.message.answer(text, reply_markup=kb, parse_mode="HTML")
+    manager = (await get_manager_index()).get(manager_id)
+    if manager is None:
+        await callback.answer("Менеджер не найден.", show_alert=True)
+        return
+    uname = (manager.telegram_username or "").strip().lstrip("@")
+    if not uname:
+        await callback.answer("У менеджера не указан Telegram.", show_alert=True)
+        return
+    name = manager.full_name or "Менеджер"
+    phone = manager.phone_number or ""
+    establishment = manager.establishment or ""
+    lines = [f"💬 <b>{name}</b>"]
+    if establishment:
+        lines.append(f"🏢 {establishment}")
+    if phone:
+        lines.append(f"📞 {phone}")
+    lines.append(f"\n@{uname}")
+    lines.append("\nНажмите кнопку ниже, чтобы написать в Telegram.")
+    text = "\n".join(lines)
+    kb = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="✉️ Написать в Telegram", url=f"https://t.me/{uname}")],
+        ]
+    )
+    await callback.message.answer(text, reply_markup=kb, parse_mode="HTML")
     await callback.answer()
 
 
+async def reserve_event_place(session, event_id: int) -> bool:
+    """
+    Занимает место одним условным UPDATE (registered_count < max_places): два одновременных нажатия
+    на последнее место не пройдут оба. Commit — за вызывающим, вместе со вставкой EventRegistration.
+    """
+    result = await session.execute(
+        update(Event)
+        .where(
+            Event.id == event_id,
+            or_(Event.max_places.is_(None), Event.registered_count < Event.max_places),
+        )
+        .values(registered_count=Event.registered_count + 1)
+    )
+    return result.rowcount == 1
+
+
+async def release_event_place(session, event_id: int) -> None:
+    """Освобождает место после удаления записи; commit — за вызывающим."""
+    await session.execute(
+        update(Event)
+        .where(Event.id == event_id, Event.registered_count > 0)
+        .values(registered_count=Event.registered_count - 1)
+    )
+
+
 @router.callback_query(F.data.startswith("event_reg_"))
 async def event_register(callback: CallbackQuery) -> None:
     try:
@@ -292,8 +300,9 @@ async def event_register(callback: CallbackQuery) -> None:
     if not user_id:
         await callback.answer("Ошибка", show_alert=True)
         return
-    async with SessionLocal() as session:
-        user = await session.get(User, user_id)
+    async with update_db(user_id) as db:
+        session = db.session
+        user = await db.user()
         if not user or user.deleted_at:
             await callback.answer("Сначала завершите регистрацию в боте.", show_alert=True)
             return
@@ -302,7 +311,7 @@ async def event_register(callback: CallbackQuery) -> None:
             await callback.answer("Мероприятие не найдено или уже завершено.", show_alert=True)
             return
         existing = await session.scalar(
-            select(EventRegistration).where(
+            select(EventRegistration.id).where(
                 EventRegistration.event_id == event_id,
                 EventRegistration.user_id == user_id,
             )
@@ -310,17 +319,17 @@ async def event_register(callback: CallbackQuery) -> None:
         if existing:
             await callback.answer("Вы уже записаны.")
             return
-        if event.max_places is not None:
-            cnt = await session.scalar(
-                select(func.count())
-                .select_from(EventRegistration)
-                .where(EventRegistration.event_id == event_id)
-            )
-            if (cnt or 0) >= event.max_places:
-                await callback.answer("К сожалению, мест больше нет.", show_alert=True)
-                return
+        if not await reserve_event_place(session, event_id):
+            await callback.answer("К сожалению, мест больше нет.", show_alert=True)
+            return
         session.add(EventRegistration(event_id=event_id, user_id=user_id))
-        await session.commit()
+        try:
+            await session.commit()
+        except IntegrityError:
+            # Повторное нажатие того же пользователя успело записать его раньше — место возвращается откатом
+            await session.rollback()
+            await callback.answer("Вы уже записаны.")
+            return
     await callback.answer("✅ Вы записаны на мероприятие!")
 
 
@@ -335,15 +344,16 @@ async def event_unregister(callback: CallbackQuery) -> None:
     if not user_id:
         await callback.answer("Ошибка", show_alert=True)
         return
-    async with SessionLocal() as session:
-        reg = await session.scalar(
-            select(EventRegistration).where(
+    async with update_db(user_id) as db:
+        session = db.session
+        removed = await session.execute(
+            delete(EventRegistration).where(
                 EventRegistration.event_id == event_id,
                 EventRegistration.user_id == user_id,
             )
         )
-        if reg:
-            await session.delete(reg)
+        if removed.rowcount:
+            await release_event_place(session, event_id)
             await session.commit()
     await callback.answer("Запись на мероприятие отменена.")
 
@@ -358,10 +368,10 @@ async def content_more(callback: CallbackQuery) -> None:
     if len(parts) != 3:
         await callback.answer()
         return
-    _, content_type, raw_offset = parts
-    try:
-        offset = int(raw_offset)
-    except ValueError:
+    _, content_type, token = parts
+    offset, raw_cursor = parse_page_token(token)
+    after = decode_content_cursor(raw_cursor) if raw_cursor else None
+    if raw_cursor and after is None:
         await callback.answer()
         return
     mapping = {
@@ -380,6 +390,7 @@ async def content_more(callback: CallbackQuery) -> None:
         title,
         user_id=callback.from_user.id if callback.from_user else None,
         offset=offset,
+        after=after,
     )
     await callback.answer()
 
@@ -394,14 +405,15 @@ async def events_more(callback: CallbackQuery) -> None:
     if len(parts) != 2:
         await callback.answer()
         return
-    try:
-        offset = int(parts[1])
-    except ValueError:
+    offset, raw_cursor = parse_page_token(parts[1])
+    after = decode_event_cursor(raw_cursor) if raw_cursor else None
+    if raw_cursor and after is None:
         await callback.answer()
         return
     await render_events_more(
         callback.message,
         user_id=callback.from_user.id if callback.from_user else None,
         offset=offset,
+        after=after,
     )
     await callback.answer()
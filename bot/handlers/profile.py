@@ -22,6 +22,7 @@ from bot.keyboards import (
     profile_keyboard,
     request_phone_keyboard,
 )
+from bot.user_cache import get_user_cache
 from database.models import Establishment, User, UserType
 from database.session import SessionLocal
 
@@ -248,7 +249,9 @@ async def save_establishment(message: Message, state: FSMContext) -> None:
                 user.last_activity = datetime.utcnow()
                 user.deleted_at = None
                 session.add(user)
+                user.profile_updated_at = datetime.utcnow()
                 await session.commit()
+                get_user_cache().forget(user.id)
     except SQLAlchemyError:
         logger.exception("Database error updating establishment")
         await message.answer("Не удалось сохранить. Попробуйте позже.")
@@ -271,7 +274,9 @@ async def save_full_name(message: Message, state: FSMContext) -> None:
                 user.last_activity = datetime.utcnow()
                 user.deleted_at = None
                 session.add(user)
+                user.profile_updated_at = datetime.utcnow()
                 await session.commit()
+                get_user_cache().forget(user.id)
     except SQLAlchemyError:
         logger.exception("Database error updating full_name")
         await message.answer("Не удалось сохранить. Попробуйте позже.")
@@ -297,7 +302,9 @@ async def save_birth_date(message: Message, state: FSMContext) -> None:
                 user.last_activity = datetime.utcnow()
                 user.deleted_at = None
                 session.add(user)
+                user.profile_updated_at = datetime.utcnow()
                 await session.commit()
+                get_user_cache().forget(user.id)
     except SQLAlchemyError:
         logger.exception("Database error updating birth_date")
         await message.answer("Не удалось сохранить. Попробуйте позже.")
@@ -317,7 +324,9 @@ async def save_position(message: Message, state: FSMContext) -> None:
                 user.last_activity = datetime.utcnow()
                 user.deleted_at = None
                 session.add(user)
+                user.profile_updated_at = datetime.utcnow()
                 await session.commit()
+                get_user_cache().forget(user.id)
     except SQLAlchemyError:
         logger.exception("Database error updating position")
         await message.answer("Не удалось сохранить. Попробуйте позже.")
@@ -353,7 +362,9 @@ async def save_phone_contact(message: Message, state: FSMContext) -> None:
                 user.last_activity = datetime.utcnow()
                 user.deleted_at = None
                 session.add(user)
+                user.profile_updated_at = datetime.utcnow()
                 await session.commit()
+                get_user_cache().forget(user.id)
     except SQLAlchemyError:
         logger.exception("Database error updating phone")
         await message.answer("Не удалось сохранить. Попробуйте позже.")
@@ -377,7 +388,9 @@ async def save_phone_text(message: Message, state: FSMContext) -> None:
                 user.last_activity = datetime.utcnow()
                 user.deleted_at = None
                 session.add(user)
+                user.profile_updated_at = datetime.utcnow()
                 await session.commit()
+                get_user_cache().forget(user.id)
     except SQLAlchemyError:
         logger.exception("Database error updating phone")
         await message.answer("Не удалось сохранить. Попробуйте позже.")
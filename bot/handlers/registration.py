@@ -18,6 +18,8 @@ from bot.keyboards import (
     request_phone_keyboard,
     type_keyboard,
 )
+from bot.middlewares.db_session import update_db
+from bot.user_cache import get_user_cache
 from config.settings import get_settings
 from database.models import Establishment, User, UserType
 from database.session import SessionLocal
@@ -82,17 +84,17 @@ def _parse_phone_from_text(text: str | None) -> str | None:
 @router.message(CommandStart())
 async def start(message: Message, state: FSMContext) -> None:
     try:
-        async with SessionLocal() as session:
-            user = await session.get(User, message.from_user.id)
-            if user is not None and user.deleted_at is None:
-                await state.clear()
-                kb = await menu_keyboard(with_update_profile=True, user_establishment=user.establishment)
-                await message.answer(
-                    "С возвращением! Выберите раздел:",
-                    reply_markup=kb,
-                    parse_mode="HTML",
-                )
-                return
+        async with update_db(message.from_user.id) as db:
+            user = await db.user()
+        if user is not None and user.deleted_at is None:
+            await state.clear()
+            kb = await menu_keyboard(with_update_profile=True, user_establishment=user.establishment)
+            await message.answer(
+                "С возвращением! Выберите раздел:",
+                reply_markup=kb,
+                parse_mode="HTML",
+            )
+            return
     except SQLAlchemyError:
         logger.exception("Database error in start")
     await state.set_state(Registration.waiting_phone)
@@ -236,7 +238,8 @@ async def save_birth_date(message: Message, state: FSMContext) -> None:
             parse_mode="HTML",
         )
         return
-    await state.update_data(birth_date=birth)
+    # Данные FSM хранятся в JSON (bot_fsm_state) — дату кладём строкой ISO
+    await state.update_data(birth_date=birth.isoformat())
     await state.set_state(Registration.waiting_position)
     await message.answer(
         "Кем вы работаете?\n(Должность или род деятельности)\n\n"
@@ -253,7 +256,7 @@ async def save_position_and_finish(message: Message, state: FSMContext) -> None:
     phone = data.get("phone_number") or ""
     establishment = data["establishment"]
     full_name = data.get("full_name") or ""
-    birth_date: date | None = data.get("birth_date")
+    birth_date = date.fromisoformat(data["birth_date"]) if data.get("birth_date") else None
 
     try:
         async with SessionLocal() as session:
@@ -294,7 +297,9 @@ async def save_position_and_finish(message: Message, state: FSMContext) -> None:
                 user.last_activity = datetime.utcnow()
                 user.deleted_at = None  # повторная регистрация = снять пометку удаления
             session.add(user)
+            user.profile_updated_at = datetime.utcnow()
             await session.commit()
+            get_user_cache().forget(user.id)
             logger.info("User registered in DB: id=%s, establishment=%s", message.from_user.id, establishment)
     except SQLAlchemyError:
         logger.exception("Database error during registration")
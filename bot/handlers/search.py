@@ -0,0 +1,11 @@
+from aiogram import Router
+from aiogram.types import InlineQuery
+
+from bot.inline_search import render_inline_search
+
+router = Router()
+
+
+@router.inline_query()
+async def inline_search(inline_query: InlineQuery) -> None:
+    await render_inline_search(inline_query)
@@ -0,0 +1,35 @@
+"""
+Общий httpx-клиент процесса бота для скачивания медиа (API uploads, S3/MinIO):
+пул соединений с keep-alive вместо нового клиента и TLS-рукопожатия на каждую карточку.
+"""
+import asyncio
+
+import httpx
+
+from config.settings import get_settings
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Клиент привязан к циклу событий, в котором создан (новый цикл — например, в тестах — новый клиент)."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        concurrency = max(1, get_settings().bot_media_prefetch_concurrency)
+        _client = httpx.AsyncClient(
+            timeout=15.0,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=concurrency * 4, max_keepalive_connections=concurrency * 2),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client, _client_loop
+    if _client is not None and _client_loop is asyncio.get_running_loop():
+        await _client.aclose()
+    _client = None
+    _client_loop = None
@@ -0,0 +1,80 @@
+"""
+Ответы на inline-запросы (@бот запрос): результаты из индекса в памяти (bot.search_index),
+карточка результата — тот же текст, что в ленте бота.
+"""
+import html
+import logging
+import re
+
+from aiogram.types import InlineQuery, InlineQueryResultArticle, InlineQueryResultsButton, InputTextMessageContent
+from sqlalchemy.exc import SQLAlchemyError
+
+from bot.middlewares.db_session import update_db
+from bot.search_index import SearchDoc, get_content_search
+from bot.utils import _content_item_text, _is_image_url, _media_url, _truncate_html, _user_denied_text
+from bot.whats_new import WHATS_NEW_SOURCES
+from config.settings import get_settings
+from database.models import Event
+
+settings = get_settings()
+
+# Подписи результатов inline-поиска: разделы «Что нового» и мероприятия
+INLINE_SEARCH_LABELS = {
+    **{table: label for table, (_, label) in WHATS_NEW_SOURCES.items()},
+    Event.__tablename__: "📅 Мероприятие",
+}
+INLINE_SNIPPET_LENGTH = 120
+
+
+def _inline_search_text(doc: SearchDoc) -> str:
+    """Карточка, которую пользователь отправляет в чат, выбрав результат."""
+    label = INLINE_SEARCH_LABELS[doc.table]
+    if doc.event_date is None:
+        return _content_item_text(doc, label)
+    date_str = doc.event_date.strftime("%d.%m.%Y, %H:%M")
+    text = f"{label}\n<b>{html.escape(doc.title)}</b>\n📅 {date_str}\n📍 {html.escape(doc.location)}"
+    if doc.description:
+        text += f"\n\n{html.escape(doc.description)}"
+    return _truncate_html(text)
+
+
+def _inline_search_result(doc: SearchDoc) -> InlineQueryResultArticle:
+    if doc.event_date is not None:
+        snippet = f"{doc.event_date.strftime('%d.%m.%Y, %H:%M')} · {doc.location}".rstrip(" ·")
+    else:
+        plain = re.sub(r"<[^>]+>", " ", doc.description)
+        snippet = " ".join(html.unescape(plain).split())
+    if len(snippet) > INLINE_SNIPPET_LENGTH:
+        snippet = snippet[: INLINE_SNIPPET_LENGTH - 1] + "…"
+    thumbnail = _media_url(doc.image_url) if doc.image_url and _is_image_url(doc.image_url) else None
+    return InlineQueryResultArticle(
+        id=f"{doc.table}:{doc.id}",
+        title=f"{INLINE_SEARCH_LABELS[doc.table]}: {doc.title}",
+        description=snippet or None,
+        thumbnail_url=thumbnail,
+        input_message_content=InputTextMessageContent(message_text=_inline_search_text(doc), parse_mode="HTML"),
+    )
+
+
+async def render_inline_search(inline_query: InlineQuery) -> None:
+    """Ответ на inline-запрос из индекса в памяти: БД — только профиль (из кэша) и сверка при смене версий."""
+    user_id = inline_query.from_user.id
+    try:
+        async with update_db(user_id) as db:
+            user = await db.user()
+            denied = _user_denied_text(user)
+            docs = [] if denied is not None else await get_content_search().search(user.user_type, inline_query.query)
+    except SQLAlchemyError as e:
+        logging.exception("Database error while answering inline query: %s", e)
+        await inline_query.answer([], cache_time=0, is_personal=True)
+        return
+    if denied is not None:
+        # Незарегистрированному — кнопка перехода в бота (/start inline); деактивированному — пусто
+        button = InlineQueryResultsButton(text="Зарегистрироваться в боте", start_parameter="inline") if user is None else None
+        await inline_query.answer([], cache_time=0, is_personal=True, button=button)
+        return
+    await inline_query.answer(
+        [_inline_search_result(doc) for doc in docs],
+        cache_time=settings.bot_inline_cache_seconds,
+        is_personal=True,
+    )
@@ -8,6 +8,7 @@ settings = get_settings()
 BTN_PROMOTIONS = "🎁 Акции"
 BTN_NEWS = "📰 Новости"
 BTN_DELIVERIES = "📦 Приходы"
+BTN_WHATS_NEW = "🆕 Что нового"
 BTN_EVENTS = "🎪 Мероприятия"
 BTN_MANAGER = "💬 Менеджер"
 BTN_PROFILE = "👤 Мой профиль"
@@ -55,6 +56,7 @@ async def menu_keyboard(
     user_establishment: str | None = None,
 ) -> ReplyKeyboardMarkup:
     rows = [
+        [KeyboardButton(text=BTN_WHATS_NEW)],
         [KeyboardButton(text=BTN_PROMOTIONS), KeyboardButton(text=BTN_NEWS)],
         [KeyboardButton(text=BTN_DELIVERIES), KeyboardButton(text=BTN_EVENTS)],
         [KeyboardButton(text=BTN_MANAGER)],
@@ -1,20 +1,41 @@
 import asyncio
 import logging
-import os
-from urllib.parse import urlparse
+import multiprocessing
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.fsm.storage.base import BaseStorage
+from prometheus_client import start_http_server
 
+from bot.cache_versions import get_cache_versions
+from bot.fsm_storage import DatabaseStorage, create_fsm_storage
 from bot.handlers import setup_handlers
+from bot.http_client import close_http_client
+from bot.middlewares import (
+    ActivityMiddleware,
+    DbSessionMiddleware,
+    ReleaseDbBeforeSend,
+    create_concurrency_middleware,
+    create_polling_middleware,
+    create_throttling_middleware,
+    get_activity_tracker,
+    instrument_engine,
+    setup_metrics,
+)
+from bot.proxy_session import PooledAiohttpSession
+from bot.webhook import register_webhook, serve_webhook
 from config.logging import configure_logging
+from config.proxy_pool import get_proxy_pool, redact_proxy_url, telegram_proxy_urls
 from config.settings import get_settings
+from database.session import engine
 
 logging.basicConfig(level=logging.INFO)
 configure_logging()
 settings = get_settings()
 _logger = logging.getLogger(__name__)
 
+FSM_PURGE_INTERVAL_SECONDS = 3600
+
 
 def _redact_db_url(url: str) -> str:
     if "@" in url:
@@ -22,39 +43,128 @@ def _redact_db_url(url: str) -> str:
     return url.replace("sqlite", "sqlite***")
 
 
-def _redact_proxy_url(url: str) -> str:
+def _create_bot() -> tuple[Bot, asyncio.Task | None]:
+    """Бот с сессией через прокси (пул или один прокси) и задача проверки пула, если он есть."""
+    pool = get_proxy_pool()
+    proxies = telegram_proxy_urls()
+    health_task: asyncio.Task | None = None
+    if pool is not None:
+        _logger.info("Telegram API proxy pool: %s", ", ".join(redact_proxy_url(u) for u in pool.urls))
+        session = PooledAiohttpSession(pool)
+        bot = Bot(token=settings.bot_token, session=session)
+        health_task = asyncio.create_task(
+            pool.run_health_checks(session.probe, max(5, settings.telegram_proxy_health_interval_seconds))
+        )
+    elif proxies:
+        _logger.info("Telegram API proxy: %s", redact_proxy_url(proxies[0]))
+        bot = Bot(token=settings.bot_token, session=AiohttpSession(proxy=proxies[0]))
+    else:
+        bot = Bot(token=settings.bot_token)
+    # Соединение с БД не держится, пока хендлер ждёт ответа Telegram
+    bot.session.middleware(ReleaseDbBeforeSend())
+    return bot, health_task
+
+
+def _create_dispatcher(storage: BaseStorage | None = None) -> Dispatcher:
+    dp = Dispatcher(storage=storage)
+    # Первым — чтобы в bot_updates_total попадали и отброшенные анти-флудом апдейты
+    setup_metrics(dp)
+    dp.update.outer_middleware(create_throttling_middleware())
+    # После анти-флуда: отброшенные апдейты активность не продлевают
+    dp.update.outer_middleware(ActivityMiddleware(get_activity_tracker()))
+    # Сессия БД открывается только после получения слота — не больше соединений, чем в пуле
+    dp.update.outer_middleware(create_concurrency_middleware())
+    dp.update.outer_middleware(DbSessionMiddleware())
+    dp.include_router(setup_handlers())
+    return dp
+
+
+def _start_metrics_server(worker: int) -> None:
+    if settings.bot_metrics_port <= 0:
+        return
+    port = settings.bot_metrics_port + worker
+    start_http_server(port)
+    instrument_engine(engine)
+    _logger.info("Bot metrics on :%s/metrics", port)
+
+
+async def _serve(*, webhook: bool, reuse_port: bool = False, worker: int = 0) -> None:
+    _start_metrics_server(worker)
+    bot, health_task = _create_bot()
+    versions = get_cache_versions()
+    versions_task = asyncio.create_task(versions.run(max(1, settings.bot_cache_version_poll_seconds)))
+    storage = create_fsm_storage()
+    purge_task: asyncio.Task | None = None
+    if isinstance(storage, DatabaseStorage):
+        purge_task = asyncio.create_task(storage.run_purge(FSM_PURGE_INTERVAL_SECONDS))
+    dp = _create_dispatcher(storage)
+    activity_task = asyncio.create_task(get_activity_tracker().run(max(1, settings.bot_activity_flush_seconds)))
     try:
-        u = urlparse(url)
-        if u.username is not None:
-            host = u.hostname or ""
-            port = f":{u.port}" if u.port else ""
-            return f"{u.scheme}://***@{host}{port}{u.path or ''}"
-    except Exception:
-        pass
-    return "***"
-
-
-def _telegram_proxy_url() -> str | None:
-    if settings.telegram_proxy and settings.telegram_proxy.strip():
-        return settings.telegram_proxy.strip()
-    for key in ("HTTPS_PROXY", "https_proxy", "HTTP_PROXY", "http_proxy"):
-        v = os.environ.get(key)
-        if v and v.strip():
-            return v.strip()
-    return None
+        if webhook:
+            await serve_webhook(dp, bot, reuse_port=reuse_port)
+        else:
+            # После работы в режиме webhook getUpdates вернёт конфликт, пока webhook не снят
+            await bot.delete_webhook(drop_pending_updates=settings.bot_drop_pending_updates)
+            bot.session.middleware(create_polling_middleware())
+            # Только типы апдейтов, на которые есть хендлеры, — остальные Telegram не присылает
+            await dp.start_polling(
+                bot,
+                polling_timeout=max(0, settings.bot_polling_timeout),
+                allowed_updates=dp.resolve_used_update_types(),
+            )
+    finally:
+        activity_task.cancel()
+        # Дождаться финального сброса last_activity
+        await asyncio.gather(activity_task, return_exceptions=True)
+        versions_task.cancel()
+        if purge_task:
+            purge_task.cancel()
+        if health_task:
+            health_task.cancel()
+        await close_http_client()
+
+
+async def _register_webhook() -> None:
+    bot, health_task = _create_bot()
+    try:
+        await register_webhook(bot, _create_dispatcher())
+    finally:
+        if health_task:
+            health_task.cancel()
+        await bot.session.close()
+
+
+def _webhook_worker(index: int) -> None:
+    asyncio.run(_serve(webhook=True, reuse_port=True, worker=index))
+
+
+def _run_webhook_workers(count: int) -> None:
+    """Процессы-воркеры на одном порту (SO_REUSEPORT): ядро распределяет между ними соединения от nginx."""
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_webhook_worker, args=(i,), name=f"bot-webhook-{i}", daemon=True) for i in range(count)]
+    for worker in workers:
+        worker.start()
+    _logger.info("Started %s webhook workers", count)
+    try:
+        for worker in workers:
+            worker.join()
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
 
 
 async def main() -> None:
     _logger.info("Bot DB: %s", _redact_db_url(settings.database_url))
-    proxy = _telegram_proxy_url()
-    if proxy:
-        _logger.info("Telegram API proxy: %s", _redact_proxy_url(proxy))
-        bot = Bot(token=settings.bot_token, session=AiohttpSession(proxy=proxy))
+    if settings.bot_mode.lower() != "webhook":
+        await _serve(webhook=False)
+        return
+    await _register_webhook()
+    workers = max(1, settings.bot_webhook_workers)
+    if workers == 1:
+        await _serve(webhook=True)
     else:
-        bot = Bot(token=settings.bot_token)
-    dp = Dispatcher()
-    dp.include_router(setup_handlers())
-    await dp.start_polling(bot)
+        await asyncio.to_thread(_run_webhook_workers, workers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,89 @@
+"""
+Маршрутизация «💬 Менеджер» по заведению пользователя без чтения всех менеджеров на каждое нажатие.
+Из активных менеджеров строится инвертированный индекс: нормализованное название заведения → менеджер.
+Сначала точное совпадение, затем вхождение подстроки (от 3 символов); результат запоминается до смены
+версии cache_version:managers (её меняет админ API при изменении менеджеров).
+"""
+from sqlalchemy import select
+
+from bot.cache_versions import get_cache_versions
+from database.cache_versions import MANAGERS_VERSION
+from database.models import Manager
+from database.session import SessionLocal
+
+# Запомненных результатов поиска по подстроке на версию
+MATCH_CACHE_MAX = 5000
+
+
+class ManagerCard:
+    """Снимок менеджера для бота (без привязки к сессии БД): из Manager или строки с теми же колонками."""
+
+    __slots__ = ("id", "full_name", "telegram_username", "phone_number", "establishment")
+
+    def __init__(self, manager) -> None:
+        self.id = manager.id
+        self.full_name = manager.full_name
+        self.telegram_username = manager.telegram_username
+        self.phone_number = manager.phone_number
+        self.establishment = manager.establishment
+
+
+def _normalize(name: str | None) -> str:
+    return (name or "").strip().lower()
+
+
+class ManagerIndex:
+    def __init__(self, managers: list[ManagerCard]) -> None:
+        self.managers = managers
+        # Название заведения → первый менеджер, у которого оно указано
+        self._by_name: dict[str, ManagerCard] = {}
+        for manager in managers:
+            for name in (manager.establishment or "").split(","):
+                self._by_name.setdefault(_normalize(name), manager)
+        self._by_name.pop("", None)
+        self._matches: dict[str, ManagerCard | None] = {}
+        self._by_id = {manager.id: manager for manager in managers}
+
+    def get(self, manager_id: int) -> ManagerCard | None:
+        """Активный менеджер с Telegram по id (карточка контакта из списка)."""
+        return self._by_id.get(manager_id)
+
+    def route(self, establishment: str | None) -> list[ManagerCard]:
+        """Один менеджер заведения или все, если заведение не найдено."""
+        norm = _normalize(establishment)
+        if not norm:
+            return self.managers
+        if norm in self._matches:
+            match = self._matches[norm]
+        else:
+            match = self._by_name.get(norm)
+            if match is None and len(norm) >= 3:
+                match = next((m for name, m in self._by_name.items() if norm in name), None)
+            if len(self._matches) >= MATCH_CACHE_MAX:
+                self._matches.clear()
+            self._matches[norm] = match
+        return [match] if match is not None else self.managers
+
+
+async def _load_index() -> ManagerIndex:
+    async with SessionLocal() as session:
+        rows = await session.execute(
+            select(Manager.id, Manager.full_name, Manager.telegram_username, Manager.phone_number, Manager.establishment)
+            .where(Manager.is_active.is_(True), Manager.telegram_username.isnot(None))
+            .order_by(Manager.id)
+        )
+        return ManagerIndex([ManagerCard(m) for m in rows.all()])
+
+
+_index: tuple[str, ManagerIndex] | None = None
+
+
+async def get_manager_index() -> ManagerIndex:
+    """Индекс актуальной версии; пока версия неизвестна — строится заново на каждый вызов."""
+    global _index
+    version = get_cache_versions().version(MANAGERS_VERSION)
+    if version is None:
+        return await _load_index()
+    if _index is None or _index[0] != version:
+        _index = (version, await _load_index())
+    return _index[1]
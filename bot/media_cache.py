@@ -0,0 +1,159 @@
+"""
+Кэш file_id медиа, которое бот уже загрузил в Telegram.
+Ключ — (таблица, id записи); запись действительна, пока image_url не изменился.
+В памяти процесса — LRU, в БД (telegram_media_cache) — чтобы переживать рестарт бота.
+Отсутствие записи в БД тоже запоминается ненадолго: иначе каждый показ ещё не загруженной картинки
+шёл бы в БД.
+"""
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database.models import TelegramMediaCache
+from database.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 10000
+# Сколько секунд не перечитывать из БД запись, которой там не было
+MISS_TTL_SECONDS = 60.0
+# Длина telegram_media_cache.image_url: длинные URL хранятся и сравниваются по хэшу
+URL_KEY_LENGTH = 500
+
+# (kind, file_id)
+CachedMedia = tuple[str, str]
+
+
+def url_key(image_url: str) -> str:
+    """image_url в том виде, в каком он хранится в кэше: как есть или sha256, если не влезает в столбец."""
+    if len(image_url) <= URL_KEY_LENGTH:
+        return image_url
+    return "sha256:" + hashlib.sha256(image_url.encode()).hexdigest()
+
+
+class MediaFileCache:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        max_entries: int = MAX_ENTRIES,
+        miss_ttl: float = MISS_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._session_factory = session_factory
+        self._max_entries = max_entries
+        self._miss_ttl = miss_ttl
+        self._clock = clock
+        # (table, id) -> (url_key, kind, file_id)
+        self._entries: OrderedDict[tuple[str, int], tuple[str, str, str]] = OrderedDict()
+        # (table, id) -> до какого момента считать, что записи в БД нет
+        self._misses: OrderedDict[tuple[str, int], float] = OrderedDict()
+
+    def _remember(self, key: tuple[str, int], image_key: str, kind: str, file_id: str) -> None:
+        self._misses.pop(key, None)
+        self._entries[key] = (image_key, kind, file_id)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _remember_miss(self, key: tuple[str, int]) -> None:
+        self._misses[key] = self._clock() + self._miss_ttl
+        self._misses.move_to_end(key)
+        while len(self._misses) > self._max_entries:
+            self._misses.popitem(last=False)
+
+    def _is_known_miss(self, key: tuple[str, int]) -> bool:
+        expires = self._misses.get(key)
+        if expires is None:
+            return False
+        if expires <= self._clock():
+            del self._misses[key]
+            return False
+        return True
+
+    async def get(self, table: str, item_id: int, image_url: str) -> CachedMedia | None:
+        key = (table, item_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            if self._is_known_miss(key):
+                return None
+            try:
+                async with self._session_factory() as session:
+                    row = await session.scalar(
+                        select(TelegramMediaCache).where(
+                            TelegramMediaCache.source_table == table,
+                            TelegramMediaCache.source_id == item_id,
+                        )
+                    )
+            except SQLAlchemyError as e:
+                logger.warning("Media cache lookup failed %s:%s: %s", table, item_id, e)
+                return None
+            if row is None:
+                self._remember_miss(key)
+                return None
+            entry = (row.image_url, row.kind, row.file_id)
+            self._remember(key, *entry)
+        else:
+            self._entries.move_to_end(key)
+        cached_key, kind, file_id = entry
+        if cached_key != url_key(image_url):
+            return None
+        return kind, file_id
+
+    async def put(self, table: str, item_id: int, image_url: str, kind: str, file_id: str) -> None:
+        key = (table, item_id)
+        image_key = url_key(image_url)
+        if self._entries.get(key) == (image_key, kind, file_id):
+            return
+        self._remember(key, image_key, kind, file_id)
+        try:
+            async with self._session_factory() as session:
+                row = await session.scalar(
+                    select(TelegramMediaCache).where(
+                        TelegramMediaCache.source_table == table,
+                        TelegramMediaCache.source_id == item_id,
+                    )
+                )
+                if row is None:
+                    row = TelegramMediaCache(source_table=table, source_id=item_id)
+                row.image_url = image_key
+                row.kind = kind
+                row.file_id = file_id
+                session.add(row)
+                await session.commit()
+        except SQLAlchemyError as e:
+            # Параллельная вставка того же ключа или недоступная БД — кэш в памяти уже обновлён
+            logger.warning("Media cache save failed %s:%s: %s", table, item_id, e)
+
+    async def forget(self, table: str, item_id: int) -> None:
+        """file_id отклонён Telegram — удалить, чтобы следующий показ загрузил файл заново."""
+        self._entries.pop((table, item_id), None)
+        self._remember_miss((table, item_id))
+        try:
+            async with self._session_factory() as session:
+                row = await session.scalar(
+                    select(TelegramMediaCache).where(
+                        TelegramMediaCache.source_table == table,
+                        TelegramMediaCache.source_id == item_id,
+                    )
+                )
+                if row is not None:
+                    await session.delete(row)
+                    await session.commit()
+        except SQLAlchemyError as e:
+            logger.warning("Media cache delete failed %s:%s: %s", table, item_id, e)
+
+
+_cache: MediaFileCache | None = None
+
+
+def get_media_cache() -> MediaFileCache:
+    global _cache
+    if _cache is None:
+        _cache = MediaFileCache(SessionLocal)
+    return _cache
@@ -0,0 +1,24 @@
+from bot.middlewares.activity import ActivityMiddleware, ActivityTracker, get_activity_tracker
+from bot.middlewares.concurrency import ConcurrencyMiddleware, create_concurrency_middleware
+from bot.middlewares.db_session import DbSessionMiddleware, ReleaseDbBeforeSend, UpdateDb, update_db
+from bot.middlewares.metrics import instrument_engine, setup_metrics
+from bot.middlewares.polling import PollingMiddleware, create_polling_middleware
+from bot.middlewares.throttling import ThrottlingMiddleware, create_throttling_middleware
+
+__all__ = [
+    "ActivityMiddleware",
+    "ActivityTracker",
+    "ConcurrencyMiddleware",
+    "DbSessionMiddleware",
+    "PollingMiddleware",
+    "ReleaseDbBeforeSend",
+    "ThrottlingMiddleware",
+    "UpdateDb",
+    "create_concurrency_middleware",
+    "create_polling_middleware",
+    "create_throttling_middleware",
+    "get_activity_tracker",
+    "instrument_engine",
+    "setup_metrics",
+    "update_db",
+]
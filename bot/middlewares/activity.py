@@ -0,0 +1,115 @@
+"""
+Учёт последней активности пользователей бота (users.last_activity) без записи в БД на каждый апдейт:
+middleware запоминает время в памяти, фоновая задача раз в N секунд сбрасывает накопленное
+одним массовым UPDATE (PostgreSQL — UPDATE ... FROM (VALUES ...), иначе executemany по первичному ключу).
+"""
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from aiogram.types import User as TgUser
+from sqlalchemy import DateTime, Integer, bindparam, column, or_, update, values
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database.models import User
+from database.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Строк в одном VALUES (по 2 параметра на строку, лимит PostgreSQL — 32767 параметров)
+FLUSH_CHUNK = 5000
+
+
+class ActivityTracker:
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] = SessionLocal) -> None:
+        self._session_factory = session_factory
+        self._pending: dict[int, datetime] = {}
+
+    def touch(self, user_id: int, at: datetime | None = None) -> None:
+        self._pending[user_id] = at or datetime.utcnow()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def flush(self) -> int:
+        """Записывает накопленное одним UPDATE; возвращает число пользователей в пачке."""
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        try:
+            async with self._session_factory() as session:
+                if session.bind.dialect.name == "postgresql":
+                    items = list(batch.items())
+                    for start in range(0, len(items), FLUSH_CHUNK):
+                        rows = values(column("id", Integer), column("seen_at", DateTime), name="activity").data(
+                            items[start:start + FLUSH_CHUNK]
+                        )
+                        await session.execute(
+                            update(User)
+                            .where(User.id == rows.c.id)
+                            .where(or_(User.last_activity.is_(None), User.last_activity < rows.c.seen_at))
+                            .values(last_activity=rows.c.seen_at)
+                        )
+                else:
+                    users = User.__table__
+                    await session.execute(
+                        update(users)
+                        .where(users.c.id == bindparam("uid"))
+                        .where(or_(users.c.last_activity.is_(None), users.c.last_activity < bindparam("seen_at")))
+                        .values(last_activity=bindparam("seen_at")),
+                        [{"uid": user_id, "seen_at": at} for user_id, at in batch.items()],
+                    )
+                await session.commit()
+        except SQLAlchemyError:
+            # Вернуть пачку, не затирая более свежие отметки, пришедшие во время записи
+            for user_id, at in batch.items():
+                self._pending.setdefault(user_id, at)
+            raise
+        return len(batch)
+
+    async def run(self, interval: float) -> None:
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.flush()
+                except SQLAlchemyError as e:
+                    logger.warning("last_activity flush failed: %s", e)
+        finally:
+            # Остановка бота — дописать последнюю пачку
+            try:
+                await self.flush()
+            except SQLAlchemyError as e:
+                logger.warning("Final last_activity flush failed: %s", e)
+
+
+class ActivityMiddleware(BaseMiddleware):
+    def __init__(self, tracker: ActivityTracker) -> None:
+        self._tracker = tracker
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user: TgUser | None = data.get("event_from_user")
+        if user is not None and not user.is_bot:
+            self._tracker.touch(user.id)
+        return await handler(event, data)
+
+
+_tracker: ActivityTracker | None = None
+
+
+def get_activity_tracker() -> ActivityTracker:
+    global _tracker
+    if _tracker is None:
+        _tracker = ActivityTracker()
+    return _tracker
@@ -0,0 +1,110 @@
+"""
+Ограничение параллельной обработки апдейтов: aiogram запускает каждый апдейт отдельной задачей без лимита,
+и всплеск трафика открывает сессий больше, чем есть соединений в пуле БД (по умолчанию 5 + 10).
+Outer-middleware пропускает к хендлерам не больше N апдейтов сразу, апдейты одного чата — строго по очереди
+(шардированные asyncio.Lock, FIFO), а устаревшие за время ожидания (или пришедшие с опозданием
+после простоя бота) отбрасывает.
+"""
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import Chat, TelegramObject, Update, User
+from prometheus_client import Counter, Gauge, Histogram
+
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+BOT_UPDATES_QUEUED = Gauge("bot_updates_queued", "Updates waiting for their chat's turn or a processing slot")
+BOT_UPDATE_QUEUE_WAIT = Histogram(
+    "bot_update_queue_wait_seconds",
+    "Time an update waited before its handler started",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+BOT_STALE_UPDATES = Counter("bot_stale_updates_total", "Updates dropped as too old to handle")
+
+
+def _sent_at(event: TelegramObject) -> datetime | None:
+    """Когда пользователь отправил апдейт (у нажатий кнопок времени нет)."""
+    if isinstance(event, Update):
+        message = event.message or event.edited_message
+        if message is not None:
+            return message.edit_date if event.edited_message is not None and message.edit_date else message.date
+    return None
+
+
+class ConcurrencyMiddleware(BaseMiddleware):
+    def __init__(
+        self,
+        max_concurrent: int,
+        lock_shards: int = 256,
+        max_age_seconds: float = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._slots = asyncio.Semaphore(max(1, max_concurrent))
+        self._locks = [asyncio.Lock() for _ in range(max(1, lock_shards))]
+        self._max_age = max_age_seconds
+        self._clock = clock
+
+    def _lock_for(self, data: dict[str, Any]) -> asyncio.Lock | None:
+        chat: Chat | None = data.get("event_chat")
+        user: User | None = data.get("event_from_user")
+        key = chat.id if chat is not None else user.id if user is not None else None
+        if key is None:
+            return None
+        return self._locks[key % len(self._locks)]
+
+    def _is_stale(self, event: TelegramObject, arrived: float) -> bool:
+        if self._max_age <= 0:
+            return False
+        sent_at = _sent_at(event)
+        if sent_at is not None:
+            age = (datetime.now(timezone.utc) - sent_at).total_seconds()
+        else:
+            age = self._clock() - arrived
+        return age > self._max_age
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        arrived = self._clock()
+        lock = self._lock_for(data)
+        BOT_UPDATES_QUEUED.inc()
+        queued = True
+        try:
+            if lock is not None:
+                await lock.acquire()
+            try:
+                # Слот занимается после очереди чата — ожидающие своей очереди апдейты пул не держат
+                async with self._slots:
+                    BOT_UPDATES_QUEUED.dec()
+                    queued = False
+                    BOT_UPDATE_QUEUE_WAIT.observe(self._clock() - arrived)
+                    if self._is_stale(event, arrived):
+                        BOT_STALE_UPDATES.inc()
+                        logger.info("Stale update dropped: %s", getattr(event, "update_id", None))
+                        return None
+                    return await handler(event, data)
+            finally:
+                if lock is not None:
+                    lock.release()
+        finally:
+            if queued:
+                BOT_UPDATES_QUEUED.dec()
+
+
+def create_concurrency_middleware() -> ConcurrencyMiddleware:
+    settings = get_settings()
+    return ConcurrencyMiddleware(
+        max_concurrent=settings.bot_max_concurrent_updates,
+        lock_shards=settings.bot_chat_lock_shards,
+        max_age_seconds=settings.bot_update_max_age_seconds,
+    )
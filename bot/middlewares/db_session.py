@@ -0,0 +1,188 @@
+"""
+Одна сессия БД на апдейт: открывается лениво при первом обращении (апдейты без БД соединение из пула
+не берут), профиль текущего пользователя (из кэша процесса bot.user_cache или из БД — один раз)
+общий для хендлера и bot.utils.
+Перед каждым запросом к Telegram API сессия без незафиксированных изменений закрывается —
+соединение возвращается в пул и не ждёт сетевой задержки; следующее обращение откроет новую.
+"""
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject
+from aiogram.types import User as TgUser
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from bot.read_models import UserProfile, load_user_profile
+from bot.user_cache import get_user_cache
+from database.session import SessionLocal
+
+# Ключ в Session.info: в текущей транзакции были изменения (flush или DML через session.execute)
+_WRITES = "bot_update_writes"
+
+
+class _UpdateSession(Session):
+    """Синхронная часть сессии апдейта — на ней висят события учёта изменений."""
+
+
+@event.listens_for(_UpdateSession, "after_flush")
+def _after_flush(session: Session, flush_context: Any) -> None:
+    session.info[_WRITES] = True
+
+
+@event.listens_for(_UpdateSession, "do_orm_execute")
+def _on_execute(state: Any) -> None:
+    if not state.is_select:
+        state.session.info[_WRITES] = True
+
+
+@event.listens_for(_UpdateSession, "after_commit")
+def _after_commit(session: Session) -> None:
+    session.info.pop(_WRITES, None)
+
+
+@event.listens_for(_UpdateSession, "after_soft_rollback")
+def _after_rollback(session: Session, previous_transaction: Any) -> None:
+    session.info.pop(_WRITES, None)
+
+
+class UpdateDb:
+    """БД одного апдейта: ленивая сессия и кэш профиля пользователя."""
+
+    __slots__ = ("user_id", "_session_factory", "_session", "_user", "_user_loaded", "_depth")
+
+    def __init__(
+        self, user_id: int | None, session_factory: async_sessionmaker[AsyncSession] = SessionLocal
+    ) -> None:
+        self.user_id = user_id
+        self._session_factory = session_factory
+        self._session: AsyncSession | None = None
+        self._user: UserProfile | None = None
+        self._user_loaded = False
+        self._depth = 0
+
+    @property
+    def session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._session_factory(sync_session_class=_UpdateSession)
+        return self._session
+
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None
+
+    async def user(self) -> UserProfile | None:
+        """Профиль пользователя апдейта (None — не зарегистрирован): кэш процесса, иначе БД — один раз на апдейт."""
+        if not self._user_loaded:
+            if self.user_id:
+                user_id = self.user_id
+                self._user = await get_user_cache().get(user_id, lambda: load_user_profile(self.session, user_id))
+            self._user_loaded = True
+        return self._user
+
+    def forget_user(self) -> None:
+        """Профиль изменён хендлером — следующее обращение перечитает его из БД."""
+        self._user = None
+        self._user_loaded = False
+        if self.user_id:
+            get_user_cache().forget(self.user_id)
+
+    def _is_clean(self) -> bool:
+        sync = self._session.sync_session
+        return not (sync.info.get(_WRITES) or sync.new or sync.dirty or sync.deleted)
+
+    async def release(self) -> None:
+        """Закрыть сессию (незафиксированное откатывается); профиль остаётся в кэше."""
+        session, self._session = self._session, None
+        if session is not None:
+            await session.close()
+
+    async def release_if_clean(self) -> None:
+        """Вернуть соединение в пул, если откатывать нечего; объект сессии остаётся и начнёт новую транзакцию."""
+        if self._session is not None and self._is_clean():
+            await self._session.close()
+
+
+_current: ContextVar[UpdateDb | None] = ContextVar("bot_update_db", default=None)
+
+
+def current_db() -> UpdateDb | None:
+    return _current.get()
+
+
+@asynccontextmanager
+async def update_db(user_id: int | None = None) -> AsyncIterator[UpdateDb]:
+    """
+    БД текущего апдейта; вне диспетчера или для другого пользователя — отдельная.
+    Сессия закрывается на выходе из внешнего блока, вложенные блоки её не закрывают.
+    """
+    db = _current.get()
+    token = None
+    if db is None or (user_id is not None and db.user_id != user_id):
+        db = UpdateDb(user_id)
+        token = _current.set(db)
+    db._depth += 1
+    try:
+        yield db
+    finally:
+        db._depth -= 1
+        try:
+            if db._depth == 0:
+                await db.release()
+        finally:
+            if token is not None:
+                _current.reset(token)
+
+
+async def get_user_establishment(user_id: int | None) -> str | None:
+    """Заведение пользователя для меню и маршрутизации к менеджеру (None — не зарегистрирован)."""
+    if not user_id:
+        return None
+    async with update_db(user_id) as db:
+        profile = await db.user()
+    return profile.establishment if profile is not None else None
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """Outer-middleware на апдейты: UpdateDb в data["db"] и в контексте для bot.utils."""
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] = SessionLocal) -> None:
+        self._session_factory = session_factory
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user: TgUser | None = data.get("event_from_user")
+        db = UpdateDb(user.id if user is not None else None, self._session_factory)
+        data["db"] = db
+        token = _current.set(db)
+        try:
+            return await handler(event, data)
+        finally:
+            _current.reset(token)
+            await db.release()
+
+
+class ReleaseDbBeforeSend(BaseRequestMiddleware):
+    """Middleware сессии aiogram: перед запросом к Telegram отдаёт соединение апдейта обратно в пул."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Any:
+        db = _current.get()
+        if db is not None:
+            await db.release_if_clean()
+        return await make_request(bot, method)
@@ -0,0 +1,111 @@
+"""
+Метрики Prometheus процесса бота: апдейты по типам, апдейты в обработке, задержка и ошибки по хендлерам,
+время в БД на хендлер (по событиям курсора SQLAlchemy), неудачные отправки медиа.
+Отдаются на BOT_METRICS_PORT (prometheus_client.start_http_server), scrape — deploy/prometheus/prometheus.yml.
+"""
+import time
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from typing import Any
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import TelegramObject, Update
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+BOT_UPDATES = Counter("bot_updates_total", "Updates received by the bot", ["update_type"])
+BOT_UPDATES_IN_FLIGHT = Gauge("bot_updates_in_flight", "Updates being processed")
+BOT_HANDLER_LATENCY = Histogram(
+    "bot_handler_duration_seconds",
+    "Handler latency",
+    ["handler"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+BOT_HANDLER_DB_TIME = Histogram(
+    "bot_handler_db_seconds",
+    "Time spent in database queries per handler call",
+    ["handler"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+BOT_HANDLER_ERRORS = Counter("bot_handler_errors_total", "Handler exceptions", ["handler", "error"])
+BOT_MEDIA_SEND_FAILURES = Counter(
+    "bot_media_send_failures_total", "Failed media sends (the bot falls back to the next method)", ["method"]
+)
+
+# Накопитель времени запросов к БД текущего хендлера (список из одного float — мутируется в listener)
+_db_time: ContextVar[list[float] | None] = ContextVar("bot_db_time", default=None)
+
+
+def _update_type(event: TelegramObject) -> str:
+    if isinstance(event, Update):
+        return event.event_type
+    return type(event).__name__.lower()
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Outer-middleware на апдейты: счётчик по типу и число апдейтов в обработке."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        BOT_UPDATES.labels(update_type=_update_type(event)).inc()
+        BOT_UPDATES_IN_FLIGHT.inc()
+        try:
+            return await handler(event, data)
+        finally:
+            BOT_UPDATES_IN_FLIGHT.dec()
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner-middleware: вызывается только для найденного хендлера, поэтому знает его имя."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        name = getattr(getattr(handler_object, "callback", None), "__name__", "unknown")
+        db_time = [0.0]
+        token = _db_time.set(db_time)
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            BOT_HANDLER_ERRORS.labels(handler=name, error=type(e).__name__).inc()
+            raise
+        finally:
+            BOT_HANDLER_LATENCY.labels(handler=name).observe(time.perf_counter() - start)
+            BOT_HANDLER_DB_TIME.labels(handler=name).observe(db_time[0])
+            _db_time.reset(token)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Учитывать время запросов к БД в bot_handler_db_seconds текущего хендлера."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("bot_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info.get("bot_query_start")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        acc = _db_time.get()
+        if acc is not None:
+            acc[0] += elapsed
+
+
+def setup_metrics(dp: Dispatcher) -> None:
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    handler_metrics = HandlerMetricsMiddleware()
+    for name, observer in dp.observers.items():
+        if name not in ("update", "error"):
+            observer.middleware(handler_metrics)
@@ -0,0 +1,64 @@
+"""
+Middleware сессии aiogram для long polling: размер пачки getUpdates из настроек и метрики цикла получения
+апдейтов — длительность запроса (при пустой очереди до BOT_POLLING_TIMEOUT), размер пачки, ошибки
+и задержка доставки (от отправки сообщения пользователем до получения ботом).
+"""
+import time
+from datetime import datetime, timezone
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import GetUpdates, TelegramMethod
+from aiogram.methods.base import TelegramType
+from prometheus_client import Counter, Histogram
+
+from config.settings import get_settings
+
+BOT_GET_UPDATES_DURATION = Histogram(
+    "bot_get_updates_duration_seconds",
+    "getUpdates call duration (long poll waits up to the polling timeout when idle)",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+BOT_GET_UPDATES_BATCH = Histogram(
+    "bot_get_updates_batch_size", "Updates returned by one getUpdates call", buckets=(0, 1, 2, 5, 10, 25, 50, 100)
+)
+BOT_GET_UPDATES_ERRORS = Counter("bot_get_updates_errors_total", "Failed getUpdates calls", ["error"])
+BOT_UPDATE_DELIVERY_LAG = Histogram(
+    "bot_update_delivery_lag_seconds",
+    "Time from a user sending a message to the bot receiving it",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+
+class PollingMiddleware(BaseRequestMiddleware):
+    def __init__(self, limit: int = 100) -> None:
+        self._limit = min(100, max(1, limit))
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Any:
+        if not isinstance(method, GetUpdates):
+            return await make_request(bot, method)
+        method.limit = self._limit
+        start = time.perf_counter()
+        try:
+            updates = await make_request(bot, method)
+        except Exception as e:
+            BOT_GET_UPDATES_ERRORS.labels(error=type(e).__name__).inc()
+            raise
+        finally:
+            BOT_GET_UPDATES_DURATION.observe(time.perf_counter() - start)
+        BOT_GET_UPDATES_BATCH.observe(len(updates))
+        now = datetime.now(timezone.utc)
+        for update in updates:
+            if update.message is not None:
+                BOT_UPDATE_DELIVERY_LAG.observe(max(0.0, (now - update.message.date).total_seconds()))
+        return updates
+
+
+def create_polling_middleware() -> PollingMiddleware:
+    return PollingMiddleware(limit=get_settings().bot_polling_limit)
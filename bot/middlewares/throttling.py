@@ -0,0 +1,121 @@
+"""
+Анти-флуд: outer-middleware на апдейты с token bucket на пользователя и общим лимитом на процесс.
+Лишние апдейты отбрасываются; пользователь получает короткое «подождите» не чаще раза за окно,
+остальные отброшенные апдейты молча схлопываются. Корзины пользователей — LRU ограниченного размера.
+"""
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update, User
+from prometheus_client import Counter
+
+from config.settings import get_settings
+
+THROTTLED_UPDATES = Counter(
+    "bot_throttled_updates_total", "Updates dropped by the anti-flood middleware", ["scope"]
+)
+
+WAIT_TEXT = "⏳ Слишком много запросов, подождите пару секунд."
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def refund(self) -> None:
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        global_rate: float,
+        global_burst: int,
+        max_users: int = 10000,
+        notice_interval: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._rate = max(0.01, rate)
+        self._burst = max(1, burst)
+        self._max_users = max(1, max_users)
+        self._notice_interval = notice_interval
+        self._clock = clock
+        self._global = TokenBucket(max(0.01, global_rate), max(1, global_burst), clock())
+        # user_id -> (корзина, когда последний раз отвечали «подождите»)
+        self._users: OrderedDict[int, list] = OrderedDict()
+
+    def _user_entry(self, user_id: int, now: float) -> list:
+        entry = self._users.get(user_id)
+        if entry is None:
+            entry = [TokenBucket(self._rate, self._burst, now), float("-inf")]
+            self._users[user_id] = entry
+            while len(self._users) > self._max_users:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(user_id)
+        return entry
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user: User | None = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+        now = self._clock()
+        entry = self._user_entry(user.id, now)
+        if not entry[0].take(now):
+            scope = "user"
+        elif not self._global.take(now):
+            # Апдейт отброшен не по вине пользователя — его токен не сгорает.
+            # Пользовательскую корзину проверяем первой, чтобы флудер не расходовал общий лимит
+            entry[0].refund()
+            scope = "global"
+        else:
+            return await handler(event, data)
+        THROTTLED_UPDATES.labels(scope=scope).inc()
+        if now - entry[1] >= self._notice_interval:
+            entry[1] = now
+            await _notify(event)
+        return None
+
+
+async def _notify(event: TelegramObject) -> None:
+    if not isinstance(event, Update):
+        return
+    if event.callback_query is not None:
+        # Убирает «часики» на кнопке; само нажатие отброшено
+        await event.callback_query.answer(WAIT_TEXT)
+    elif event.message is not None:
+        await event.message.answer(WAIT_TEXT)
+
+
+def create_throttling_middleware() -> ThrottlingMiddleware:
+    settings = get_settings()
+    return ThrottlingMiddleware(
+        rate=settings.bot_throttle_rate,
+        burst=settings.bot_throttle_burst,
+        global_rate=settings.bot_throttle_global_rate,
+        global_burst=settings.bot_throttle_global_burst,
+        max_users=settings.bot_throttle_max_users,
+    )
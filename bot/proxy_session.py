@@ -0,0 +1,69 @@
+"""
+aiogram-сессия поверх пула прокси (config.proxy_pool): на каждый прокси — свой AiohttpSession
+с отдельным коннектором, каждый запрос уходит через прокси, выбранный пулом.
+"""
+import asyncio
+import time
+from collections.abc import AsyncGenerator
+from typing import Any
+
+import aiohttp
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.base import BaseSession
+from aiogram.exceptions import TelegramNetworkError, TelegramServerError
+from aiogram.methods import GetUpdates, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from config.proxy_pool import PROBE_URL, ProxyPool
+
+
+class PooledAiohttpSession(BaseSession):
+    def __init__(self, pool: ProxyPool, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._pool = pool
+        self._members = {url: AiohttpSession(proxy=url, **kwargs) for url in pool.urls}
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod[TelegramType], timeout: int | None = None
+    ) -> TelegramType:
+        url = self._pool.pick()
+        self._pool.begin(url)
+        start = time.monotonic()
+        try:
+            result = await self._members[url].make_request(bot, method, timeout=timeout)
+        except (TelegramNetworkError, TelegramServerError):
+            self._pool.record_failure(url)
+            raise
+        except Exception:
+            # Ошибка API (400/403/429...) — прокси довёз запрос, задержку не учитываем
+            self._pool.record_success(url)
+            raise
+        finally:
+            self._pool.end(url)
+        # Long polling держит соединение до polling_timeout — это не задержка прокси
+        self._pool.record_success(url, None if isinstance(method, GetUpdates) else time.monotonic() - start)
+        return result
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: dict[str, Any] | None = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:
+        member = self._members[self._pool.pick()]
+        async for chunk in member.stream_content(
+            url, headers=headers, timeout=timeout, chunk_size=chunk_size, raise_for_status=raise_for_status
+        ):
+            yield chunk
+
+    async def probe(self, url: str) -> None:
+        """Проба для ProxyPool.run_health_checks: любой HTTP-ответ от api.telegram.org через прокси."""
+        session = await self._members[url].create_session()
+        async with session.head(PROBE_URL, timeout=aiohttp.ClientTimeout(total=10)):
+            pass
+
+    async def close(self) -> None:
+        await asyncio.gather(*(member.close() for member in self._members.values()))
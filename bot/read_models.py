@@ -0,0 +1,57 @@
+"""
+Лёгкие модели чтения для горячих путей бота: только нужные колонки, без identity map,
+отслеживания изменений и expire ORM-сущностей. Объекты с __slots__ и неизменяемые —
+их можно держать после закрытия сессии.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import select
+
+from database.models import Event, User, UserType
+
+
+@dataclass(slots=True, frozen=True)
+class UserProfile:
+    """Поля пользователя, которые нужны боту на каждый апдейт."""
+
+    id: int
+    user_type: UserType
+    establishment: str | None
+    deleted_at: datetime | None
+
+
+@dataclass(slots=True, frozen=True)
+class EventRow:
+    """Мероприятие для карточки в боте."""
+
+    id: int
+    title: str
+    description: str | None
+    image_url: str | None
+    event_date: datetime
+    location: str | None
+    max_places: int | None
+
+
+USER_PROFILE_COLUMNS = (User.id, User.user_type, User.establishment, User.deleted_at)
+EVENT_ROW_COLUMNS = (
+    Event.id,
+    Event.title,
+    Event.description,
+    Event.image_url,
+    Event.event_date,
+    Event.location,
+    Event.max_places,
+)
+
+
+def content_columns(model) -> tuple:
+    """Колонки карточки контента (акции, новинки, приходы) и курсора ленты."""
+    return (model.id, model.title, model.description, model.image_url, model.published_at, model.created_at)
+
+
+async def load_user_profile(session, user_id: int) -> UserProfile | None:
+    row = (await session.execute(select(*USER_PROFILE_COLUMNS).where(User.id == user_id))).first()
+    return UserProfile(*row) if row is not None else None
+
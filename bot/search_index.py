@@ -0,0 +1,228 @@
+"""
+Inline-поиск бота (@бот запрос): индекс в памяти по заголовкам и описаниям активных акций, новинок,
+приходов и мероприятий, разбитый по типу пользователя (записи «для всех» — в обоих разделах).
+Запрос на каждое нажатие клавиши обслуживается из памяти; с БД индекс сверяется только при смене версий
+cache_version:content / cache_version:events, и тогда перечитываются лишь новые и изменённые записи
+(по штампу coalesce(updated_at, created_at)), а исчезнувшие или снятые с публикации удаляются.
+"""
+import asyncio
+import html
+import re
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from bot.cache_versions import get_cache_versions
+from bot.middlewares.db_session import update_db
+from database.cache_versions import CONTENT_VERSION, EVENTS_VERSION
+from database.models import Delivery, Event, News, Promotion, UserType
+
+SEARCH_MODELS = (Promotion, News, Delivery, Event)
+SEARCH_LIMIT = 50
+# Размер IN (...) при дочитывании изменённых записей
+LOAD_CHUNK = 500
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WORD_RE = re.compile(r"\w+")
+
+DocKey = tuple[str, int]
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Слова текста в нижнем регистре (ё = е), без HTML-разметки."""
+    if not text:
+        return []
+    plain = html.unescape(_TAG_RE.sub(" ", text)).lower().replace("ё", "е")
+    return _WORD_RE.findall(plain)
+
+
+@dataclass(slots=True, frozen=True)
+class SearchDoc:
+    table: str
+    id: int
+    user_type: UserType
+    title: str
+    description: str
+    image_url: str | None
+    # Свежесть для сортировки: время публикации контента или дата мероприятия
+    ranked_at: datetime
+    event_date: datetime | None
+    location: str
+    title_tokens: frozenset[str]
+    tokens: frozenset[str]
+
+    @property
+    def key(self) -> DocKey:
+        return self.table, self.id
+
+    def title_matches(self, terms: list[str]) -> bool:
+        return all(any(token.startswith(term) for token in self.title_tokens) for term in terms)
+
+
+def make_doc(table: str, row) -> SearchDoc:
+    title_tokens = frozenset(tokenize(row.title))
+    event_date = getattr(row, "event_date", None)
+    location = getattr(row, "location", None) or ""
+    return SearchDoc(
+        table=table,
+        id=row.id,
+        user_type=UserType(row.user_type),
+        title=row.title,
+        description=row.description or "",
+        image_url=row.image_url,
+        ranked_at=event_date if table == Event.__tablename__ else row.published_at or row.created_at,
+        event_date=event_date,
+        location=location,
+        title_tokens=title_tokens,
+        tokens=title_tokens | frozenset(tokenize(row.description)) | frozenset(tokenize(location)),
+    )
+
+
+class SearchIndex:
+    """Инвертированный индекс одного раздела: слово → записи, префиксы — бинарным поиском по словарю."""
+
+    def __init__(self) -> None:
+        self._docs: dict[DocKey, SearchDoc] = {}
+        self._postings: dict[str, set[DocKey]] = {}
+        # Отсортированный словарь строится лениво, после изменений — заново
+        self._terms: list[str] | None = None
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, doc: SearchDoc) -> None:
+        self.remove(doc.key)
+        self._docs[doc.key] = doc
+        for token in doc.tokens:
+            keys = self._postings.get(token)
+            if keys is None:
+                keys = self._postings[token] = set()
+                self._terms = None
+            keys.add(doc.key)
+
+    def remove(self, key: DocKey) -> None:
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        for token in doc.tokens:
+            keys = self._postings[token]
+            keys.discard(key)
+            if not keys:
+                del self._postings[token]
+                self._terms = None
+
+    def _prefixed(self, prefix: str) -> set[DocKey]:
+        if self._terms is None:
+            self._terms = sorted(self._postings)
+        found: set[DocKey] = set()
+        for i in range(bisect_left(self._terms, prefix), len(self._terms)):
+            term = self._terms[i]
+            if not term.startswith(prefix):
+                break
+            found |= self._postings[term]
+        return found
+
+    def search(self, query: str, *, now: datetime, limit: int = SEARCH_LIMIT) -> list[SearchDoc]:
+        """
+        Записи, где каждое слово запроса — начало какого-то слова записи. Сначала совпавшие по заголовку,
+        внутри — более свежие; прошедшие мероприятия не показываются. Пустой запрос — последние записи.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if terms:
+            keys: set[DocKey] | None = None
+            for term in terms:
+                found = self._prefixed(term)
+                keys = found if keys is None else keys & found
+                if not keys:
+                    return []
+            docs = [self._docs[key] for key in keys]
+        else:
+            docs = list(self._docs.values())
+        docs = [doc for doc in docs if doc.event_date is None or doc.event_date >= now]
+        docs.sort(key=lambda doc: (doc.ranked_at, doc.table, doc.id), reverse=True)
+        if terms:
+            docs.sort(key=lambda doc: not doc.title_matches(terms))
+        return docs[:limit]
+
+
+class ContentSearch:
+    def __init__(self) -> None:
+        self._partitions = {UserType.HORECA: SearchIndex(), UserType.RETAIL: SearchIndex()}
+        self._stamps: dict[DocKey, datetime] = {}
+        self._synced: tuple[str, str] | None = None
+        self._lock = asyncio.Lock()
+
+    def _is_current(self, versions: tuple[str | None, str | None]) -> bool:
+        return None not in versions and versions == self._synced
+
+    async def search(
+        self, user_type: UserType, query: str, *, now: datetime | None = None, limit: int = SEARCH_LIMIT
+    ) -> list[SearchDoc]:
+        watcher = get_cache_versions()
+        versions = (watcher.version(CONTENT_VERSION), watcher.version(EVENTS_VERSION))
+        if not self._is_current(versions):
+            async with self._lock:
+                if not self._is_current(versions):
+                    # Версия неизвестна — сверяемся с БД на каждый запрос (дешёвый запрос штампов)
+                    async with update_db() as db:
+                        await self.sync(db.session)
+                    self._synced = versions if None not in versions else None
+        partition = self._partitions.get(user_type)
+        if partition is None:
+            return []
+        return partition.search(query, now=now or datetime.utcnow(), limit=limit)
+
+    async def sync(self, session) -> None:
+        """Приводит индекс к активным записям БД, перечитывая только новые и изменённые."""
+        stamps: dict[DocKey, datetime] = {}
+        for model in SEARCH_MODELS:
+            rows = await session.execute(
+                select(model.id, func.coalesce(model.updated_at, model.created_at)).where(model.is_active.is_(True))
+            )
+            stamps.update(((model.__tablename__, item_id), stamp) for item_id, stamp in rows.all())
+        for key in [key for key in self._stamps if key not in stamps]:
+            self._drop(key)
+        changed: dict[str, list[int]] = {}
+        for (table, item_id), stamp in stamps.items():
+            if self._stamps.get((table, item_id)) != stamp:
+                changed.setdefault(table, []).append(item_id)
+        for model in SEARCH_MODELS:
+            table = model.__tablename__
+            ids = changed.get(table, [])
+            for start in range(0, len(ids), LOAD_CHUNK):
+                rows = await session.execute(
+                    select(*(model.__table__.c[name] for name in _columns(model))).where(
+                        model.id.in_(ids[start:start + LOAD_CHUNK]), model.is_active.is_(True)
+                    )
+                )
+                for row in rows.all():
+                    doc = make_doc(table, row)
+                    self._drop(doc.key)
+                    for user_type, partition in self._partitions.items():
+                        if doc.user_type in (user_type, UserType.ALL):
+                            partition.add(doc)
+                    self._stamps[doc.key] = stamps[doc.key]
+
+    def _drop(self, key: DocKey) -> None:
+        self._stamps.pop(key, None)
+        for partition in self._partitions.values():
+            partition.remove(key)
+
+
+def _columns(model) -> tuple[str, ...]:
+    common = ("id", "title", "description", "image_url", "user_type", "created_at")
+    if model is Event:
+        return (*common, "event_date", "location")
+    return (*common, "published_at")
+
+
+_content_search: ContentSearch | None = None
+
+
+def get_content_search() -> ContentSearch:
+    global _content_search
+    if _content_search is None:
+        _content_search = ContentSearch()
+    return _content_search
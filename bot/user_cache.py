@@ -0,0 +1,72 @@
+"""
+Кэш профилей пользователей бота (bot.read_models.UserProfile) по Telegram id: LRU с TTL на процесс.
+Запоминается и «не зарегистрирован» (None), чтобы апдейты незнакомых пользователей не ходили в БД.
+Весь кэш сбрасывается при смене версии cache_version:users — её меняют админ API (правка, удаление,
+массовые операции). Регистрация и правка профиля в боте сбрасывают только запись этого пользователя:
+свой процесс — сразу (forget), остальные — при опросе версий (users.profile_updated_at).
+"""
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+from bot.cache_versions import get_cache_versions
+from bot.read_models import UserProfile
+from config.settings import get_settings
+from database.cache_versions import USERS_VERSION
+
+
+class UserProfileCache:
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._version: str | None = None
+        # Растёт при каждом forget — результат загрузки, начатой до него, не запоминается
+        self._generation = 0
+        # user_id -> (истекает в, профиль или None)
+        self._entries: OrderedDict[int, tuple[float, UserProfile | None]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, user_id: int, load: Callable[[], Awaitable[UserProfile | None]]) -> UserProfile | None:
+        """Профиль из кэша; при промахе, истёкшем TTL или неизвестной версии — load() из БД."""
+        version = get_cache_versions().version(USERS_VERSION)
+        if version is None or self._max_entries <= 0:
+            return await load()
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+        now = time.monotonic()
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] > now:
+            self._entries.move_to_end(user_id)
+            return entry[1]
+        generation = self._generation
+        profile = await load()
+        # Версия могла смениться или профиль — измениться, пока шёл запрос, — такой результат не запоминаем
+        if generation == self._generation and get_cache_versions().version(USERS_VERSION) == self._version:
+            self._entries[user_id] = (now + self._ttl, profile)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return profile
+
+    def forget(self, user_id: int) -> None:
+        self.forget_many([user_id])
+
+    def forget_many(self, user_ids: list[int]) -> None:
+        self._generation += 1
+        for user_id in user_ids:
+            self._entries.pop(user_id, None)
+
+
+_cache: UserProfileCache | None = None
+
+
+def get_user_cache() -> UserProfileCache:
+    global _cache
+    if _cache is None:
+        settings = get_settings()
+        _cache = UserProfileCache(settings.bot_user_cache_size, settings.bot_user_cache_ttl_seconds)
+        get_cache_versions().on_users_changed(_cache.forget_many)
+    return _cache
@@ -1,20 +1,46 @@
+import asyncio
 import html
 import logging
 import re
+from collections.abc import Awaitable
 from datetime import datetime
 from urllib.parse import urlparse
 
-import httpx
-from aiogram.types import BufferedInputFile, InlineKeyboardButton, InlineKeyboardMarkup, Message
-from sqlalchemy import and_, func, or_, select
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import (
+    BufferedInputFile,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InputFile,
+    InputMediaPhoto,
+    Message,
+)
+from sqlalchemy import and_, or_, select
 from sqlalchemy.exc import SQLAlchemyError
 
+from bot.cursors import (
+    ContentCursor,
+    EventCursor,
+    encode_content_cursor,
+    encode_event_cursor,
+)
+from bot.feed_cache import FeedItem, get_feed_cache
+from bot.http_client import get_http_client
+from bot.media_cache import get_media_cache
+from bot.middlewares.db_session import update_db
+from bot.middlewares.metrics import BOT_MEDIA_SEND_FAILURES
+from bot.read_models import EVENT_ROW_COLUMNS, EventRow, UserProfile, content_columns
 from config.settings import get_settings
-from database.models import Event, EventRegistration, User, UserType
-from database.session import SessionLocal
+from database.models import Event, EventRegistration, UserType
 
 settings = get_settings()
 PAGE_SIZE = 5
+MESSAGE_TEXT_LIMIT = 4096
+ALBUM_CAPTION_LIMIT = 1024
+
+# Тег, HTML-сущность, текст без разметки или одиночный «<» / «&»
+_HTML_TOKEN_RE = re.compile(r"<[^<>]*>|&#?\w+;|[^<&]+|[<&]")
+_HTML_TAG_NAME_RE = re.compile(r"</?\s*([a-zA-Z][a-zA-Z0-9-]*)")
 
 
 def _is_internal_media_host(netloc: str) -> bool:
@@ -125,14 +151,13 @@ async def _fetch_media_bytes(url: str) -> tuple[bytes | None, str]:
     if not url:
         return None, ""
     try:
-        async with httpx.AsyncClient(timeout=15.0, follow_redirects=True) as client:
-            r = await client.get(url)
-            if r.status_code != 200:
-                return None, ""
-            ct = (r.headers.get("content-type") or "").split(";")[0].strip() or "application/octet-stream"
-            if "text/html" in ct:
-                return None, ""
-            return r.content, ct
+        r = await get_http_client().get(url)
+        if r.status_code != 200:
+            return None, ""
+        ct = (r.headers.get("content-type") or "").split(";")[0].strip() or "application/octet-stream"
+        if "text/html" in ct:
+            return None, ""
+        return r.content, ct
     except Exception as e:
         logging.warning("Bot media fetch failed url=%s: %s", url[:80], e)
         return None, ""
@@ -153,58 +178,416 @@ def _description_for_telegram(html_desc: str | None) -> str:
     return s.strip()
 
 
-async def _send_content_item(message: Message, item, parse_mode: str = "HTML") -> None:
-    safe_title = html.escape(str(item.title))
-    desc_html = _description_for_telegram(getattr(item, "description", None) or "")
-    text = f"<b>{safe_title}</b>\n\n{desc_html}" if desc_html else f"<b>{safe_title}</b>"
-    if len(text) > 4096:
-        text = text[:4090] + "..."
-    raw_url = getattr(item, "image_url", None)
+def _truncate_html(text: str, limit: int = MESSAGE_TEXT_LIMIT) -> str:
+    """
+    Обрезает HTML-текст Telegram до limit видимых символов (теги не считаются, сущность — один символ,
+    как у Telegram после разбора разметки): не режет внутри тега или сущности и закрывает открытые теги.
+    """
+    if len(text) <= limit:
+        return text
+    tokens = _HTML_TOKEN_RE.findall(text)
+    sizes = [0 if len(token) > 1 and token[0] == "<" else 1 if token[0] == "&" else len(token) for token in tokens]
+    if sum(sizes) <= limit:
+        return text
+    budget = limit - 1  # место под «…»
+    visible = 0
+    parts: list[str] = []
+    open_tags: list[str] = []
+    for token, size in zip(tokens, sizes):
+        if not size:
+            name = _HTML_TAG_NAME_RE.match(token)
+            if name:
+                tag = name.group(1).lower()
+                if token.startswith("</"):
+                    if tag in open_tags:
+                        del open_tags[len(open_tags) - 1 - open_tags[::-1].index(tag)]
+                elif not token.endswith("/>"):
+                    open_tags.append(tag)
+            parts.append(token)
+            continue
+        if visible + size > budget:
+            if token[0] != "&":
+                parts.append(token[: budget - visible])
+            break
+        parts.append(token)
+        visible += size
+    return "".join(parts) + "…" + "".join(f"</{tag}>" for tag in reversed(open_tags))
+
+
+async def _answer_media(
+    message: Message,
+    kind: str,
+    media: str | InputFile,
+    text: str,
+    parse_mode: str,
+    reply_markup: InlineKeyboardMarkup | None,
+) -> Message:
+    if kind == "video":
+        return await message.answer_video(video=media, caption=text, parse_mode=parse_mode, reply_markup=reply_markup)
+    if kind == "photo":
+        return await message.answer_photo(photo=media, caption=text, parse_mode=parse_mode, reply_markup=reply_markup)
+    return await message.answer_document(document=media, caption=text, parse_mode=parse_mode, reply_markup=reply_markup)
+
+
+def _message_file_id(sent: Message | None) -> tuple[str, str] | None:
+    """(kind, file_id) медиа из отправленного сообщения — для повторной отправки без загрузки."""
+    if sent is None:
+        return None
+    if sent.photo:
+        return "photo", sent.photo[-1].file_id
+    if sent.video:
+        return "video", sent.video.file_id
+    if sent.animation:
+        return "document", sent.animation.file_id
+    if sent.document:
+        return "document", sent.document.file_id
+    return None
+
+
+# Ответы Telegram на file_id, который больше не годится (удалён, чужого бота, другого типа)
+_REJECTED_FILE_ID_ERRORS = ("wrong file identifier", "wrong remote file identifier", "file_id", "can't use file of type")
+
+
+def _is_rejected_file_id(error: Exception) -> bool:
+    return isinstance(error, TelegramBadRequest) and any(
+        marker in error.message.lower() for marker in _REJECTED_FILE_ID_ERRORS
+    )
+
+
+class _PreparedMedia:
+    """Медиа карточки, подготовленное до отправки: file_id из кэша или скачанный файл."""
+
+    __slots__ = ("fetch_url", "cached", "body", "content_type")
+
+    def __init__(self, fetch_url: str, cached: tuple[str, str] | None, body: bytes | None, content_type: str) -> None:
+        self.fetch_url = fetch_url
+        self.cached = cached
+        self.body = body
+        self.content_type = content_type
+
+
+async def _prepare_media(table: str, item_id: int | None, raw_url: str | None) -> _PreparedMedia | None:
+    """Проверить кэш file_id и, если файла там нет, скачать его. None — медиа нет."""
     fetch_url = _fetch_url(raw_url)
-    sent = False
-    if fetch_url:
-        body, ct = await _fetch_media_bytes(fetch_url)
-        if body and len(body) > 0:
-            kind = _media_kind(fetch_url, ct)
-            fname = _filename_from_url(fetch_url, "file.bin")
+    if not fetch_url or not raw_url:
+        return None
+    cached = None
+    if table and item_id is not None:
+        cached = await get_media_cache().get(table, item_id, raw_url)
+    if cached:
+        return _PreparedMedia(fetch_url, cached, None, "")
+    body, ct = await _fetch_media_bytes(fetch_url)
+    return _PreparedMedia(fetch_url, None, body, ct)
+
+
+def _prefetch_media(entries: list[tuple[str, int, str | None]]) -> list[asyncio.Task]:
+    """
+    Подготовка медиа карточек страницы параллельно (не больше BOT_MEDIA_PREFETCH_CONCURRENCY скачиваний),
+    пока предыдущие карточки отправляются. Задачи идут в порядке карточек — порядок сообщений не меняется.
+    """
+    semaphore = asyncio.Semaphore(max(1, settings.bot_media_prefetch_concurrency))
+
+    async def prepare(table: str, item_id: int, raw_url: str | None) -> _PreparedMedia | None:
+        async with semaphore:
+            return await _prepare_media(table, item_id, raw_url)
+
+    return [asyncio.create_task(prepare(*entry)) for entry in entries]
+
+
+def _cancel_prefetch(tasks: list[asyncio.Task]) -> None:
+    for task in tasks:
+        task.cancel()
+
+
+async def _send_item_media(
+    message: Message,
+    table: str,
+    item_id: int | None,
+    raw_url: str | None,
+    text: str,
+    *,
+    parse_mode: str = "HTML",
+    reply_markup: InlineKeyboardMarkup | None = None,
+    prepared: Awaitable[_PreparedMedia | None] | None = None,
+) -> bool:
+    """
+    Отправить карточку с медиа. Сначала по сохранённому file_id (без скачивания файла);
+    иначе скачать и загрузить, при неудаче — по URL. file_id из ответа Telegram запоминается.
+    prepared — результат _prefetch_media для этой карточки (иначе медиа готовится здесь).
+    Возвращает False, если медиа нет или отправить не удалось (вызывающий шлёт текст).
+    """
+    media = await (prepared if prepared is not None else _prepare_media(table, item_id, raw_url))
+    if media is None:
+        return False
+    cache = get_media_cache() if table and item_id is not None else None
+    if cache is not None and media.cached:
+        kind, file_id = media.cached
+        try:
+            await _answer_media(message, kind, file_id, text, parse_mode, reply_markup)
+            return True
+        except Exception as e:
+            logging.exception("Send media by cached file_id failed, re-uploading")
+            BOT_MEDIA_SEND_FAILURES.labels(method="file_id").inc()
+            # Сетевой сбой или лимит не означает, что file_id плохой — забываем только отклонённый Telegram
+            if _is_rejected_file_id(e):
+                await cache.forget(table, item_id)
+            media.body, media.content_type = await _fetch_media_bytes(media.fetch_url)
+    sent: Message | None = None
+    fetch_url = media.fetch_url
+    body, ct = media.body, media.content_type
+    if body and len(body) > 0:
+        kind = _media_kind(fetch_url, ct)
+        fname = _filename_from_url(fetch_url, "file.bin")
+        try:
+            sent = await _answer_media(
+                message, kind, BufferedInputFile(file=body, filename=fname), text, parse_mode, reply_markup
+            )
+        except Exception:
+            logging.exception("Send media by bytes failed, trying URL")
+            BOT_MEDIA_SEND_FAILURES.labels(method="upload").inc()
+    if sent is None:
+        media_url = _media_url(raw_url)
+        if media_url:
             try:
-                if kind == "video":
-                    await message.answer_video(
-                        video=BufferedInputFile(file=body, filename=fname),
-                        caption=text,
-                        parse_mode=parse_mode,
-                    )
-                elif kind == "photo":
-                    await message.answer_photo(
-                        photo=BufferedInputFile(file=body, filename=fname),
-                        caption=text,
-                        parse_mode=parse_mode,
-                    )
-                else:
-                    await message.answer_document(
-                        document=BufferedInputFile(file=body, filename=fname),
-                        caption=text,
-                        parse_mode=parse_mode,
-                    )
-                sent = True
+                sent = await _answer_media(message, _media_kind(media_url), media_url, text, parse_mode, reply_markup)
             except Exception:
-                logging.exception("Send media by bytes failed, trying URL")
-        if not sent:
-            media_url = _media_url(raw_url)
-            if media_url:
-                try:
-                    kind = _media_kind(media_url)
-                    if kind == "video":
-                        await message.answer_video(video=media_url, caption=text, parse_mode=parse_mode)
-                    elif kind == "photo":
-                        await message.answer_photo(photo=media_url, caption=text, parse_mode=parse_mode)
-                    else:
-                        await message.answer_document(document=media_url, caption=text, parse_mode=parse_mode)
-                    sent = True
-                except Exception:
-                    logging.exception("Failed to send media by URL, falling back to text")
+                logging.exception("Failed to send media by URL, falling back to text")
+                BOT_MEDIA_SEND_FAILURES.labels(method="url").inc()
+    if sent is None:
+        return False
+    uploaded = _message_file_id(sent)
+    if cache is not None and uploaded:
+        await cache.put(table, item_id, raw_url, *uploaded)
+    return True
+
+
+def _content_item_text(item, label: str | None = None) -> str:
+    """Карточка контента (HTML): заголовок, описание; label — строка-подпись раздела над заголовком."""
+    safe_title = html.escape(str(item.title))
+    desc_html = _description_for_telegram(getattr(item, "description", None) or "")
+    text = f"<b>{safe_title}</b>\n\n{desc_html}" if desc_html else f"<b>{safe_title}</b>"
+    if label:
+        text = f"{label}\n{text}"
+    return _truncate_html(text)
+
+
+def _content_after(model, after: ContentCursor):
+    """Условие «строго после курсора» для порядка published_at desc nulls last, created_at desc, id desc."""
+    tail = or_(
+        model.created_at < after.created_at,
+        and_(model.created_at == after.created_at, model.id < after.id),
+    )
+    if after.published_at is None:
+        return and_(model.published_at.is_(None), tail)
+    return or_(
+        model.published_at < after.published_at,
+        and_(model.published_at == after.published_at, tail),
+        model.published_at.is_(None),
+    )
+
+
+async def _content_page(
+    session, model, user_type: UserType, offset: int = 0, after: ContentCursor | None = None
+) -> list[FeedItem]:
+    """Порция ленты (до PAGE_SIZE + 1 карточек) после курсора after (или с offset) — из кэша ленты или из БД."""
+    base = (
+        select(*content_columns(model))
+        .where(
+            and_(
+                model.is_active.is_(True),
+                or_(model.user_type == user_type, model.user_type == UserType.ALL),
+            )
+        )
+        .order_by(model.published_at.desc().nullslast(), model.created_at.desc(), model.id.desc())
+    )
+
+    async def fetch(query) -> list[FeedItem]:
+        rows = (await session.execute(query)).all()
+        return [
+            FeedItem(
+                model.__tablename__,
+                row.id,
+                row.image_url,
+                _content_item_text(row),
+                ContentCursor(row.published_at, row.created_at, row.id),
+            )
+            for row in rows
+        ]
+
+    async def load(start: int, limit: int) -> list[FeedItem]:
+        return await fetch(base.offset(start).limit(limit))
+
+    async def seek(cursor: ContentCursor, limit: int) -> list[FeedItem]:
+        return await fetch(base.where(_content_after(model, cursor)).limit(limit))
+
+    return await get_feed_cache().page(
+        model.__tablename__,
+        getattr(user_type, "value", str(user_type)),
+        offset,
+        PAGE_SIZE + 1,
+        load,
+        after=after,
+        seek=seek,
+    )
+
+
+def _content_more_keyboard(table: str, last: FeedItem) -> InlineKeyboardMarkup:
+    cursor = encode_content_cursor(*last.cursor)
+    return InlineKeyboardMarkup(
+        inline_keyboard=[[InlineKeyboardButton(text="Показать ещё", callback_data=f"content_more:{table}:{cursor}")]]
+    )
+
+
+async def _send_content_item(
+    message: Message,
+    item: FeedItem,
+    parse_mode: str = "HTML",
+    prepared: Awaitable[_PreparedMedia | None] | None = None,
+) -> None:
+    sent = await _send_item_media(
+        message, item.table, item.id, item.image_url, item.text, parse_mode=parse_mode, prepared=prepared
+    )
     if not sent:
-        await message.answer(text, parse_mode=parse_mode)
+        await message.answer(item.text, parse_mode=parse_mode)
+
+
+def _resolved(media: _PreparedMedia | None) -> Awaitable[_PreparedMedia | None]:
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(media)
+    return future
+
+
+def _prepared_kind(media: _PreparedMedia) -> str:
+    return media.cached[0] if media.cached else _media_kind(media.fetch_url, media.content_type)
+
+
+async def _send_content_cards(
+    message: Message,
+    items: list[FeedItem],
+    prepared: list[Awaitable[_PreparedMedia | None]],
+    header: str | None = None,
+) -> None:
+    if header:
+        await message.answer(header, parse_mode="HTML")
+    for item, media in zip(items, prepared):
+        await _send_content_item(message, item, prepared=media)
+
+
+def _album_caption(item: FeedItem, overflow: list[str]) -> str:
+    """Подпись в альбоме ограничена 1024 символами: длинный текст — заголовок в подписи, полностью — после альбома."""
+    if len(item.text) <= ALBUM_CAPTION_LIMIT:
+        return item.text
+    overflow.append(item.text)
+    return _truncate_html(item.text.split("\n\n", 1)[0], ALBUM_CAPTION_LIMIT)
+
+
+def _album_source(item: FeedItem, media: _PreparedMedia | None) -> str | InputFile | None:
+    """Фото для альбома: file_id из кэша, скачанный файл или ссылка; None — карточка в альбом не идёт."""
+    if media is None or _prepared_kind(media) != "photo":
+        return None
+    if media.cached:
+        return media.cached[1]
+    if media.body:
+        return BufferedInputFile(file=media.body, filename=_filename_from_url(media.fetch_url, "photo.jpg"))
+    return _media_url(item.image_url)
+
+
+def _album_segments(sources: list[str | InputFile | None]) -> list[list[int]]:
+    """
+    Карточки страницы по порядку: подряд идущие фото — альбомами по 2–10 (индексы карточек),
+    всё остальное — по одной.
+    """
+    segments: list[list[int]] = []
+    run: list[int] = []
+    for i, source in enumerate([*sources, None]):
+        if source is not None:
+            run.append(i)
+            continue
+        for start in range(0, len(run), 10):
+            chunk = run[start:start + 10]
+            segments.extend([chunk] if len(chunk) >= 2 else [[j] for j in chunk])
+        run = []
+        if i < len(sources):
+            segments.append([i])
+    return segments
+
+
+async def _send_album_overflow(message: Message, overflow: list[str]) -> None:
+    chunk = ""
+    for text in overflow:
+        if chunk and len(chunk) + 2 + len(text) > MESSAGE_TEXT_LIMIT:
+            await message.answer(chunk, parse_mode="HTML")
+            chunk = ""
+        chunk = f"{chunk}\n\n{text}" if chunk else text
+    if chunk:
+        await message.answer(chunk, parse_mode="HTML")
+
+
+async def _send_content_album(
+    message: Message, items: list[FeedItem], prepared: list[_PreparedMedia | None], header: str | None
+) -> bool:
+    """
+    Подряд идущие фото страницы — одним sendMediaGroup на 2–10 фото, видео, документы, карточки без медиа
+    и одиночные фото — по одной, в порядке страницы (последняя отправленная карточка — позиция «Показать ещё»).
+    Заголовок страницы — в подпись первого фото, если страница начинается с альбома. Возвращает False,
+    если на странице нет двух фото подряд и ничего не отправлено (вызывающий шлёт карточки по одной).
+    """
+    sources = [_album_source(item, media) for item, media in zip(items, prepared)]
+    segments = _album_segments(sources)
+    if all(len(segment) == 1 for segment in segments):
+        return False
+    cache = get_media_cache()
+    for segment in segments:
+        if len(segment) == 1:
+            if header:
+                await message.answer(header, parse_mode="HTML")
+                header = None
+            await _send_content_item(message, items[segment[0]], prepared=_resolved(prepared[segment[0]]))
+            continue
+        overflow: list[str] = []
+        album = [
+            InputMediaPhoto(media=sources[i], caption=_album_caption(items[i], overflow), parse_mode="HTML")
+            for i in segment
+        ]
+        # Заголовок, вложенный в подпись альбома, при сбое альбома уходит вместе с карточками
+        caption_header = None
+        if header:
+            combined = f"{header}\n\n{album[0].caption}"
+            if len(combined) <= ALBUM_CAPTION_LIMIT:
+                album[0].caption = combined
+                caption_header = header
+            else:
+                await message.answer(header, parse_mode="HTML")
+            header = None
+        try:
+            sent = await message.answer_media_group(media=album)
+        except Exception:
+            logging.exception("Send content album failed, falling back to single cards")
+            BOT_MEDIA_SEND_FAILURES.labels(method="album").inc()
+            await _send_content_cards(
+                message, [items[i] for i in segment], [_resolved(prepared[i]) for i in segment], caption_header
+            )
+            continue
+        for i, sent_message in zip(segment, sent):
+            uploaded = _message_file_id(sent_message)
+            if items[i].table and uploaded:
+                await cache.put(items[i].table, items[i].id, items[i].image_url, *uploaded)
+        await _send_album_overflow(message, overflow)
+    return True
+
+
+async def _send_content_page(message: Message, items: list[FeedItem], header: str | None = None) -> None:
+    """Карточки по порядку; медиа следующих карточек скачивается, пока отправляются предыдущие."""
+    prefetch = _prefetch_media([(item.table, item.id, item.image_url) for item in items])
+    try:
+        if settings.bot_content_page_mode.lower() == "album":
+            # Компактный режим: ждём медиа всей страницы и шлём фото одним альбомом
+            prepared = await asyncio.gather(*prefetch)
+            if await _send_content_album(message, items, prepared, header):
+                return
+        await _send_content_cards(message, items, prefetch, header)
+    finally:
+        _cancel_prefetch(prefetch)
 
 
 async def render_content(message: Message, model, title: str, *, user_id: int | None = None) -> None:
@@ -217,25 +600,15 @@ async def render_content(message: Message, model, title: str, *, user_id: int |
         return
     user_id = int(user_id)
     try:
-        async with SessionLocal() as session:
-            user = await session.get(User, user_id)
+        async with update_db(user_id) as db:
+            user = await db.user()
             if not user:
                 await message.answer("Сначала выполните регистрацию через /start")
                 return
             if user.deleted_at is not None:
                 await message.answer("Ваш аккаунт деактивирован. Обратитесь к менеджеру.")
                 return
-            query = (
-                select(model)
-                .where(
-                    and_(
-                        model.is_active.is_(True),
-                        or_(model.user_type == user.user_type, model.user_type == UserType.ALL),
-                    )
-                )
-                .order_by(model.published_at.desc().nullslast(), model.created_at.desc())
-            )
-            items = list((await session.scalars(query.limit(PAGE_SIZE + 1))).all())
+            items = await _content_page(db.session, model, user.user_type, 0)
             logging.info(
                 "Content %s: user_id=%s user_type=%s items=%s",
                 model.__tablename__,
@@ -250,21 +623,10 @@ async def render_content(message: Message, model, title: str, *, user_id: int |
     if not items:
         await message.answer(f"<b>{title}</b>\nПока нет актуальных записей.", parse_mode="HTML")
         return
-    await message.answer(f"<b>{title}</b>", parse_mode="HTML")
     has_more = len(items) > PAGE_SIZE
-    for item in items[:PAGE_SIZE]:
-        await _send_content_item(message, item)
+    await _send_content_page(message, items[:PAGE_SIZE], header=f"<b>{title}</b>")
     if has_more:
-        kb = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text="Показать ещё",
-                        callback_data=f"content_more:{model.__tablename__}:{PAGE_SIZE}",
-                    )
-                ]
-            ]
-        )
+        kb = _content_more_keyboard(model.__tablename__, items[PAGE_SIZE - 1])
         await message.answer("Загрузить следующую порцию:", reply_markup=kb)
 
 
@@ -275,8 +637,9 @@ async def render_content_more(
     *,
     user_id: int | None = None,
     offset: int = 0,
+    after: ContentCursor | None = None,
 ) -> bool:
-    """Отправляет следующую порцию контента и кнопку для продолжения."""
+    """Отправляет порцию контента после курсора after (offset — для старых кнопок) и кнопку для продолжения."""
     if not message:
         return False
     if user_id is None:
@@ -287,27 +650,15 @@ async def render_content_more(
     user_id = int(user_id)
     offset = max(0, int(offset))
     try:
-        async with SessionLocal() as session:
-            user = await session.get(User, user_id)
+        async with update_db(user_id) as db:
+            user = await db.user()
             if not user:
                 await message.answer("Сначала выполните регистрацию через /start")
                 return False
             if user.deleted_at is not None:
                 await message.answer("Ваш аккаунт деактивирован. Обратитесь к менеджеру.")
                 return False
-            query = (
-                select(model)
-                .where(
-                    and_(
-                        model.is_active.is_(True),
-                        or_(model.user_type == user.user_type, model.user_type == UserType.ALL),
-                    )
-                )
-                .order_by(model.published_at.desc().nullslast(), model.created_at.desc())
-                .offset(offset)
-                .limit(PAGE_SIZE + 1)
-            )
-            items = list((await session.scalars(query)).all())
+            items = await _content_page(db.session, model, user.user_type, offset, after)
     except SQLAlchemyError as e:
         logging.exception("Database error while loading content more: %s", e)
         await message.answer("Не удалось получить данные. Попробуйте позже.")
@@ -316,20 +667,9 @@ async def render_content_more(
         await message.answer(f"<b>{title}</b>\nБольше записей нет.", parse_mode="HTML")
         return False
     has_more = len(items) > PAGE_SIZE
-    for item in items[:PAGE_SIZE]:
-        await _send_content_item(message, item)
+    await _send_content_page(message, items[:PAGE_SIZE])
     if has_more:
-        next_offset = offset + PAGE_SIZE
-        kb = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text="Показать ещё",
-                        callback_data=f"content_more:{model.__tablename__}:{next_offset}",
-                    )
-                ]
-            ]
-        )
+        kb = _content_more_keyboard(model.__tablename__, items[PAGE_SIZE - 1])
         await message.answer("Загрузить следующую порцию:", reply_markup=kb)
     return has_more
 
@@ -353,10 +693,11 @@ def _event_registration_keyboard(event_id: int, user_registered: bool, places_le
 
 async def _send_event_item(
     message: Message,
-    event: Event,
+    event: EventRow,
     *,
     registered_count: int = 0,
     user_registered: bool = False,
+    prepared: Awaitable[_PreparedMedia | None] | None = None,
 ) -> None:
     safe_title = html.escape(str(event.title))
     safe_desc = html.escape(str(event.description or ""))
@@ -364,77 +705,102 @@ async def _send_event_item(
     date_str = event.event_date.strftime("%d.%m.%Y, %H:%M") if event.event_date else ""
     header = f"<b>{safe_title}</b>\n📅 {date_str}\n📍 {safe_location}\n\n"
     text = header + safe_desc
-    max_places = getattr(event, "max_places", None)
+    max_places = event.max_places
     if max_places is not None:
         places_left = registered_count < max_places
         if not places_left and not user_registered:
             text += "\n\n⚠️ <i>Мест нет.</i>"
         elif max_places > 0:
             text += f"\n\n👥 Мест: {registered_count}/{max_places}"
-    if len(text) > 4096:
-        text = text[:4090] + "..."
+    text = _truncate_html(text)
     keyboard = _event_registration_keyboard(
         event.id,
         user_registered=user_registered,
         places_left=max_places is None or registered_count < max_places,
     )
-    raw_url = getattr(event, "image_url", None)
-    fetch_url = _fetch_url(raw_url)
-    sent = False
-    if fetch_url:
-        body, ct = await _fetch_media_bytes(fetch_url)
-        if body and len(body) > 0:
-            kind = _media_kind(fetch_url, ct)
-            fname = _filename_from_url(fetch_url, "file.bin")
-            try:
-                if kind == "video":
-                    await message.answer_video(
-                        video=BufferedInputFile(file=body, filename=fname),
-                        caption=text,
-                        parse_mode="HTML",
-                        reply_markup=keyboard,
-                    )
-                elif kind == "photo":
-                    await message.answer_photo(
-                        photo=BufferedInputFile(file=body, filename=fname),
-                        caption=text,
-                        parse_mode="HTML",
-                        reply_markup=keyboard,
-                    )
-                else:
-                    await message.answer_document(
-                        document=BufferedInputFile(file=body, filename=fname),
-                        caption=text,
-                        parse_mode="HTML",
-                        reply_markup=keyboard,
-                    )
-                sent = True
-            except Exception:
-                logging.exception("Send event media by bytes failed, trying URL")
-        if not sent:
-            media_url = _media_url(raw_url)
-            if media_url:
-                try:
-                    kind = _media_kind(media_url)
-                    if kind == "video":
-                        await message.answer_video(
-                            video=media_url, caption=text, parse_mode="HTML", reply_markup=keyboard
-                        )
-                    elif kind == "photo":
-                        await message.answer_photo(
-                            photo=media_url, caption=text, parse_mode="HTML", reply_markup=keyboard
-                        )
-                    else:
-                        await message.answer_document(
-                            document=media_url, caption=text, parse_mode="HTML", reply_markup=keyboard
-                        )
-                    sent = True
-                except Exception:
-                    logging.exception("Failed to send event media by URL, falling back to text")
+    sent = await _send_item_media(
+        message,
+        Event.__tablename__,
+        event.id,
+        event.image_url,
+        text,
+        parse_mode="HTML",
+        reply_markup=keyboard,
+        prepared=prepared,
+    )
     if not sent:
         await message.answer(text, parse_mode="HTML", reply_markup=keyboard)
 
 
+async def _send_events_page(
+    message: Message, events: list[tuple[EventRow, int, bool]], header: str | None = None
+) -> None:
+    prefetch = _prefetch_media([(Event.__tablename__, event.id, event.image_url) for event, _, _ in events])
+    try:
+        if header:
+            await message.answer(header, parse_mode="HTML")
+        for (event, reg_count, user_registered), prepared in zip(events, prefetch):
+            await _send_event_item(
+                message, event, registered_count=reg_count, user_registered=user_registered, prepared=prepared
+            )
+    finally:
+        _cancel_prefetch(prefetch)
+
+
+def _user_denied_text(user: UserProfile | None) -> str | None:
+    """Текст отказа, если пользователь не зарегистрирован или деактивирован."""
+    if not user:
+        return "Сначала выполните регистрацию через /start"
+    if user.deleted_at is not None:
+        return "Ваш аккаунт деактивирован. Обратитесь к менеджеру."
+    return None
+
+
+async def _events_page(
+    session, user_id: int, user_type: UserType, offset: int = 0, after: EventCursor | None = None
+) -> list[tuple[EventRow, int, bool]]:
+    """
+    Порция предстоящих мероприятий (до PAGE_SIZE + 1) одним запросом:
+    (мероприятие, число записавшихся из events.registered_count, записан ли пользователь).
+    С курсором after — seek по (event_date, id), иначе offset (старые кнопки).
+    """
+    registered_by_me = (
+        select(EventRegistration.id)
+        .where(EventRegistration.event_id == Event.id, EventRegistration.user_id == user_id)
+        .exists()
+    )
+    query = (
+        select(*EVENT_ROW_COLUMNS, Event.registered_count, registered_by_me)
+        .where(
+            and_(
+                Event.is_active.is_(True),
+                Event.event_date >= datetime.utcnow(),
+                or_(Event.user_type == user_type, Event.user_type == UserType.ALL),
+            )
+        )
+        .order_by(Event.event_date.asc(), Event.id.asc())
+        .limit(PAGE_SIZE + 1)
+    )
+    if after is not None:
+        query = query.where(
+            or_(
+                Event.event_date > after.event_date,
+                and_(Event.event_date == after.event_date, Event.id > after.id),
+            )
+        )
+    elif offset:
+        query = query.offset(offset)
+    rows = (await session.execute(query)).all()
+    return [(EventRow(*columns), count or 0, bool(mine)) for *columns, count, mine in rows]
+
+
+def _events_more_keyboard(last: EventRow) -> InlineKeyboardMarkup:
+    cursor = encode_event_cursor(last.event_date, last.id)
+    return InlineKeyboardMarkup(
+        inline_keyboard=[[InlineKeyboardButton(text="Показать ещё", callback_data=f"events_more:{cursor}")]]
+    )
+
+
 async def render_events(message: Message, *, user_id: int | None = None) -> None:
     if not message:
         return
@@ -445,83 +811,54 @@ async def render_events(message: Message, *, user_id: int | None = None) -> None
         return
     user_id = int(user_id)
     try:
-        async with SessionLocal() as session:
-            user = await session.get(User, user_id)
-            if not user:
-                await message.answer("Сначала выполните регистрацию через /start")
-                return
-            if user.deleted_at is not None:
-                await message.answer("Ваш аккаунт деактивирован. Обратитесь к менеджеру.")
-                return
-            now = datetime.utcnow()
-            query = (
-                select(Event)
-                .where(
-                    and_(
-                        Event.is_active.is_(True),
-                        Event.event_date >= now,
-                        or_(Event.user_type == user.user_type, Event.user_type == UserType.ALL),
-                    )
-                )
-                .order_by(Event.event_date.asc())
-            )
-            events = list((await session.scalars(query.limit(PAGE_SIZE + 1))).all())
-            logging.info(
-                "Events: user_id=%s user_type=%s count=%s",
-                user_id,
-                getattr(user.user_type, "value", user.user_type),
-                len(events),
-            )
-            user_type_label = "HoReCa" if user.user_type == UserType.HORECA else "Retail"
-            if not events:
-                await message.answer(
-                    "🎪 <b>МЕРОПРИЯТИЯ</b>\n\n"
-                    "На данный момент нет запланированных мероприятий. Следите за анонсами!\n\n"
-                    "Обычно мы проводим:\n"
-                    "• Дегустации новых вкусов\n"
-                    "• Тренинги для кальянщиков\n"
-                    "• Партнерские встречи\n"
-                    "• Презентации новинок",
-                    parse_mode="HTML",
-                )
-                return
-            await message.answer(
-                f"🎪 <b>ПРЕДСТОЯЩИЕ МЕРОПРИЯТИЯ</b>\nдля {user_type_label}\n\n─────────────────",
-                parse_mode="HTML",
-            )
-            has_more = len(events) > PAGE_SIZE
-            for event in events[:PAGE_SIZE]:
-                reg_count = await session.scalar(
-                    select(func.count())
-                    .select_from(EventRegistration)
-                    .where(EventRegistration.event_id == event.id)
-                )
-                user_reg = await session.scalar(
-                    select(EventRegistration).where(
-                        EventRegistration.event_id == event.id,
-                        EventRegistration.user_id == user_id,
-                    )
-                )
-                await _send_event_item(
-                    message,
-                    event,
-                    registered_count=reg_count or 0,
-                    user_registered=user_reg is not None,
-                )
-            if has_more:
-                kb = InlineKeyboardMarkup(
-                    inline_keyboard=[
-                        [InlineKeyboardButton(text="Показать ещё", callback_data=f"events_more:{PAGE_SIZE}")]
-                    ]
-                )
-                await message.answer("Загрузить следующую порцию:", reply_markup=kb)
+        async with update_db(user_id) as db:
+            user = await db.user()
+            denied = _user_denied_text(user)
+            if denied is None:
+                user_type = user.user_type
+                events = await _events_page(db.session, user_id, user_type, 0)
     except SQLAlchemyError as e:
         logging.exception("Database error while loading events: %s", e)
         await message.answer("Не удалось получить данные. Попробуйте позже.")
+        return
+    if denied is not None:
+        await message.answer(denied)
+        return
+    # Сессия закрыта до отправки в Telegram — соединение с БД не держим на время сетевых вызовов
+    logging.info(
+        "Events: user_id=%s user_type=%s count=%s",
+        user_id,
+        getattr(user_type, "value", user_type),
+        len(events),
+    )
+    user_type_label = "HoReCa" if user_type == UserType.HORECA else "Retail"
+    if not events:
+        await message.answer(
+            "🎪 <b>МЕРОПРИЯТИЯ</b>\n\n"
+            "На данный момент нет запланированных мероприятий. Следите за анонсами!\n\n"
+            "Обычно мы проводим:\n"
+            "• Дегустации новых вкусов\n"
+            "• Тренинги для кальянщиков\n"
+            "• Партнерские встречи\n"
+            "• Презентации новинок",
+            parse_mode="HTML",
+        )
+        return
+    has_more = len(events) > PAGE_SIZE
+    await _send_events_page(
+        message,
+        events[:PAGE_SIZE],
+        header=f"🎪 <b>ПРЕДСТОЯЩИЕ МЕРОПРИЯТИЯ</b>\nдля {user_type_label}\n\n─────────────────",
+    )
+    if has_more:
+        kb = _events_more_keyboard(events[PAGE_SIZE - 1][0])
+        await message.answer("Загрузить следующую порцию:", reply_markup=kb)
 
 
-async def render_events_more(message: Message, *, user_id: int | None = None, offset: int = 0) -> bool:
-    """Отправляет следующую порцию мероприятий и кнопку продолжения."""
+async def render_events_more(
+    message: Message, *, user_id: int | None = None, offset: int = 0, after: EventCursor | None = None
+) -> bool:
+    """Отправляет порцию мероприятий после курсора after (offset — для старых кнопок) и кнопку продолжения."""
     if not message:
         return False
     if user_id is None:
@@ -532,61 +869,24 @@ async def render_events_more(message: Message, *, user_id: int | None = None, of
     user_id = int(user_id)
     offset = max(0, int(offset))
     try:
-        async with SessionLocal() as session:
-            user = await session.get(User, user_id)
-            if not user:
-                await message.answer("Сначала выполните регистрацию через /start")
-                return False
-            if user.deleted_at is not None:
-                await message.answer("Ваш аккаунт деактивирован. Обратитесь к менеджеру.")
-                return False
-            now = datetime.utcnow()
-            query = (
-                select(Event)
-                .where(
-                    and_(
-                        Event.is_active.is_(True),
-                        Event.event_date >= now,
-                        or_(Event.user_type == user.user_type, Event.user_type == UserType.ALL),
-                    )
-                )
-                .order_by(Event.event_date.asc())
-                .offset(offset)
-                .limit(PAGE_SIZE + 1)
-            )
-            events = list((await session.scalars(query)).all())
-            if not events:
-                await message.answer("Больше мероприятий нет.")
-                return False
-            has_more = len(events) > PAGE_SIZE
-            for event in events[:PAGE_SIZE]:
-                reg_count = await session.scalar(
-                    select(func.count())
-                    .select_from(EventRegistration)
-                    .where(EventRegistration.event_id == event.id)
-                )
-                user_reg = await session.scalar(
-                    select(EventRegistration).where(
-                        EventRegistration.event_id == event.id,
-                        EventRegistration.user_id == user_id,
-                    )
-                )
-                await _send_event_item(
-                    message,
-                    event,
-                    registered_count=reg_count or 0,
-                    user_registered=user_reg is not None,
-                )
-            if has_more:
-                next_offset = offset + PAGE_SIZE
-                kb = InlineKeyboardMarkup(
-                    inline_keyboard=[
-                        [InlineKeyboardButton(text="Показать ещё", callback_data=f"events_more:{next_offset}")]
-                    ]
-                )
-                await message.answer("Загрузить следующую порцию:", reply_markup=kb)
-            return has_more
+        async with update_db(user_id) as db:
+            user = await db.user()
+            denied = _user_denied_text(user)
+            if denied is None:
+                events = await _events_page(db.session, user_id, user.user_type, offset, after)
     except SQLAlchemyError as e:
         logging.exception("Database error while loading events more: %s", e)
         await message.answer("Не удалось получить данные. Попробуйте позже.")
         return False
+    if denied is not None:
+        await message.answer(denied)
+        return False
+    if not events:
+        await message.answer("Больше мероприятий нет.")
+        return False
+    has_more = len(events) > PAGE_SIZE
+    await _send_events_page(message, events[:PAGE_SIZE])
+    if has_more:
+        kb = _events_more_keyboard(events[PAGE_SIZE - 1][0])
+        await message.answer("Загрузить следующую порцию:", reply_markup=kb)
+    return has_more
@@ -0,0 +1,74 @@
+"""
+Webhook-режим бота (BOT_MODE=webhook): aiohttp-сервер с обработчиком aiogram.
+Запросы без верного X-Telegram-Bot-Api-Secret-Token отклоняются (401).
+Несколько процессов слушают один порт через SO_REUSEPORT, webhook регистрирует только родитель.
+"""
+import asyncio
+import logging
+import re
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+_SECRET_RE = re.compile(r"^[A-Za-z0-9_-]{1,256}$")
+
+
+def webhook_url() -> str:
+    settings = get_settings()
+    if not settings.bot_webhook_base_url:
+        raise RuntimeError("BOT_MODE=webhook requires BOT_WEBHOOK_BASE_URL")
+    return settings.bot_webhook_base_url.rstrip("/") + settings.bot_webhook_path
+
+
+def webhook_secret() -> str:
+    secret = get_settings().bot_webhook_secret or ""
+    if not _SECRET_RE.match(secret):
+        raise RuntimeError("BOT_MODE=webhook requires BOT_WEBHOOK_SECRET (1-256 chars: A-Z, a-z, 0-9, _ and -)")
+    return secret
+
+
+async def _healthz(_: web.Request) -> web.Response:
+    return web.Response(text="ok")
+
+
+def build_webhook_app(dp: Dispatcher, bot: Bot, *, path: str, secret: str) -> web.Application:
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=secret).register(app, path=path)
+    app.router.add_get("/healthz", _healthz)
+    # startup/shutdown диспетчера и закрытие сессии бота — вместе с приложением
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def register_webhook(bot: Bot, dp: Dispatcher) -> None:
+    settings = get_settings()
+    url = webhook_url()
+    await bot.set_webhook(
+        url,
+        secret_token=webhook_secret(),
+        max_connections=min(100, max(1, settings.bot_webhook_max_connections)),
+        allowed_updates=dp.resolve_used_update_types(),
+        drop_pending_updates=settings.bot_drop_pending_updates,
+    )
+    logger.info("Webhook registered: %s", url)
+
+
+async def serve_webhook(dp: Dispatcher, bot: Bot, *, reuse_port: bool = False) -> None:
+    settings = get_settings()
+    app = build_webhook_app(dp, bot, path=settings.bot_webhook_path, secret=webhook_secret())
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(
+        runner, settings.bot_webhook_host, settings.bot_webhook_port, reuse_port=reuse_port or None
+    )
+    await site.start()
+    logger.info("Webhook server on %s:%s%s", settings.bot_webhook_host, settings.bot_webhook_port, settings.bot_webhook_path)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
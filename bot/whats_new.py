@@ -0,0 +1,140 @@
+"""
+Лента «Что нового»: непросмотренные акции, новинки и приходы одной лентой. Позиция пользователя
+(users.feed_seen_cursor) сдвигается после каждой отправленной порции.
+
+Лента упорядочена по времени публикации (coalesce(published_at, created_at)), и «непросмотренное» —
+всё, что в этом порядке стоит после позиции пользователя. Запись, опубликованная задним числом
+(published_at раньше позиции) или снова включённая со старой датой, в «Что нового» не попадёт —
+она видна только в своём разделе.
+"""
+import logging
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Message
+from sqlalchemy import and_, func, literal, or_, select, union_all, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from bot.cursors import FeedCursor, decode_feed_cursor, encode_feed_cursor
+from bot.feed_cache import FeedItem
+from bot.middlewares.db_session import update_db
+from bot.utils import PAGE_SIZE, _content_item_text, _send_content_page, _user_denied_text
+from database.models import Delivery, News, Promotion, User, UserType
+
+# Лента «Что нового»: разделы в порядке сортировки по таблице при равном времени публикации
+WHATS_NEW_SOURCES = {
+    Delivery.__tablename__: (Delivery, "📦 Приход"),
+    News.__tablename__: (News, "📰 Новинка"),
+    Promotion.__tablename__: (Promotion, "🎁 Акция"),
+}
+
+
+def _whats_new_branch(model, user_type: UserType, after: FeedCursor | None, limit: int):
+    """
+    Не больше limit карточек одного раздела в порядке ленты: seek внутри раздела идёт по индексу
+    ix_<таблица>_whats_new, и в UNION ALL попадает по limit строк из каждой таблицы, а не вся таблица.
+    """
+    published = func.coalesce(model.published_at, model.created_at)
+    table = model.__tablename__
+    query = select(
+        published.label("published"),
+        literal(table).label("source"),
+        model.id.label("id"),
+        model.title.label("title"),
+        model.description.label("description"),
+        model.image_url.label("image_url"),
+    ).where(
+        model.is_active.is_(True),
+        or_(model.user_type == user_type, model.user_type == UserType.ALL),
+    )
+    if after is None:
+        return query.order_by(published.desc(), model.id.desc()).limit(limit)
+    # При равном времени публикации раздел идёт после курсора, если его таблица «больше» таблицы курсора
+    if table == after.table:
+        seek = or_(published > after.published, and_(published == after.published, model.id > after.id))
+    elif table > after.table:
+        seek = published >= after.published
+    else:
+        seek = published > after.published
+    return query.where(seek).order_by(published, model.id).limit(limit)
+
+
+async def _whats_new_page(
+    session, user_type: UserType, after: FeedCursor | None
+) -> list[tuple[FeedCursor, FeedItem]]:
+    """
+    Акции, новинки и приходы одним запросом (UNION ALL) по возрастанию (время публикации, таблица, id):
+    до PAGE_SIZE + 1 карточек строго после курсора after; без курсора — последние PAGE_SIZE.
+    """
+    limit = PAGE_SIZE if after is None else PAGE_SIZE + 1
+    branches = [
+        select(_whats_new_branch(model, user_type, after, limit).subquery())
+        for model, _ in WHATS_NEW_SOURCES.values()
+    ]
+    feed = union_all(*branches).subquery()
+    order = (feed.c.published, feed.c.source, feed.c.id)
+    if after is None:
+        query = select(feed).order_by(*(col.desc() for col in order)).limit(limit)
+    else:
+        query = select(feed).order_by(*order).limit(limit)
+    rows = (await session.execute(query)).all()
+    if after is None:
+        rows.reverse()
+    page = []
+    for row in rows:
+        text = _content_item_text(row, WHATS_NEW_SOURCES[row.source][1])
+        page.append((FeedCursor(row.published, row.source, row.id), FeedItem(row.source, row.id, row.image_url, text)))
+    return page
+
+
+async def _mark_whats_new_seen(user_id: int, seen: str | None, cursor: FeedCursor) -> None:
+    """Сдвигает позицию пользователя в ленте, если её не сдвинули параллельно (сравнение с прочитанной)."""
+    async with update_db(user_id) as db:
+        unchanged = User.feed_seen_cursor.is_(None) if seen is None else User.feed_seen_cursor == seen
+        await db.session.execute(
+            update(User).where(User.id == user_id, unchanged).values(feed_seen_cursor=encode_feed_cursor(*cursor))
+        )
+        await db.session.commit()
+
+
+def _whats_new_more_keyboard() -> InlineKeyboardMarkup:
+    # Курсор не нужен: следующая порция начинается с сохранённой позиции пользователя
+    return InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="Показать ещё", callback_data="whats_new_more")]])
+
+
+async def render_whats_new(message: Message, *, user_id: int | None = None, more: bool = False) -> bool:
+    """Непросмотренные карточки всех разделов одной лентой; возвращает True, если осталось ещё."""
+    if not message:
+        return False
+    if user_id is None:
+        user_id = getattr(message.from_user, "id", None)
+    if user_id is None:
+        logging.warning("render_whats_new: no user_id")
+        return False
+    user_id = int(user_id)
+    try:
+        async with update_db(user_id) as db:
+            user = await db.user()
+            denied = _user_denied_text(user)
+            if denied is None:
+                seen = await db.session.scalar(select(User.feed_seen_cursor).where(User.id == user_id))
+                page = await _whats_new_page(db.session, user.user_type, decode_feed_cursor(seen) if seen else None)
+    except SQLAlchemyError as e:
+        logging.exception("Database error while loading what's new: %s", e)
+        await message.answer("Не удалось получить данные. Попробуйте позже.")
+        return False
+    if denied is not None:
+        await message.answer(denied)
+        return False
+    if not page:
+        await message.answer("🆕 <b>Что нового</b>\nНовых публикаций нет — вы всё посмотрели.", parse_mode="HTML")
+        return False
+    has_more = len(page) > PAGE_SIZE
+    page = page[:PAGE_SIZE]
+    await _send_content_page(message, [item for _, item in page], header=None if more else "🆕 <b>Что нового</b>")
+    try:
+        await _mark_whats_new_seen(user_id, seen, page[-1][0])
+    except SQLAlchemyError as e:
+        # Карточки уже у пользователя — в худшем случае покажутся ещё раз
+        logging.warning("Failed to save what's new position for %s: %s", user_id, e)
+    if has_more:
+        await message.answer("Загрузить следующую порцию:", reply_markup=_whats_new_more_keyboard())
+    return has_more
@@ -0,0 +1,205 @@
+"""
+Пул прокси до api.telegram.org (TELEGRAM_PROXY может содержать несколько адресов через запятую).
+Для каждого прокси ведётся EWMA задержки и счётчик ошибок подряд; запросы распределяются
+по наименьшей задержке (с учётом запросов в полёте) или по кругу. После N ошибок подряд прокси
+исключается на время, фоновая проверка здоровья возвращает его в пул при успешной пробе.
+Общий для бота (aiogram-сессия) и админки (httpx-транспорт).
+"""
+import asyncio
+import itertools
+import logging
+import os
+import re
+import time
+from collections.abc import Awaitable, Callable
+from urllib.parse import urlparse
+
+from prometheus_client import Gauge
+
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+PROXY_LATENCY = Gauge("telegram_proxy_latency_seconds", "EWMA latency of Telegram API requests via proxy", ["proxy"])
+PROXY_UP = Gauge("telegram_proxy_up", "Proxy is in the pool (1) or ejected (0)", ["proxy"])
+
+STRATEGY_LEAST_LATENCY = "least_latency"
+STRATEGY_ROUND_ROBIN = "round_robin"
+
+# Адрес для пробы: достаточно, что прокси довёз запрос до Telegram и вернул любой HTTP-ответ.
+PROBE_URL = "https://api.telegram.org/"
+
+
+def redact_proxy_url(url: str) -> str:
+    """Адрес прокси без логина/пароля — для логов и меток метрик."""
+    try:
+        u = urlparse(url)
+        host = u.hostname or ""
+        port = f":{u.port}" if u.port else ""
+        if u.username is not None:
+            return f"{u.scheme}://***@{host}{port}{u.path or ''}"
+        if host:
+            return f"{u.scheme}://{host}{port}"
+    except Exception:
+        pass
+    return "***"
+
+
+def parse_proxy_list(raw: str | None) -> list[str]:
+    """TELEGRAM_PROXY: один адрес или список через запятую / пробел / перевод строки."""
+    if not raw:
+        return []
+    seen: list[str] = []
+    for item in re.split(r"[,\s]+", raw):
+        item = item.strip()
+        if item and item not in seen:
+            seen.append(item)
+    return seen
+
+
+def telegram_proxy_urls() -> list[str]:
+    """Прокси для Telegram: TELEGRAM_PROXY, иначе HTTPS_PROXY / HTTP_PROXY из окружения."""
+    urls = parse_proxy_list(get_settings().telegram_proxy)
+    if urls:
+        return urls
+    for key in ("HTTPS_PROXY", "https_proxy", "HTTP_PROXY", "http_proxy"):
+        v = os.environ.get(key)
+        if v and v.strip():
+            return [v.strip()]
+    return []
+
+
+class _ProxyState:
+    __slots__ = ("url", "label", "latency", "failures", "ejected_until", "in_flight")
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.label = redact_proxy_url(url)
+        self.latency: float | None = None
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.in_flight = 0
+
+
+class ProxyPool:
+    def __init__(
+        self,
+        urls: list[str],
+        *,
+        strategy: str = STRATEGY_LEAST_LATENCY,
+        eject_failures: int = 3,
+        eject_seconds: float = 60.0,
+        ewma_alpha: float = 0.3,
+    ) -> None:
+        if not urls:
+            raise ValueError("ProxyPool requires at least one proxy")
+        self._proxies = [_ProxyState(u) for u in urls]
+        self._by_url = {p.url: p for p in self._proxies}
+        self._strategy = strategy if strategy in (STRATEGY_LEAST_LATENCY, STRATEGY_ROUND_ROBIN) else STRATEGY_LEAST_LATENCY
+        self._eject_failures = max(1, eject_failures)
+        self._eject_seconds = eject_seconds
+        self._alpha = min(max(ewma_alpha, 0.01), 1.0)
+        self._rr = itertools.cycle(range(len(self._proxies)))
+        for p in self._proxies:
+            PROXY_UP.labels(proxy=p.label).set(1)
+
+    @property
+    def urls(self) -> list[str]:
+        return [p.url for p in self._proxies]
+
+    def available(self) -> list[str]:
+        now = time.monotonic()
+        return [p.url for p in self._proxies if p.ejected_until <= now]
+
+    def latency(self, url: str) -> float | None:
+        return self._by_url[url].latency
+
+    def pick(self) -> str:
+        """Выбрать прокси для запроса. Если исключены все — тот, что вернётся в пул раньше остальных."""
+        now = time.monotonic()
+        alive = [p for p in self._proxies if p.ejected_until <= now]
+        if not alive:
+            return min(self._proxies, key=lambda p: p.ejected_until).url
+        if self._strategy == STRATEGY_ROUND_ROBIN:
+            for _ in range(len(self._proxies)):
+                p = self._proxies[next(self._rr)]
+                if p.ejected_until <= now:
+                    return p.url
+        # Ещё не измеренные прокси пробуем первыми, дальше — минимум ожидаемого времени с учётом очереди
+        return min(alive, key=lambda p: ((p.latency or 0.0) * (p.in_flight + 1), p.in_flight)).url
+
+    def begin(self, url: str) -> None:
+        self._by_url[url].in_flight += 1
+
+    def end(self, url: str) -> None:
+        p = self._by_url[url]
+        p.in_flight = max(0, p.in_flight - 1)
+
+    def record_success(self, url: str, latency: float | None = None) -> None:
+        p = self._by_url[url]
+        p.failures = 0
+        if latency is not None:
+            p.latency = latency if p.latency is None else self._alpha * latency + (1 - self._alpha) * p.latency
+            PROXY_LATENCY.labels(proxy=p.label).set(p.latency)
+        if p.ejected_until:
+            p.ejected_until = 0.0
+            PROXY_UP.labels(proxy=p.label).set(1)
+            logger.info("Telegram proxy %s returned to the pool", p.label)
+
+    def record_failure(self, url: str) -> None:
+        p = self._by_url[url]
+        p.failures += 1
+        if p.failures >= self._eject_failures and p.ejected_until <= time.monotonic():
+            p.ejected_until = time.monotonic() + self._eject_seconds
+            PROXY_UP.labels(proxy=p.label).set(0)
+            logger.warning("Telegram proxy %s ejected after %s consecutive failures", p.label, p.failures)
+
+    async def check(self, probe: Callable[[str], Awaitable[None]]) -> None:
+        """Проверить все прокси: probe(url) должен завершиться без исключения, если прокси жив."""
+
+        async def _one(url: str) -> None:
+            start = time.monotonic()
+            try:
+                await probe(url)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug("Telegram proxy probe failed %s: %s", redact_proxy_url(url), e)
+                self.record_failure(url)
+            else:
+                self.record_success(url, time.monotonic() - start)
+
+        await asyncio.gather(*(_one(p.url) for p in self._proxies))
+
+    async def run_health_checks(self, probe: Callable[[str], Awaitable[None]], interval: float) -> None:
+        """Фоновый цикл проверки здоровья (запускается как asyncio-задача)."""
+        while True:
+            try:
+                await self.check(probe)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Telegram proxy health check error: %s", e)
+            await asyncio.sleep(interval)
+
+
+_pool: ProxyPool | None = None
+_pool_urls: list[str] | None = None
+
+
+def get_proxy_pool() -> ProxyPool | None:
+    """Пул на процесс, если прокси больше одного; с одним прокси клиенты настраиваются как раньше."""
+    global _pool, _pool_urls
+    urls = telegram_proxy_urls()
+    if len(urls) < 2:
+        return None
+    if _pool is None or _pool_urls != urls:
+        st = get_settings()
+        _pool = ProxyPool(
+            urls,
+            strategy=st.telegram_proxy_strategy,
+            eject_failures=st.telegram_proxy_eject_failures,
+            eject_seconds=float(st.telegram_proxy_eject_seconds),
+        )
+        _pool_urls = urls
+    return _pool
@@ -0,0 +1,46 @@
+"""
+Версии кэшей бота: строки system_settings с ключом cache_version:<имя>.
+Админ API меняет версию в той же транзакции, что и данные; бот периодически читает версии
+и сбрасывает свои in-process кэши, если версия изменилась. Правки профиля в самом боте версию не меняют:
+они ставят users.profile_updated_at, и процессы бота сбрасывают кэш только этих пользователей.
+"""
+import time
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import SystemSetting, User
+
+CACHE_VERSION_PREFIX = "cache_version:"
+CONTENT_VERSION = f"{CACHE_VERSION_PREFIX}content"
+MANAGERS_VERSION = f"{CACHE_VERSION_PREFIX}managers"
+EVENTS_VERSION = f"{CACHE_VERSION_PREFIX}events"
+USERS_VERSION = f"{CACHE_VERSION_PREFIX}users"
+
+
+def is_cache_version_key(key: str) -> bool:
+    """Служебные ключи не показываются в настройках и не попадают в бэкап."""
+    return key.startswith(CACHE_VERSION_PREFIX)
+
+
+async def bump_cache_version(session: AsyncSession, key: str) -> None:
+    """Новая версия кэша; commit — за вызывающим (вместе с изменением данных)."""
+    value = str(time.time_ns())
+    row = await session.get(SystemSetting, key)
+    if row is None:
+        session.add(SystemSetting(key=key, value=value))
+    else:
+        row.value = value
+        session.add(row)
+
+
+async def read_cache_versions(session: AsyncSession, keys: list[str]) -> dict[str, str]:
+    rows = await session.execute(select(SystemSetting.key, SystemSetting.value).where(SystemSetting.key.in_(keys)))
+    return {key: value for key, value in rows.all()}
+
+
+async def read_changed_users(session: AsyncSession, since: datetime) -> dict[int, datetime]:
+    """Пользователи, чей профиль бот менял после since (индекс по users.profile_updated_at)."""
+    rows = await session.execute(select(User.id, User.profile_updated_at).where(User.profile_updated_at > since))
+    return {user_id: stamp for user_id, stamp in rows.all()}
@@ -0,0 +1,25 @@
+"""telegram_delivery_log: индекс (plan_id, success) для повтора неудачных отправок
+
+Revision ID: 0011_delivery_log_plan_success
+Revises: 0010_telegram_delivery_log
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+revision = "0011_delivery_log_plan_success"
+down_revision = "0010_telegram_delivery_log"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_telegram_delivery_log_plan_success",
+        "telegram_delivery_log",
+        ["plan_id", "success"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_telegram_delivery_log_plan_success", table_name="telegram_delivery_log")
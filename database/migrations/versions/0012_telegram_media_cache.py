@@ -0,0 +1,32 @@
+"""telegram_media_cache: file_id медиа, загруженного ботом
+
+Revision ID: 0012_telegram_media_cache
+Revises: 0011_delivery_log_plan_success
+Create Date: 2026-10-19
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0012_telegram_media_cache"
+down_revision = "0011_delivery_log_plan_success"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "telegram_media_cache",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("source_table", sa.String(length=50), nullable=False),
+        sa.Column("source_id", sa.Integer(), nullable=False),
+        sa.Column("image_url", sa.String(length=500), nullable=False),
+        sa.Column("kind", sa.String(length=20), nullable=False),
+        sa.Column("file_id", sa.String(length=255), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.UniqueConstraint("source_table", "source_id", name="uq_telegram_media_cache_source"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("telegram_media_cache")
@@ -0,0 +1,27 @@
+"""Составные индексы под keyset-пагинацию ленты бота
+
+Revision ID: 0013_feed_keyset_indexes
+Revises: 0012_telegram_media_cache
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+revision = "0013_feed_keyset_indexes"
+down_revision = "0012_telegram_media_cache"
+branch_labels = None
+depends_on = None
+
+_CONTENT_TABLES = ("promotions", "news", "deliveries")
+
+
+def upgrade() -> None:
+    for table in _CONTENT_TABLES:
+        op.create_index(f"ix_{table}_feed", table, ["is_active", "published_at", "created_at", "id"])
+    op.create_index("ix_events_feed", "events", ["is_active", "event_date", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_events_feed", table_name="events")
+    for table in _CONTENT_TABLES:
+        op.drop_index(f"ix_{table}_feed", table_name=table)
@@ -0,0 +1,30 @@
+"""bot_fsm_state: состояния FSM бота в БД
+
+Revision ID: 0014_bot_fsm_state
+Revises: 0013_feed_keyset_indexes
+Create Date: 2026-10-19
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0014_bot_fsm_state"
+down_revision = "0013_feed_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "bot_fsm_state",
+        sa.Column("key", sa.String(length=255), primary_key=True),
+        sa.Column("state", sa.String(length=255), nullable=True),
+        sa.Column("data", sa.Text(), nullable=False, server_default="{}"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_bot_fsm_state_updated_at", "bot_fsm_state", ["updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bot_fsm_state_updated_at", table_name="bot_fsm_state")
+    op.drop_table("bot_fsm_state")
@@ -0,0 +1,26 @@
+"""events.registered_count: счётчик записей вместо COUNT по event_registrations
+
+Revision ID: 0015_events_registered_count
+Revises: 0014_bot_fsm_state
+Create Date: 2026-10-19
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0015_events_registered_count"
+down_revision = "0014_bot_fsm_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("events", sa.Column("registered_count", sa.Integer(), nullable=False, server_default="0"))
+    op.execute(
+        "UPDATE events SET registered_count = "
+        "(SELECT COUNT(*) FROM event_registrations WHERE event_registrations.event_id = events.id)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("events", "registered_count")
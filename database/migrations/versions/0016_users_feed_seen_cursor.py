@@ -0,0 +1,22 @@
+"""users.feed_seen_cursor: позиция пользователя в ленте «Что нового»
+
+Revision ID: 0016_users_feed_seen_cursor
+Revises: 0015_events_registered_count
+Create Date: 2026-10-19
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0016_users_feed_seen_cursor"
+down_revision = "0015_events_registered_count"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("feed_seen_cursor", sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("users", "feed_seen_cursor")
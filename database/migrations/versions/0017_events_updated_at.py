@@ -0,0 +1,22 @@
+"""events.updated_at: время правки мероприятия (инкрементальное обновление поиска бота)
+
+Revision ID: 0017_events_updated_at
+Revises: 0016_users_feed_seen_cursor
+Create Date: 2026-10-19
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0017_events_updated_at"
+down_revision = "0016_users_feed_seen_cursor"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("events", sa.Column("updated_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("events", "updated_at")
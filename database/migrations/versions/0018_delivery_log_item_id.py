@@ -0,0 +1,22 @@
+"""telegram_delivery_log.item_id: пункт плана, к которому относится отправка (повтор неудачных по пунктам)
+
+Revision ID: 0018_delivery_log_item_id
+Revises: 0017_events_updated_at
+Create Date: 2026-10-19
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0018_delivery_log_item_id"
+down_revision = "0017_events_updated_at"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("telegram_delivery_log", sa.Column("item_id", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("telegram_delivery_log", "item_id")
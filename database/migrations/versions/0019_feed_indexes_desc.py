@@ -0,0 +1,32 @@
+"""Индексы ленты бота в порядке выдачи: published_at DESC NULLS LAST, created_at DESC, id DESC
+
+Возрастающие индексы 0013 Postgres для ленты не использует: обратный проход даёт DESC NULLS FIRST,
+а лента сортируется с NULLS LAST. На SQLite порядок столбцов в индексе не меняется.
+
+Revision ID: 0019_feed_indexes_desc
+Revises: 0018_delivery_log_item_id
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+revision = "0019_feed_indexes_desc"
+down_revision = "0018_delivery_log_item_id"
+branch_labels = None
+depends_on = None
+
+_CONTENT_TABLES = ("promotions", "news", "deliveries")
+_COLUMNS = ["is_active", "published_at", "created_at", "id"]
+_FEED_ORDER = {"published_at": "DESC NULLS LAST", "created_at": "DESC", "id": "DESC"}
+
+
+def upgrade() -> None:
+    for table in _CONTENT_TABLES:
+        op.drop_index(f"ix_{table}_feed", table_name=table)
+        op.create_index(f"ix_{table}_feed", table, _COLUMNS, postgresql_ops=_FEED_ORDER)
+
+
+def downgrade() -> None:
+    for table in _CONTENT_TABLES:
+        op.drop_index(f"ix_{table}_feed", table_name=table)
+        op.create_index(f"ix_{table}_feed", table, _COLUMNS)
@@ -0,0 +1,34 @@
+"""Пункты контент-плана на SQLite: AUTOINCREMENT, чтобы id удалённых пунктов не выдавались заново
+
+Правка плана пересоздаёт пункты, а журнал отправок ссылается на них по id. Без AUTOINCREMENT SQLite
+отдаёт новому пункту id только что удалённого, и неудачи старого пункта «переезжают» на новый.
+На Postgres id берутся из последовательности и не повторяются — миграция ничего не делает.
+
+Revision ID: 0020_content_plan_items_autoinc
+Revises: 0019_feed_indexes_desc
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+revision = "0020_content_plan_items_autoinc"
+down_revision = "0019_feed_indexes_desc"
+branch_labels = None
+depends_on = None
+
+
+def _recreate(autoincrement: bool) -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    with op.batch_alter_table(
+        "content_plan_items", recreate="always", table_kwargs={"sqlite_autoincrement": autoincrement}
+    ):
+        pass
+
+
+def upgrade() -> None:
+    _recreate(True)
+
+
+def downgrade() -> None:
+    _recreate(False)
@@ -0,0 +1,24 @@
+"""users.profile_updated_at: правки профиля в боте сбрасывают кэш только этого пользователя
+
+Revision ID: 0021_users_profile_updated_at
+Revises: 0020_content_plan_items_autoinc
+Create Date: 2026-10-19
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0021_users_profile_updated_at"
+down_revision = "0020_content_plan_items_autoinc"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("profile_updated_at", sa.DateTime(), nullable=True))
+    op.create_index("ix_users_profile_updated_at", "users", ["profile_updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_profile_updated_at", table_name="users")
+    op.drop_column("users", "profile_updated_at")
@@ -0,0 +1,31 @@
+"""Индексы ленты «Что нового»: (is_active, coalesce(published_at, created_at), id) в каждом разделе
+
+Лента сортируется по времени публикации с подстановкой created_at; индексы 0019 по (published_at,
+created_at) для такого seek не подходят.
+
+Revision ID: 0022_whats_new_indexes
+Revises: 0021_users_profile_updated_at
+Create Date: 2026-10-19
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0022_whats_new_indexes"
+down_revision = "0021_users_profile_updated_at"
+branch_labels = None
+depends_on = None
+
+_CONTENT_TABLES = ("promotions", "news", "deliveries")
+
+
+def upgrade() -> None:
+    for table in _CONTENT_TABLES:
+        op.create_index(
+            f"ix_{table}_whats_new", table, ["is_active", sa.text("coalesce(published_at, created_at)"), "id"]
+        )
+
+
+def downgrade() -> None:
+    for table in _CONTENT_TABLES:
+        op.drop_index(f"ix_{table}_whats_new", table_name=table)
@@ -9,11 +9,13 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     JSON,
     String,
     Text,
     UniqueConstraint,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -93,14 +95,34 @@ class User(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     last_activity: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     deleted_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # Последняя показанная карточка ленты «Что нового» (bot.cursors.encode_feed_cursor)
+    feed_seen_cursor: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # Когда бот менял профиль (регистрация, правка): по нему процессы бота сбрасывают кэш этого пользователя
+    profile_updated_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True, index=True)
 
     event_registrations: Mapped[list["EventRegistration"]] = relationship(
         "EventRegistration", back_populates="user", cascade="all, delete-orphan"
     )
 
 
+# Порядок ленты бота: published_at DESC NULLS LAST, created_at DESC, id DESC. В Postgres обратный проход
+# по возрастающему индексу даёт NULLS FIRST, поэтому индекс строится сразу в порядке ленты.
+# SQLite NULLS в индексе не поддерживает, а обратный проход возрастающего там и так ставит NULL в конец.
+FEED_INDEX_PG_OPS = {"published_at": "DESC NULLS LAST", "created_at": "DESC", "id": "DESC"}
+
+
+def whats_new_index(table: str) -> Index:
+    """Лента «Что нового» (bot.whats_new): seek внутри раздела по времени публикации с подстановкой created_at."""
+    return Index(f"ix_{table}_whats_new", "is_active", text("coalesce(published_at, created_at)"), "id")
+
+
 class Promotion(Base):
     __tablename__ = "promotions"
+    # Keyset-пагинация ленты бота: seek по (published_at, created_at, id)
+    __table_args__ = (
+        Index("ix_promotions_feed", "is_active", "published_at", "created_at", "id", postgresql_ops=FEED_INDEX_PG_OPS),
+        whats_new_index("promotions"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(255))
@@ -115,6 +137,11 @@ class Promotion(Base):
 
 class News(Base):
     __tablename__ = "news"
+    # Keyset-пагинация ленты бота: seek по (published_at, created_at, id)
+    __table_args__ = (
+        Index("ix_news_feed", "is_active", "published_at", "created_at", "id", postgresql_ops=FEED_INDEX_PG_OPS),
+        whats_new_index("news"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(255))
@@ -129,6 +156,7 @@ class News(Base):
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (Index("ix_events_feed", "is_active", "event_date", "id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(255))
@@ -139,7 +167,10 @@ class Event(Base):
     location: Mapped[str] = mapped_column(String(500), default="")
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     max_places: Mapped[int | None] = mapped_column(Integer, nullable=True)  # None = без лимита
+    # Число записей; меняется только атомарным UPDATE вместе со вставкой/удалением EventRegistration
+    registered_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
     registrations: Mapped[list["EventRegistration"]] = relationship(
         "EventRegistration", back_populates="event", cascade="all, delete-orphan"
@@ -191,6 +222,11 @@ class Manager(Base):
 
 class Delivery(Base):
     __tablename__ = "deliveries"
+    # Keyset-пагинация ленты бота: seek по (published_at, created_at, id)
+    __table_args__ = (
+        Index("ix_deliveries_feed", "is_active", "published_at", "created_at", "id", postgresql_ops=FEED_INDEX_PG_OPS),
+        whats_new_index("deliveries"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(255))
@@ -327,6 +363,8 @@ class ContentPlanItem(Base):
     """Одно сообщение в контент-плане (в плане может быть несколько с разными типами)."""
 
     __tablename__ = "content_plan_items"
+    # SQLite: id удалённых при правке плана пунктов не выдаются заново (журнал отправок ссылается на id)
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     plan_id: Mapped[int] = mapped_column(ForeignKey("content_plan.id", ondelete="CASCADE"))
@@ -344,13 +382,43 @@ class TelegramDeliveryLog(Base):
     """Журнал отправок сообщений в Telegram (бот и каналы)."""
 
     __tablename__ = "telegram_delivery_log"
+    __table_args__ = (Index("ix_telegram_delivery_log_plan_success", "plan_id", "success"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     plan_id: Mapped[int] = mapped_column(ForeignKey("content_plan.id", ondelete="CASCADE"))
     plan_title: Mapped[str] = mapped_column(String(255))  # для отображения
+    # Пункт плана (content_plan_items.id); None — сообщение из полей самого плана. Без FK: пункты
+    # пересоздаются при правке плана, а журнал — история
+    item_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
     channel_type: Mapped[str] = mapped_column(String(50))  # bot | telegram_channel
     target: Mapped[str] = mapped_column(String(255))  # user_id или @channel
     success: Mapped[bool] = mapped_column(Boolean)
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
     admin_id: Mapped[int | None] = mapped_column(ForeignKey("admin_users.id", ondelete="SET NULL"), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class TelegramMediaCache(Base):
+    """file_id медиа, уже загруженного ботом в Telegram (news/promotions/deliveries/events по image_url)."""
+
+    __tablename__ = "telegram_media_cache"
+    __table_args__ = (UniqueConstraint("source_table", "source_id", name="uq_telegram_media_cache_source"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    source_table: Mapped[str] = mapped_column(String(50))
+    source_id: Mapped[int] = mapped_column(Integer)
+    image_url: Mapped[str] = mapped_column(String(500))  # при смене URL запись неактуальна
+    kind: Mapped[str] = mapped_column(String(20))  # photo | video | document
+    file_id: Mapped[str] = mapped_column(String(255))
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class BotFsmState(Base):
+    """Состояние FSM бота (регистрация, редактирование профиля) — общее для всех процессов бота."""
+
+    __tablename__ = "bot_fsm_state"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    state: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    data: Mapped[str] = mapped_column(Text, default="{}")
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
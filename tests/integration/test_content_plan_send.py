@@ -1,7 +1,7 @@
 """
 Интеграционные тесты отправки контент-плана в бот и канал.
 
-ВНИМАНИЕ: вызовы к Telegram API здесь подменены моками (patch tg.send_text / tg.send_photo).
+ВНИМАНИЕ: вызовы к Telegram API здесь подменены моками (patch tg.send_template / tg.send_text / tg.send_photo).
 Сообщения в реальный бот и канал при запуске pytest НЕ отправляются — проверяется только логика.
 
 Чтобы сообщения реально пришли: запустите приложение (API + бот), в админке создайте контент-план
@@ -109,7 +109,18 @@ def test_content_plan_send_to_bot_and_channel_mocked(api_client):
         send_photo_calls.append({"chat_id": chat_id, "caption": caption, "photo_url": photo_url})
         return ({"ok": True}, None)
 
+    async def mock_send_template(template, chat_id, *, client=None):
+        # Рассылка идёт через заранее собранные шаблоны запросов (tg.compile_*)
+        if template.method == "sendMessage":
+            send_text_calls.append({"chat_id": chat_id, "text": template.fields["text"]})
+        else:
+            send_photo_calls.append(
+                {"chat_id": chat_id, "caption": template.fields.get("caption"), "photo_url": template.fields.get("photo")}
+            )
+        return ({"ok": True}, None)
+
     with (
+        patch("admin.api.content_plan_sender.tg.send_template", new_callable=AsyncMock, side_effect=mock_send_template),
         patch("admin.api.content_plan_sender.tg.send_text", new_callable=AsyncMock, side_effect=mock_send_text),
         patch("admin.api.content_plan_sender.tg.send_photo", new_callable=AsyncMock, side_effect=mock_send_photo),
     ):
@@ -133,3 +144,133 @@ def test_content_plan_send_to_bot_and_channel_mocked(api_client):
 
     client.delete(f"/api/content-plan/{plan_id}", headers=headers)
     client.delete(f"/api/users/{user_id}", headers=headers)
+
+
+def test_content_plan_retry_failed_resends_only_failed_targets(api_client):
+    """
+    Первая отправка падает (мок Telegram возвращает ошибку), повтор шлёт только неудачным получателям;
+    после успешного повтора повторять нечего.
+    """
+    client = api_client
+    headers = _login(client)
+
+    user_id = (int(time.time()) % 900000) + 200000
+    r_user = client.post(
+        "/api/users",
+        headers=headers,
+        json={
+            "id": user_id,
+            "username": f"retry_test_{user_id}",
+            "user_type": "retail",
+            "establishment": "Test Est",
+            "is_active": True,
+        },
+    )
+    if r_user.status_code in (400, 500):
+        pytest.skip(f"User create failed: {r_user.status_code} {r_user.text}")
+    assert r_user.status_code == 200, r_user.text
+    r_ch = client.post(
+        "/api/channels",
+        headers=headers,
+        json={"name": f"Бот (повтор {user_id})", "channel_type": "bot", "is_active": True},
+    )
+    assert r_ch.status_code == 200, r_ch.text
+    r_plan = client.post(
+        "/api/content-plan",
+        headers=headers,
+        json={
+            "title": f"Retry plan {user_id}",
+            "content_type": "custom",
+            "custom_title": "Повтор",
+            "custom_description": "Только неудачным.",
+            "channel_ids": [r_ch.json()["id"]],
+        },
+    )
+    assert r_plan.status_code == 200, r_plan.text
+    plan_id = r_plan.json()["id"]
+
+    calls: list = []
+    fail = True
+
+    async def mock_send_template(template, chat_id, *, client=None):
+        calls.append(chat_id)
+        return (None, "Forbidden: bot was blocked by the user") if fail else ({"ok": True}, None)
+
+    with patch("admin.api.content_plan_sender.tg.send_template", new_callable=AsyncMock, side_effect=mock_send_template):
+        r_send = client.post(f"/api/content-plan/{plan_id}/send", headers=headers)
+        assert r_send.status_code == 200, r_send.text
+        assert user_id in calls
+
+        calls.clear()
+        fail = False
+        r_retry = client.post(f"/api/content-plan/{plan_id}/retry-failed", headers=headers)
+        assert r_retry.status_code == 200, r_retry.text
+        assert user_id in calls
+        assert r_retry.json()["data"]["sent_bot"] >= 1
+
+        r_again = client.post(f"/api/content-plan/{plan_id}/retry-failed", headers=headers)
+        assert r_again.status_code == 400, r_again.text
+
+    client.delete(f"/api/content-plan/{plan_id}", headers=headers)
+    client.delete(f"/api/users/{user_id}", headers=headers)
+
+
+def test_content_plan_retry_failed_after_edit_conflicts(api_client):
+    """Неудачные отправки относятся к пунктам, удалённым правкой плана, — повтор отвечает 409, ничего не шлёт."""
+    client = api_client
+    headers = _login(client)
+
+    user_id = (int(time.time()) % 900000) + 300000
+    r_user = client.post(
+        "/api/users",
+        headers=headers,
+        json={
+            "id": user_id,
+            "username": f"retry_edit_{user_id}",
+            "user_type": "retail",
+            "establishment": "Test Est",
+            "is_active": True,
+        },
+    )
+    if r_user.status_code in (400, 500):
+        pytest.skip(f"User create failed: {r_user.status_code} {r_user.text}")
+    assert r_user.status_code == 200, r_user.text
+    r_ch = client.post(
+        "/api/channels",
+        headers=headers,
+        json={"name": f"Бот (правка {user_id})", "channel_type": "bot", "is_active": True},
+    )
+    assert r_ch.status_code == 200, r_ch.text
+    item = {"content_type": "custom", "custom_title": "Пункт", "custom_description": "Текст"}
+    r_plan = client.post(
+        "/api/content-plan",
+        headers=headers,
+        json={
+            "title": f"Retry edit plan {user_id}",
+            "content_type": "custom",
+            "channel_ids": [r_ch.json()["id"]],
+            "items": [item],
+        },
+    )
+    assert r_plan.status_code == 200, r_plan.text
+    plan_id = r_plan.json()["id"]
+
+    calls: list = []
+
+    async def mock_send_template(template, chat_id, *, client=None):
+        calls.append(chat_id)
+        return None, "Forbidden: bot was blocked by the user"
+
+    with patch("admin.api.content_plan_sender.tg.send_template", new_callable=AsyncMock, side_effect=mock_send_template):
+        r_send = client.post(f"/api/content-plan/{plan_id}/send", headers=headers)
+        assert r_send.status_code == 200, r_send.text
+        r_edit = client.put(f"/api/content-plan/{plan_id}", headers=headers, json={"items": [item]})
+        assert r_edit.status_code == 200, r_edit.text
+
+        calls.clear()
+        r_retry = client.post(f"/api/content-plan/{plan_id}/retry-failed", headers=headers)
+        assert r_retry.status_code == 409, r_retry.text
+        assert calls == []
+
+    client.delete(f"/api/content-plan/{plan_id}", headers=headers)
+    client.delete(f"/api/users/{user_id}", headers=headers)
@@ -0,0 +1,100 @@
+"""
+Микробенчмарк горячего пути бота: ORM-сущности (session.get(User) + select(model))
+против лёгких моделей чтения (bot.read_models). Меряет CPU на итерацию и аллокации.
+Запуск из корня репозитория: python tests/load/bench_bot_read_models.py [итераций]
+"""
+import asyncio
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from sqlalchemy import and_, or_, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
+
+from bot.read_models import content_columns, load_user_profile  # noqa: E402
+from database.base import Base  # noqa: E402
+from database.models import News, User, UserType  # noqa: E402
+
+PAGE = 6
+USERS = 500
+
+
+def _feed_query(columns):
+    return (
+        select(*columns)
+        .where(and_(News.is_active.is_(True), or_(News.user_type == UserType.RETAIL, News.user_type == UserType.ALL)))
+        .order_by(News.published_at.desc().nullslast(), News.created_at.desc(), News.id.desc())
+        .limit(PAGE + 1)
+    )
+
+
+async def orm_update(session, user_id: int) -> tuple:
+    user = await session.get(User, user_id)
+    rows = (await session.scalars(_feed_query([News]))).all()
+    return user.user_type, [(row.id, row.title, row.description, row.image_url) for row in rows]
+
+
+async def read_model_update(session, user_id: int) -> tuple:
+    user = await load_user_profile(session, user_id)
+    rows = (await session.execute(_feed_query(content_columns(News)))).all()
+    return user.user_type, [(row.id, row.title, row.description, row.image_url) for row in rows]
+
+
+async def _measure(factory, handler, iterations: int) -> tuple[float, float, int]:
+    # Как в боте: короткая сессия на апдейт
+    async def one(i: int) -> None:
+        async with factory() as session:
+            await handler(session, i % USERS + 1)
+
+    for i in range(50):
+        await one(i)
+    cpu = time.process_time()
+    for i in range(iterations):
+        await one(i)
+    cpu = time.process_time() - cpu
+    tracemalloc.start()
+    for i in range(200):
+        await one(i)
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    return cpu / iterations * 1e6, peak / 1024, blocks
+
+
+async def main(iterations: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    now = datetime.utcnow()
+    async with factory() as session:
+        session.add_all(
+            User(id=i, user_type=UserType.RETAIL, establishment=f"Заведение {i}") for i in range(1, USERS + 1)
+        )
+        session.add_all(
+            News(
+                title=f"Новинка {i}",
+                description="Описание " * 40,
+                image_url=f"https://cdn.example.com/news/{i}.jpg",
+                user_type=UserType.ALL,
+                is_active=True,
+                published_at=now - timedelta(minutes=i),
+            )
+            for i in range(200)
+        )
+        await session.commit()
+
+    print(f"{'path':<12}{'CPU µs/update':>15}{'peak KiB':>12}{'live blocks':>13}")
+    for name, handler in (("orm", orm_update), ("read_model", read_model_update)):
+        cpu_us, peak_kib, blocks = await _measure(factory, handler, iterations)
+        print(f"{name:<12}{cpu_us:>15.1f}{peak_kib:>12.1f}{blocks:>13}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,24 @@
+"""
+Общие фикстуры юнит-тестов: пустая БД SQLite в памяти со всеми таблицами (Base.metadata).
+Наполняют её сами тесты или фикстуры модулей поверх session_factory / session.
+"""
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from database.base import Base
+
+
+@pytest.fixture
+async def session_factory():
+    """Фабрика сессий к своей для каждого теста БД в памяти; движок — session_factory.kw["bind"]."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    await engine.dispose()
+
+
+@pytest.fixture
+async def session(session_factory):
+    async with session_factory() as s:
+        yield s
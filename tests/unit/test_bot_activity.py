@@ -0,0 +1,32 @@
+"""Юнит-тесты отложенной записи users.last_activity из бота."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from bot.middlewares.activity import ActivityTracker
+from database.models import User, UserType
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_latest_activity_in_one_batch(session_factory):
+    async with session_factory() as session:
+        session.add_all(
+            [
+                User(id=1, user_type=UserType.RETAIL, establishment="A"),
+                User(id=2, user_type=UserType.HORECA, establishment="B"),
+            ]
+        )
+        await session.commit()
+    tracker = ActivityTracker(session_factory)
+    first = datetime(2026, 10, 19, 8, 0, 0)
+    tracker.touch(1, first)
+    tracker.touch(1, first + timedelta(minutes=5))
+    tracker.touch(2, first)
+    # Незарегистрированный пользователь (/start до регистрации) — строки нет, пачка не падает
+    tracker.touch(99, first)
+    assert await tracker.flush() == 3
+    assert tracker.pending == 0
+    async with session_factory() as session:
+        assert (await session.get(User, 1)).last_activity == first + timedelta(minutes=5)
+        assert (await session.get(User, 2)).last_activity == first
+    assert await tracker.flush() == 0
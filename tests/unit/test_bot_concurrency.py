@@ -0,0 +1,59 @@
+"""Юнит-тесты ограничения параллельной обработки апдейтов бота."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from aiogram.types import Chat, Message, Update
+
+from bot.middlewares.concurrency import BOT_STALE_UPDATES, BOT_UPDATES_QUEUED, ConcurrencyMiddleware
+
+
+def _data(chat_id: int) -> dict:
+    return {"event_chat": SimpleNamespace(id=chat_id), "event_from_user": SimpleNamespace(id=chat_id)}
+
+
+def _message_update(sent_at: datetime) -> Update:
+    message = Message(message_id=1, date=sent_at, chat=Chat(id=1, type="private"), text="hi")
+    return Update(update_id=1, message=message)
+
+
+@pytest.mark.asyncio
+async def test_global_cap_and_per_chat_order():
+    mw = ConcurrencyMiddleware(max_concurrent=2, lock_shards=16)
+    running = 0
+    peak = 0
+    order: list[tuple[int, int]] = []
+
+    async def handler(event, data):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        order.append((data["event_chat"].id, event))
+        running -= 1
+
+    tasks = [asyncio.create_task(mw(handler, n, _data(chat))) for n in range(4) for chat in (1, 2, 3)]
+    await asyncio.sleep(0)
+    assert BOT_UPDATES_QUEUED._value.get() > 0
+    await asyncio.gather(*tasks)
+    assert peak == 2
+    # Апдейты одного чата — в порядке поступления
+    for chat in (1, 2, 3):
+        assert [n for c, n in order if c == chat] == [0, 1, 2, 3]
+    assert BOT_UPDATES_QUEUED._value.get() == 0
+
+
+@pytest.mark.asyncio
+async def test_stale_updates_dropped():
+    mw = ConcurrencyMiddleware(max_concurrent=1, max_age_seconds=60)
+    before = BOT_STALE_UPDATES._value.get()
+
+    async def handler(event, data):
+        return "handled"
+
+    now = datetime.now(timezone.utc)
+    assert await mw(handler, _message_update(now - timedelta(seconds=5)), _data(1)) == "handled"
+    # Пришло после простоя бота
+    assert await mw(handler, _message_update(now - timedelta(minutes=10)), _data(1)) is None
+    assert BOT_STALE_UPDATES._value.get() == before + 1
@@ -0,0 +1,87 @@
+"""Юнит-тесты сессии БД на апдейт (ленивое открытие, общий профиль, освобождение перед отправкой)."""
+import pytest
+from aiogram.types import User as TgUser
+from sqlalchemy import update
+
+from bot.middlewares.db_session import DbSessionMiddleware, ReleaseDbBeforeSend, get_user_establishment, update_db
+from database.models import User, UserType
+
+
+@pytest.fixture
+async def factory(session_factory):
+    async with session_factory() as session:
+        session.add(User(id=1, user_type=UserType.RETAIL, establishment="Дым"))
+        await session.commit()
+    opened = []
+
+    def counting(**kw):
+        session = session_factory(**kw)
+        opened.append(session)
+        return session
+
+    counting.opened = opened
+    return counting
+
+
+async def _dispatch(factory, handler):
+    data = {"event_from_user": TgUser(id=1, is_bot=False, first_name="u")}
+    return await DbSessionMiddleware(factory)(handler, object(), data)
+
+
+@pytest.mark.asyncio
+async def test_one_lazy_session_and_cached_profile_per_update(factory):
+    async def handler(event, data):
+        db = data["db"]
+        assert not db.is_open
+        assert await get_user_establishment(1) == "Дым"
+        assert not db.is_open
+        # Профиль уже в кэше апдейта — сессия не открывается
+        assert (await db.user()).user_type == UserType.RETAIL
+        assert await get_user_establishment(1) == "Дым"
+        assert len(factory.opened) == 1
+        async with update_db(1) as outer:
+            assert outer is db
+            session = outer.session
+            async with update_db(1) as inner:
+                assert inner.session is session
+            # Вложенный блок сессию не закрыл
+            assert db.is_open
+        assert not db.is_open
+        return len(factory.opened)
+
+    assert await _dispatch(factory, handler) == 2
+
+
+@pytest.mark.asyncio
+async def test_update_without_db_opens_nothing(factory):
+    async def handler(event, data):
+        return "ok"
+
+    assert await _dispatch(factory, handler) == "ok"
+    assert factory.opened == []
+
+
+@pytest.mark.asyncio
+async def test_clean_session_released_before_send(factory):
+    sent = []
+
+    async def make_request(bot, method):
+        sent.append(method)
+        return True
+
+    async def handler(event, data):
+        db = data["db"]
+        await db.user()
+        assert db.session.in_transaction()
+        await ReleaseDbBeforeSend()(make_request, None, "sendMessage")
+        assert not db.session.in_transaction()
+        # Незафиксированное изменение не откатывается ради отправки
+        await db.session.execute(update(User).where(User.id == 1).values(position="бармен"))
+        await ReleaseDbBeforeSend()(make_request, None, "sendMessage")
+        assert db.session.in_transaction()
+        await db.session.commit()
+        await ReleaseDbBeforeSend()(make_request, None, "sendMessage")
+        assert not db.session.in_transaction()
+
+    await _dispatch(factory, handler)
+    assert len(sent) == 3
@@ -0,0 +1,58 @@
+"""Юнит-тесты выборки мероприятий для бота (одним запросом с числом записей)."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from bot.handlers.content import release_event_place, reserve_event_place
+from bot.utils import _events_page
+from database.models import Event, EventRegistration, User, UserType
+
+
+@pytest.mark.asyncio
+async def test_events_page_counts_registrations_and_own_flag(session):
+    soon = datetime.utcnow() + timedelta(days=1)
+    session.add_all(
+        [
+            User(id=1, user_type=UserType.RETAIL, establishment="A"),
+            User(id=2, user_type=UserType.RETAIL, establishment="B"),
+            Event(
+                id=10, title="Дегустация", user_type=UserType.ALL, event_date=soon, max_places=5, registered_count=2
+            ),
+            Event(
+                id=11, title="Тренинг", user_type=UserType.RETAIL, event_date=soon + timedelta(hours=1), registered_count=1
+            ),
+            Event(id=12, title="HoReCa", user_type=UserType.HORECA, event_date=soon),
+            Event(id=13, title="Прошло", user_type=UserType.ALL, event_date=soon - timedelta(days=7)),
+        ]
+    )
+    await session.flush()
+    session.add_all(
+        [
+            EventRegistration(event_id=10, user_id=1),
+            EventRegistration(event_id=10, user_id=2),
+            EventRegistration(event_id=11, user_id=2),
+        ]
+    )
+    await session.commit()
+
+    page = await _events_page(session, 1, UserType.RETAIL, 0)
+    assert [(e.id, count, mine) for e, count, mine in page] == [(10, 2, True), (11, 1, False)]
+    assert await _events_page(session, 1, UserType.RETAIL, 2) == []
+
+
+@pytest.mark.asyncio
+async def test_last_place_is_taken_once(session):
+    session.add(Event(id=20, title="Мастер-класс", user_type=UserType.ALL, event_date=datetime.utcnow(), max_places=1))
+    await session.commit()
+    assert await reserve_event_place(session, 20) is True
+    assert await reserve_event_place(session, 20) is False
+    await release_event_place(session, 20)
+    await release_event_place(session, 20)
+    await session.commit()
+    event = await session.get(Event, 20)
+    await session.refresh(event)
+    assert event.registered_count == 0
+    # Без лимита мест — всегда успешно
+    session.add(Event(id=21, title="Открытая встреча", user_type=UserType.ALL, event_date=datetime.utcnow()))
+    await session.commit()
+    assert await reserve_event_place(session, 21) is True
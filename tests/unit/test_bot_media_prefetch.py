@@ -0,0 +1,114 @@
+"""Юнит-тесты параллельной подготовки медиа страницы бота."""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import bot.utils as bot_utils
+from bot.feed_cache import FeedItem
+
+
+class FakeMessage:
+    def __init__(self) -> None:
+        self.sent: list[str] = []
+
+    async def answer(self, text: str, **kwargs) -> SimpleNamespace:
+        self.sent.append(text)
+        return SimpleNamespace(photo=None, video=None, animation=None, document=None)
+
+    async def answer_photo(self, photo, caption: str, **kwargs) -> SimpleNamespace:
+        await asyncio.sleep(0.01)
+        self.sent.append(caption)
+        return SimpleNamespace(photo=None, video=None, animation=None, document=None)
+
+
+@pytest.mark.asyncio
+async def test_page_media_fetched_concurrently_in_order(monkeypatch):
+    in_flight = 0
+    peak = 0
+
+    async def slow_fetch(url: str):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # Файлы «готовы» в обратном порядке — сообщения всё равно идут по порядку карточек
+        await asyncio.sleep(0.05 * (6 - int(url.rsplit("/", 1)[-1].split(".")[0])))
+        in_flight -= 1
+        return b"img", "image/jpeg"
+
+    monkeypatch.setattr(bot_utils, "_fetch_media_bytes", slow_fetch)
+    monkeypatch.setattr(bot_utils.settings, "bot_media_prefetch_concurrency", 3)
+    # Пустая таблица — без кэша file_id (он ходит в БД)
+    items = [FeedItem("", i, f"http://media.local/{i}.jpg", f"card {i}") for i in range(1, 6)]
+    message = FakeMessage()
+    start = time.monotonic()
+    await bot_utils._send_content_page(message, items, header="<b>Акции</b>")
+    elapsed = time.monotonic() - start
+    assert message.sent == ["<b>Акции</b>", "card 1", "card 2", "card 3", "card 4", "card 5"]
+    assert peak == 3
+    # Последовательно было бы 0.75 с только на скачивание
+    assert elapsed < 0.6
+
+
+class AlbumMessage(FakeMessage):
+    async def answer_media_group(self, media, **kwargs) -> list[SimpleNamespace]:
+        # Альбом — списком подписей, в общем порядке сообщений
+        self.sent.append([m.caption for m in media])
+        return [SimpleNamespace(photo=None, video=None, animation=None, document=None) for _ in media]
+
+    async def answer_video(self, video, caption: str, **kwargs) -> SimpleNamespace:
+        self.sent.append(caption)
+        return SimpleNamespace(photo=None, video=None, animation=None, document=None)
+
+
+@pytest.mark.asyncio
+async def test_album_mode_packs_consecutive_photos_in_page_order(monkeypatch):
+    async def fetch(url: str):
+        return b"data", "image/jpeg" if url.endswith(".jpg") else "video/mp4"
+
+    monkeypatch.setattr(bot_utils, "_fetch_media_bytes", fetch)
+    monkeypatch.setattr(bot_utils.settings, "bot_content_page_mode", "album")
+    long_text = "<b>Длинная</b>\n\n" + "x" * 1100
+    items = [
+        FeedItem("", 1, "http://media.local/1.jpg", "<b>Первая</b>"),
+        FeedItem("", 2, "http://media.local/2.jpg", long_text),
+        FeedItem("", 3, "http://media.local/3.mp4", "<b>Видео</b>"),
+        FeedItem("", 4, None, "<b>Без медиа</b>"),
+        FeedItem("", 5, "http://media.local/5.jpg", "<b>Одно фото</b>"),
+        FeedItem("", 6, "http://media.local/6.mp4", "<b>Ещё видео</b>"),
+        FeedItem("", 7, "http://media.local/7.jpg", "<b>Седьмая</b>"),
+        FeedItem("", 8, "http://media.local/8.jpg", "<b>Последняя</b>"),
+    ]
+    message = AlbumMessage()
+    await bot_utils._send_content_page(message, items, header="<b>Акции</b>")
+    # Порядок страницы сохранён: последней уходит последняя карточка (с неё продолжает «Показать ещё»).
+    # Заголовок страницы — в подписи первого фото, длинный текст — сразу после своего альбома
+    assert message.sent == [
+        ["<b>Акции</b>\n\n<b>Первая</b>", "<b>Длинная</b>"],
+        long_text,
+        "<b>Видео</b>",
+        "<b>Без медиа</b>",
+        "<b>Одно фото</b>",
+        "<b>Ещё видео</b>",
+        ["<b>Седьмая</b>", "<b>Последняя</b>"],
+    ]
+
+
+class FailingAlbumMessage(AlbumMessage):
+    async def answer_media_group(self, media, **kwargs) -> list[SimpleNamespace]:
+        raise RuntimeError("album rejected")
+
+
+@pytest.mark.asyncio
+async def test_album_failure_keeps_page_header(monkeypatch):
+    async def fetch(url: str):
+        return b"data", "image/jpeg"
+
+    monkeypatch.setattr(bot_utils, "_fetch_media_bytes", fetch)
+    monkeypatch.setattr(bot_utils.settings, "bot_content_page_mode", "album")
+    items = [FeedItem("", i, f"http://media.local/{i}.jpg", f"<b>card {i}</b>") for i in (1, 2)]
+    message = FailingAlbumMessage()
+    await bot_utils._send_content_page(message, items, header="<b>Акции</b>")
+    # Заголовок был в подписи альбома — при отправке карточками он идёт первым сообщением
+    assert message.sent == ["<b>Акции</b>", "<b>card 1</b>", "<b>card 2</b>"]
@@ -0,0 +1,61 @@
+"""Юнит-тесты метрик бота (middleware и время в БД на хендлер)."""
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message, Update
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+
+from bot.middlewares.metrics import instrument_engine, setup_metrics
+
+
+def _sample(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def _update(text_value: str) -> Update:
+    return Update.model_validate(
+        {
+            "update_id": 1,
+            "message": {
+                "message_id": 1,
+                "date": 1760000000,
+                "chat": {"id": 7, "type": "private"},
+                "from": {"id": 7, "is_bot": False, "first_name": "T"},
+                "text": text_value,
+            },
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_handler_latency_db_time_and_errors_recorded(session_factory):
+    engine = session_factory.kw["bind"]
+    instrument_engine(engine)
+    router = Router()
+
+    @router.message()
+    async def metrics_probe_handler(message: Message) -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("select 1"))
+        if message.text == "boom":
+            raise ValueError("boom")
+
+    dp = Dispatcher()
+    setup_metrics(dp)
+    dp.include_router(router)
+    bot = Bot(token="123456:TEST_TOKEN")
+    labels = {"handler": "metrics_probe_handler"}
+    updates_before = _sample("bot_updates_total", {"update_type": "message"})
+    calls_before = _sample("bot_handler_duration_seconds_count", labels)
+    db_before = _sample("bot_handler_db_seconds_sum", labels)
+
+    await dp.feed_update(bot, _update("hi"))
+    with pytest.raises(ValueError):
+        await dp.feed_update(bot, _update("boom"))
+
+    assert _sample("bot_updates_total", {"update_type": "message"}) == updates_before + 2
+    assert _sample("bot_handler_duration_seconds_count", labels) == calls_before + 2
+    assert _sample("bot_handler_db_seconds_sum", labels) > db_before
+    assert _sample("bot_handler_errors_total", {**labels, "error": "ValueError"}) >= 1
+    assert _sample("bot_updates_in_flight", {}) == 0
+    await bot.session.close()
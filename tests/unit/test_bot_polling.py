@@ -0,0 +1,62 @@
+"""Юнит-тесты middleware long polling бота (размер пачки и метрики getUpdates)."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from aiogram.methods import GetUpdates, SendMessage
+from aiogram.types import Chat, Message, Update
+
+from bot.main import _create_dispatcher
+from bot.middlewares.polling import (
+    BOT_GET_UPDATES_BATCH,
+    BOT_GET_UPDATES_ERRORS,
+    BOT_UPDATE_DELIVERY_LAG,
+    PollingMiddleware,
+)
+
+
+def _update(update_id: int, sent_at: datetime) -> Update:
+    message = Message(message_id=update_id, date=sent_at, chat=Chat(id=1, type="private"), text="hi")
+    return Update(update_id=update_id, message=message)
+
+
+def _count(histogram) -> float:
+    return next(s.value for s in histogram.collect()[0].samples if s.name.endswith("_count"))
+
+
+@pytest.mark.asyncio
+async def test_get_updates_limited_and_measured():
+    mw = PollingMiddleware(limit=500)
+    sent = datetime.now(timezone.utc) - timedelta(seconds=2)
+    seen = []
+
+    async def make_request(bot, method):
+        seen.append(method)
+        if isinstance(method, GetUpdates):
+            return [_update(1, sent), _update(2, sent)]
+        return True
+
+    batches, lags = _count(BOT_GET_UPDATES_BATCH), _count(BOT_UPDATE_DELIVERY_LAG)
+    method = GetUpdates(timeout=30)
+    assert len(await mw(make_request, None, method)) == 2
+    assert method.limit == 100
+    assert _count(BOT_GET_UPDATES_BATCH) == batches + 1
+    assert _count(BOT_UPDATE_DELIVERY_LAG) == lags + 2
+
+    other = SendMessage(chat_id=1, text="x")
+    assert await mw(make_request, None, other) is True
+    assert _count(BOT_GET_UPDATES_BATCH) == batches + 1
+
+
+@pytest.mark.asyncio
+async def test_get_updates_errors_counted():
+    async def make_request(bot, method):
+        raise TimeoutError
+
+    before = BOT_GET_UPDATES_ERRORS.labels(error="TimeoutError")._value.get()
+    with pytest.raises(TimeoutError):
+        await PollingMiddleware()(make_request, None, GetUpdates())
+    assert BOT_GET_UPDATES_ERRORS.labels(error="TimeoutError")._value.get() == before + 1
+
+
+def test_allowed_updates_follow_registered_handlers():
+    assert sorted(_create_dispatcher().resolve_used_update_types()) == ["callback_query", "inline_query", "message"]
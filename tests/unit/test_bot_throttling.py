@@ -0,0 +1,63 @@
+"""Юнит-тесты анти-флуд middleware бота."""
+from types import SimpleNamespace
+
+import pytest
+
+from bot.middlewares.throttling import THROTTLED_UPDATES, ThrottlingMiddleware
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def _handler(event, data):
+    return "handled"
+
+
+def _data(user_id: int) -> dict:
+    return {"event_from_user": SimpleNamespace(id=user_id)}
+
+
+def _throttled(scope: str) -> float:
+    return THROTTLED_UPDATES.labels(scope=scope)._value.get()
+
+
+@pytest.mark.asyncio
+async def test_user_bucket_allows_burst_then_refills():
+    clock = Clock()
+    mw = ThrottlingMiddleware(rate=1, burst=2, global_rate=100, global_burst=100, clock=clock)
+    before = _throttled("user")
+    results = [await mw(_handler, object(), _data(1)) for _ in range(3)]
+    assert results == ["handled", "handled", None]
+    # Другой пользователь не страдает от чужого флуда
+    assert await mw(_handler, object(), _data(2)) == "handled"
+    clock.now = 1.0
+    assert await mw(_handler, object(), _data(1)) == "handled"
+    assert _throttled("user") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_global_cap_and_lru_eviction():
+    clock = Clock()
+    mw = ThrottlingMiddleware(rate=1, burst=1, global_rate=0.01, global_burst=2, max_users=2, clock=clock)
+    before = _throttled("global")
+    assert [await mw(_handler, object(), _data(uid)) for uid in (1, 2, 3)] == ["handled", "handled", None]
+    assert _throttled("global") == before + 1
+    assert list(mw._users) == [2, 3]
+    # Апдейты без пользователя (например, из канала) не ограничиваются
+    assert await mw(_handler, object(), {}) == "handled"
+
+
+@pytest.mark.asyncio
+async def test_global_rejection_keeps_user_token():
+    clock = Clock()
+    mw = ThrottlingMiddleware(rate=0.01, burst=1, global_rate=1, global_burst=1, clock=clock)
+    assert await mw(_handler, object(), _data(1)) == "handled"
+    # Общий лимит исчерпан — апдейт пользователя 2 отброшен, но его единственный токен цел
+    assert await mw(_handler, object(), _data(2)) is None
+    clock.now = 1.0
+    assert await mw(_handler, object(), _data(2)) == "handled"
@@ -0,0 +1,66 @@
+"""Юнит-тесты webhook-режима бота: приложение aiohttp с проверкой секрета."""
+import asyncio
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message
+from aiohttp.test_utils import TestClient, TestServer
+
+from bot.webhook import build_webhook_app
+
+SECRET = "s3cr3t_token"
+
+
+def _update(update_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 1760000000,
+            "chat": {"id": 42, "type": "private"},
+            "from": {"id": 42, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    }
+
+
+@pytest.fixture
+async def client():
+    received: list[str] = []
+    router = Router()
+
+    @router.message()
+    async def on_message(message: Message) -> None:
+        received.append(message.text)
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    bot = Bot(token="123456:TEST_TOKEN")
+    app = build_webhook_app(dp, bot, path="/tg/webhook", secret=SECRET)
+    async with TestClient(TestServer(app)) as test_client:
+        test_client.received = received
+        yield test_client
+
+
+@pytest.mark.asyncio
+async def test_webhook_dispatches_update_with_valid_secret(client):
+    resp = await client.post(
+        "/tg/webhook", json=_update(1, "hello"), headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}
+    )
+    assert resp.status == 200
+    # Апдейт обрабатывается в фоне — ждём завершения задач диспетчера
+    for _ in range(50):
+        if client.received:
+            break
+        await asyncio.sleep(0.01)
+    assert client.received == ["hello"]
+
+
+@pytest.mark.asyncio
+async def test_webhook_rejects_wrong_secret(client):
+    resp = await client.post("/tg/webhook", json=_update(2, "x"), headers={"X-Telegram-Bot-Api-Secret-Token": "nope"})
+    assert resp.status == 401
+    resp = await client.post("/tg/webhook", json=_update(3, "x"))
+    assert resp.status == 401
+    assert client.received == []
+    assert (await client.get("/healthz")).status == 200
@@ -0,0 +1,81 @@
+"""Юнит-тесты повтора неудачных отправок контент-плана по парам (получатель, пункт плана)."""
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import delete, select
+
+from admin.api.content_plan_sender import failed_deliveries, retryable_deliveries, send_plan_to_telegram
+from database.models import (
+    ContentPlan,
+    ContentPlanChannel,
+    ContentPlanContentType,
+    ContentPlanItem,
+    DistributionChannel,
+    DistributionChannelType,
+    TelegramDeliveryLog,
+    User,
+    UserType,
+)
+
+
+@pytest.fixture
+async def db(session):
+    session.add_all([User(id=uid, user_type=UserType.RETAIL, establishment="A") for uid in (1, 2)])
+    session.add(DistributionChannel(id=1, name="Бот", channel_type=DistributionChannelType.BOT))
+    session.add(ContentPlan(id=1, title="План", content_type=ContentPlanContentType.CUSTOM))
+    session.add(ContentPlanChannel(plan_id=1, channel_id=1))
+    session.add_all(
+        [
+            ContentPlanItem(id=10, plan_id=1, sort_order=0, content_type=ContentPlanContentType.CUSTOM, custom_title="one"),
+            ContentPlanItem(id=20, plan_id=1, sort_order=1, content_type=ContentPlanContentType.CUSTOM, custom_title="two"),
+        ]
+    )
+    await session.commit()
+    return session
+
+
+async def _send(db, failing: set[tuple[int, str]], **kwargs) -> list[tuple[int, str]]:
+    calls: list[tuple[int, str]] = []
+
+    async def send_template(template, chat_id, *, client=None):
+        key = (chat_id, template.fields["text"].split("</b>")[0].removeprefix("<b>"))
+        calls.append(key)
+        return (None, "Bad Request: chat not found") if key in failing else ({"ok": True}, None)
+
+    with patch("admin.api.content_plan_sender.tg.send_template", side_effect=send_template):
+        plan = await db.get(ContentPlan, 1)
+        await send_plan_to_telegram(db, plan, "token", **kwargs)
+        await db.commit()
+    return sorted(calls)
+
+
+@pytest.mark.asyncio
+async def test_retry_resends_only_failed_items(db):
+    # Пользователь 1 не получил первый пункт, но получил второй; пользователь 2 — наоборот
+    await _send(db, {(1, "one"), (2, "two")})
+    failed = await failed_deliveries(db, 1)
+    assert failed == {10: [("bot", "user:1", 1)], 20: [("bot", "user:2", 2)]}
+    assert await _send(db, set(), retry=failed) == [(1, "one"), (2, "two")]
+    assert await failed_deliveries(db, 1) == {}
+    items = (await db.execute(select(TelegramDeliveryLog.target, TelegramDeliveryLog.item_id))).all()
+    assert len(items) == 6 and {item_id for _, item_id in items} == {10, 20}
+
+
+@pytest.mark.asyncio
+async def test_retry_skips_items_removed_from_plan(db):
+    await _send(db, {(1, "one")})
+    await db.delete(await db.get(ContentPlanItem, 10))
+    await db.commit()
+    assert await _send(db, set(), retry=await failed_deliveries(db, 1)) == []
+
+
+@pytest.mark.asyncio
+async def test_retry_after_plan_edit_has_nothing_to_resend(db):
+    await _send(db, {(1, "one")})
+    # Правка плана пересоздаёт пункты — у новых другие id
+    await db.execute(delete(ContentPlanItem).where(ContentPlanItem.plan_id == 1))
+    db.add(ContentPlanItem(id=30, plan_id=1, sort_order=0, content_type=ContentPlanContentType.CUSTOM, custom_title="one"))
+    await db.commit()
+    failed = await failed_deliveries(db, 1)
+    assert failed == {10: [("bot", "user:1", 1)]}
+    assert await retryable_deliveries(db, 1, failed) == {}
@@ -0,0 +1,59 @@
+"""Юнит-тесты кэша ленты контента бота."""
+import pytest
+
+from bot.cache_versions import get_cache_versions
+from bot.feed_cache import FeedCache, FeedItem
+from database.cache_versions import CONTENT_VERSION
+
+
+def _items(n: int) -> list[FeedItem]:
+    return [FeedItem("news", i, None, f"<b>{i}</b>") for i in range(n)]
+
+
+@pytest.fixture
+def content_version():
+    versions = get_cache_versions()
+    saved = dict(versions._versions)
+    yield lambda v: versions._versions.__setitem__(CONTENT_VERSION, v)
+    versions._versions.clear()
+    versions._versions.update(saved)
+
+
+@pytest.mark.asyncio
+async def test_feed_loaded_once_per_version(content_version):
+    loads = []
+    feed = _items(12)
+
+    async def load(offset: int, limit: int) -> list[FeedItem]:
+        loads.append((offset, limit))
+        return feed[offset:offset + limit]
+
+    cache = FeedCache()
+    content_version("1")
+    first = await cache.page("news", "retail", 0, 6, load)
+    second = await cache.page("news", "retail", 5, 6, load)
+    assert [i.id for i in first] == [0, 1, 2, 3, 4, 5]
+    assert [i.id for i in second] == [5, 6, 7, 8, 9, 10]
+    assert len(loads) == 1
+    # Другая аудитория — своя лента
+    await cache.page("news", "horeca", 0, 6, load)
+    assert len(loads) == 2
+    # Админка изменила контент — перечитываем
+    content_version("2")
+    await cache.page("news", "retail", 0, 6, load)
+    assert len(loads) == 3
+
+
+@pytest.mark.asyncio
+async def test_unknown_version_bypasses_cache():
+    get_cache_versions()._versions.pop(CONTENT_VERSION, None)
+    loads = []
+
+    async def load(offset: int, limit: int) -> list[FeedItem]:
+        loads.append((offset, limit))
+        return _items(3)[offset:offset + limit]
+
+    cache = FeedCache()
+    await cache.page("news", "retail", 0, 6, load)
+    await cache.page("news", "retail", 0, 6, load)
+    assert loads == [(0, 6), (0, 6)]
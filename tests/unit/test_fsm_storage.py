@@ -0,0 +1,55 @@
+"""Юнит-тесты FSM-хранилища бота в БД."""
+from datetime import datetime, timedelta
+
+import pytest
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+
+from bot.fsm_storage import DatabaseStorage
+from database.models import BotFsmState
+
+KEY = StorageKey(bot_id=1, chat_id=42, user_id=42)
+
+
+class Flow(StatesGroup):
+    step = State()
+
+
+@pytest.mark.asyncio
+async def test_state_shared_between_processes(session_factory):
+    # Два экземпляра — как два процесса бота на одной БД
+    first = DatabaseStorage(session_factory, ttl_seconds=3600, cache_seconds=0)
+    second = DatabaseStorage(session_factory, ttl_seconds=3600, cache_seconds=0)
+    await first.set_state(KEY, Flow.step)
+    await first.update_data(KEY, {"phone_number": "+7900", "birth_date": "1990-01-02"})
+    assert await second.get_state(KEY) == Flow.step.state
+    assert await second.get_data(KEY) == {"phone_number": "+7900", "birth_date": "1990-01-02"}
+    # Сброс состояния и данных удаляет строку
+    await second.set_state(KEY, None)
+    await second.set_data(KEY, {})
+    async with session_factory() as session:
+        assert await session.get(BotFsmState, first._key_builder.build(KEY)) is None
+
+
+@pytest.mark.asyncio
+async def test_cache_is_write_through_and_returns_copies(session_factory):
+    storage = DatabaseStorage(session_factory, ttl_seconds=3600, cache_seconds=60)
+    await storage.set_data(KEY, {"a": 1})
+    data = await storage.get_data(KEY)
+    data["a"] = 2
+    assert await storage.get_data(KEY) == {"a": 1}
+    # Запись прошла в БД, а не только в кэш
+    fresh = DatabaseStorage(session_factory, ttl_seconds=3600, cache_seconds=0)
+    assert await fresh.get_data(KEY) == {"a": 1}
+
+
+@pytest.mark.asyncio
+async def test_stale_state_expires_and_is_purged(session_factory):
+    storage = DatabaseStorage(session_factory, ttl_seconds=3600, cache_seconds=0)
+    await storage.set_state(KEY, Flow.step)
+    async with session_factory() as session:
+        row = await session.get(BotFsmState, storage._key_builder.build(KEY))
+        row.updated_at = datetime.utcnow() - timedelta(hours=2)
+        await session.commit()
+    assert await storage.get_state(KEY) is None
+    assert await storage.purge_expired() == 1
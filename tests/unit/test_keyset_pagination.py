@@ -0,0 +1,100 @@
+"""Юнит-тесты keyset-курсоров кнопок «Показать ещё» бота."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from bot.cache_versions import get_cache_versions
+from bot.cursors import (
+    ContentCursor,
+    EventCursor,
+    decode_content_cursor,
+    decode_event_cursor,
+    encode_content_cursor,
+    encode_event_cursor,
+    parse_page_token,
+)
+from bot.utils import PAGE_SIZE, _content_page, _events_page
+from database.cache_versions import CONTENT_VERSION
+from database.models import Event, News, UserType
+
+
+@pytest.fixture
+def content_version():
+    versions = get_cache_versions()
+    saved = dict(versions._versions)
+    yield lambda v: versions._versions.__setitem__(CONTENT_VERSION, v)
+    versions._versions.clear()
+    versions._versions.update(saved)
+
+
+def test_cursor_roundtrip_fits_callback_data():
+    ts = datetime(2026, 10, 19, 7, 52, 11, 123456)
+    cursor = encode_content_cursor(ts, ts - timedelta(days=400), 987654321)
+    assert decode_content_cursor(cursor) == ContentCursor(ts, ts - timedelta(days=400), 987654321)
+    assert len(f"content_more:promotions:{cursor}".encode()) <= 64
+    assert decode_content_cursor(encode_content_cursor(None, ts, 7)) == ContentCursor(None, ts, 7)
+    assert decode_event_cursor(encode_event_cursor(ts, 42)) == EventCursor(ts, 42)
+    assert decode_content_cursor("garbage") is None
+    # Кнопки, отправленные до перехода на курсоры
+    assert parse_page_token("10") == (10, None)
+    assert parse_page_token(cursor) == (0, cursor)
+
+
+async def _news_feed(session) -> list[int]:
+    """Все страницы ленты подряд, переходя по курсору последней показанной карточки."""
+    seen: list[int] = []
+    after = None
+    while True:
+        items = await _content_page(session, News, UserType.RETAIL, after=after)
+        seen.extend(item.id for item in items[:PAGE_SIZE])
+        if len(items) <= PAGE_SIZE:
+            return seen
+        after = decode_content_cursor(encode_content_cursor(*items[PAGE_SIZE - 1].cursor))
+
+
+async def _seed_news(session) -> list[int]:
+    base = datetime(2026, 10, 1, 12, 0, 0)
+    rows = []
+    for i in range(1, 14):
+        # Совпадающие published_at / created_at и записи без published_at — проверка тай-брейков
+        published = None if i % 4 == 0 else base - timedelta(hours=i // 3)
+        rows.append(News(id=i, title=f"n{i}", user_type=UserType.ALL, published_at=published, created_at=base))
+    session.add_all(rows)
+    await session.commit()
+    ordered = sorted(
+        rows,
+        key=lambda n: (n.published_at is None, -(n.published_at or base).timestamp(), -n.id),
+    )
+    return [n.id for n in ordered]
+
+
+@pytest.mark.asyncio
+async def test_content_seek_walks_whole_feed(session):
+    get_cache_versions()._versions.pop(CONTENT_VERSION, None)
+    expected = await _seed_news(session)
+    assert await _news_feed(session) == expected
+
+
+@pytest.mark.asyncio
+async def test_cached_feed_resumes_after_cursor(session, content_version):
+    content_version("1")
+    expected = await _seed_news(session)
+    first = await _content_page(session, News, UserType.RETAIL)
+    cursor = first[PAGE_SIZE - 1].cursor
+    # Карточку, на которой остановились, удалили — продолжаем со следующей по порядку
+    await session.delete(await session.get(News, cursor.id))
+    await session.commit()
+    content_version("2")
+    page = await _content_page(session, News, UserType.RETAIL, after=cursor)
+    assert [item.id for item in page] == expected[PAGE_SIZE:2 * PAGE_SIZE + 1]
+
+
+@pytest.mark.asyncio
+async def test_events_seek_after_cursor(session):
+    soon = datetime.utcnow() + timedelta(days=1)
+    session.add_all(
+        [Event(id=i, title=f"e{i}", user_type=UserType.ALL, event_date=soon + timedelta(hours=i // 2)) for i in range(1, 9)]
+    )
+    await session.commit()
+    page = await _events_page(session, 1, UserType.RETAIL, after=EventCursor(soon, 1))
+    assert [event.id for event, _, _ in page] == [2, 3, 4, 5, 6, 7]
@@ -0,0 +1,36 @@
+"""Юнит-тесты индекса менеджеров бота (маршрутизация по заведению)."""
+from bot.manager_index import ManagerCard, ManagerIndex
+from database.models import Manager
+
+
+def _index() -> ManagerIndex:
+    managers = [
+        Manager(id=1, full_name="Анна", telegram_username="anna", establishment="Кальянная Дым, Smoke Bar"),
+        Manager(id=2, full_name="Олег", telegram_username="oleg", establishment="Дым"),
+        Manager(id=3, full_name="Ира", telegram_username="ira", establishment=None),
+    ]
+    return ManagerIndex([ManagerCard(m) for m in managers])
+
+
+def test_exact_match_wins_over_substring():
+    index = _index()
+    # «дым» входит в название у Анны, но точно совпадает у Олега
+    assert [m.id for m in index.route("  ДЫМ ")] == [2]
+    assert [m.id for m in index.route("smoke bar")] == [1]
+
+
+def test_substring_match_and_fallback_to_all():
+    index = _index()
+    assert [m.id for m in index.route("smoke")] == [1]
+    # Короче 3 символов — только точное совпадение
+    assert [m.id for m in index.route("sm")] == [1, 2, 3]
+    assert [m.id for m in index.route("Неизвестное")] == [1, 2, 3]
+    assert [m.id for m in index.route(None)] == [1, 2, 3]
+    # Повторный запрос — из запомненных результатов
+    assert "неизвестное" in index._matches
+
+
+def test_get_by_id():
+    index = _index()
+    assert index.get(2).full_name == "Олег"
+    assert index.get(99) is None
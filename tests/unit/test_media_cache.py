@@ -0,0 +1,104 @@
+"""Юнит-тесты кэша file_id медиа бота (память + БД)."""
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest, TelegramNetworkError
+from aiogram.methods import SendPhoto
+from sqlalchemy import event
+
+import bot.utils as bot_utils
+from bot.media_cache import MediaFileCache
+
+
+@pytest.mark.asyncio
+async def test_file_id_survives_restart_and_is_invalidated_by_url(session_factory):
+    cache = MediaFileCache(session_factory)
+    assert await cache.get("news", 1, "/uploads/a.jpg") is None
+    await cache.put("news", 1, "/uploads/a.jpg", "photo", "FILE_A")
+    assert await cache.get("news", 1, "/uploads/a.jpg") == ("photo", "FILE_A")
+
+    # Новый процесс: память пустая, запись читается из БД
+    restarted = MediaFileCache(session_factory)
+    assert await restarted.get("news", 1, "/uploads/a.jpg") == ("photo", "FILE_A")
+    # Картинку заменили — старый file_id не используется
+    assert await restarted.get("news", 1, "/uploads/b.jpg") is None
+    await restarted.put("news", 1, "/uploads/b.jpg", "photo", "FILE_B")
+    assert await MediaFileCache(session_factory).get("news", 1, "/uploads/b.jpg") == ("photo", "FILE_B")
+
+
+@pytest.mark.asyncio
+async def test_forget_and_lru_bound(session_factory):
+    cache = MediaFileCache(session_factory, max_entries=2)
+    await cache.put("events", 1, "u1", "video", "F1")
+    await cache.put("events", 2, "u2", "video", "F2")
+    await cache.put("events", 3, "u3", "video", "F3")
+    assert len(cache._entries) == 2
+    await cache.forget("events", 3)
+    assert await cache.get("events", 3, "u3") is None
+    # Вытесненная из памяти запись всё ещё в БД
+    assert await cache.get("events", 1, "u1") == ("video", "F1")
+
+
+@pytest.mark.asyncio
+async def test_misses_cached_briefly_and_long_urls_match_after_restart(session_factory):
+    now = 0.0
+    queries: list[str] = []
+    engine = session_factory.kw["bind"].sync_engine
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: queries.append(statement))
+    cache = MediaFileCache(session_factory, miss_ttl=60.0, clock=lambda: now)
+    assert await cache.get("news", 1, "u1") is None
+    assert await cache.get("news", 1, "u1") is None
+    assert len(queries) == 1
+    now = 61.0
+    assert await cache.get("news", 1, "u1") is None
+    assert len(queries) == 2
+
+    long_url = "https://cdn.example.com/" + "a" * 600 + ".jpg"
+    await cache.put("news", 2, long_url, "photo", "LONG")
+    restarted = MediaFileCache(session_factory)
+    assert await restarted.get("news", 2, long_url) == ("photo", "LONG")
+    assert await restarted.get("news", 2, long_url[:-4] + ".png") is None
+
+
+class CachedIdMessage:
+    def __init__(self, error: Exception) -> None:
+        self.error = error
+        self.sent: list[str] = []
+
+    async def answer_photo(self, photo, caption: str, **kwargs) -> SimpleNamespace:
+        if isinstance(photo, str) and photo == "OLD":
+            raise self.error
+        self.sent.append(caption)
+        return SimpleNamespace(photo=[SimpleNamespace(file_id="NEW")], video=None, animation=None, document=None)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("error", "forgotten"),
+    [
+        (TelegramBadRequest(SendPhoto(chat_id=1, photo="OLD"), "Bad Request: wrong file identifier/HTTP URL specified"), True),
+        (TelegramNetworkError(SendPhoto(chat_id=1, photo="OLD"), "HTTP Client says - ServerDisconnectedError"), False),
+    ],
+)
+async def test_cached_file_id_forgotten_only_when_rejected(session_factory, monkeypatch, error, forgotten):
+    cache = MediaFileCache(session_factory)
+    await cache.put("news", 1, "/uploads/a.jpg", "photo", "OLD")
+    forgets: list[tuple[str, int]] = []
+    real_forget = cache.forget
+
+    async def forget(table: str, item_id: int) -> None:
+        forgets.append((table, item_id))
+        await real_forget(table, item_id)
+
+    async def fetch(url: str):
+        return b"img", "image/jpeg"
+
+    monkeypatch.setattr(cache, "forget", forget)
+    monkeypatch.setattr(bot_utils, "get_media_cache", lambda: cache)
+    monkeypatch.setattr(bot_utils, "_fetch_media_bytes", fetch)
+    message = CachedIdMessage(error)
+    assert await bot_utils._send_item_media(message, "news", 1, "/uploads/a.jpg", "card") is True
+    assert message.sent == ["card"]
+    assert forgets == ([("news", 1)] if forgotten else [])
+    # Загруженный заново файл запоминается в любом случае
+    assert await cache.get("news", 1, "/uploads/a.jpg") == ("photo", "NEW")
@@ -0,0 +1,42 @@
+"""Юнит-тесты лёгких моделей чтения бота (только нужные колонки, без ORM-сущностей)."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from bot.read_models import EventRow, UserProfile, load_user_profile
+from bot.utils import _content_page, _events_page
+from database.models import Event, News, User, UserType
+
+
+@pytest.mark.asyncio
+async def test_user_profile_is_detached_snapshot(session):
+    session.add(User(id=1, user_type=UserType.HORECA, establishment="Дым"))
+    await session.commit()
+    session.expunge_all()
+
+    profile = await load_user_profile(session, 1)
+    assert profile == UserProfile(1, UserType.HORECA, "Дым", None)
+    assert not hasattr(profile, "__dict__")
+    # В identity map ничего не попало
+    assert len(session.identity_map) == 0
+    assert await load_user_profile(session, 2) is None
+
+
+@pytest.mark.asyncio
+async def test_pages_do_not_load_entities(session):
+    soon = datetime.utcnow() + timedelta(days=1)
+    session.add_all(
+        [
+            News(id=1, title="<b>Новинка</b>", description="Вкус", user_type=UserType.ALL, is_active=True),
+            Event(id=5, title="Дегустация", description="", user_type=UserType.ALL, event_date=soon, location="Бар", max_places=3),
+        ]
+    )
+    await session.commit()
+    session.expunge_all()
+
+    items = await _content_page(session, News, UserType.RETAIL)
+    assert [item.id for item in items] == [1]
+    assert items[0].text.startswith("<b>&lt;b&gt;Новинка")
+    events = await _events_page(session, 1, UserType.RETAIL)
+    assert events == [(EventRow(5, "Дегустация", "", None, soon, "Бар", 3), 0, False)]
+    assert len(session.identity_map) == 0
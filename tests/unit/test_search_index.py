@@ -0,0 +1,132 @@
+"""Юнит-тесты inline-поиска бота (индекс в памяти по активному контенту и мероприятиям)."""
+import html
+import re
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from aiogram.types import User as TgUser
+from sqlalchemy import event
+
+from bot.cache_versions import get_cache_versions
+from bot.inline_search import _inline_search_text
+from bot.middlewares.db_session import DbSessionMiddleware
+from bot.search_index import ContentSearch, make_doc, tokenize
+from bot.utils import _truncate_html
+from database.cache_versions import CONTENT_VERSION, EVENTS_VERSION
+from database.models import Event, News, Promotion, UserType
+
+NOW = datetime(2026, 10, 1, 12, 0)
+
+
+@pytest.fixture
+async def factory(session_factory):
+    async with session_factory() as session:
+        session.add_all(
+            [
+                Promotion(
+                    id=1,
+                    title="Скидка на кофе",
+                    description="<p>Зёрна &amp; молотый</p>",
+                    user_type=UserType.ALL,
+                    published_at=NOW - timedelta(days=2),
+                ),
+                News(id=2, title="Новый чай", description="К кофе", user_type=UserType.HORECA, published_at=NOW),
+                Promotion(id=3, title="Кофемашина", user_type=UserType.RETAIL, is_active=False),
+                Event(id=4, title="Дегустация кофе", user_type=UserType.ALL, event_date=NOW + timedelta(days=1)),
+                Event(id=5, title="Прошедший кофе-вечер", user_type=UserType.ALL, event_date=NOW - timedelta(days=1)),
+            ]
+        )
+        await session.commit()
+    return session_factory
+
+
+async def _search(factory, search: ContentSearch, user_type: UserType, query: str) -> list[str]:
+    async def handler(event, data):
+        return await search.search(user_type, query, now=NOW)
+
+    data = {"event_from_user": TgUser(id=1, is_bot=False, first_name="u")}
+    docs = await DbSessionMiddleware(factory)(handler, object(), data)
+    return [f"{doc.table}:{doc.id}" for doc in docs]
+
+
+def test_tokenize_strips_html_and_folds_yo():
+    assert tokenize("<p>Зёрна &amp; <b>Молотый</b></p>") == ["зерна", "молотый"]
+
+
+@pytest.mark.asyncio
+async def test_prefix_search_partitioned_and_ranked(factory):
+    search = ContentSearch()
+    # Совпадения по заголовку — раньше совпадений по описанию; прошедшие и неактивные не находятся
+    assert await _search(factory, search, UserType.HORECA, "коф") == ["events:4", "promotions:1", "news:2"]
+    assert await _search(factory, search, UserType.RETAIL, "коф") == ["events:4", "promotions:1"]
+    assert await _search(factory, search, UserType.HORECA, "кофе зерн") == ["promotions:1"]
+    assert await _search(factory, search, UserType.HORECA, "чайник") == []
+    assert await _search(factory, search, UserType.RETAIL, "") == ["events:4", "promotions:1"]
+
+
+@pytest.mark.asyncio
+async def test_sync_rereads_only_changed_rows_when_version_changes(factory):
+    watcher = get_cache_versions()
+    saved = dict(watcher._versions)
+    engine = factory.kw["bind"].sync_engine
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        watcher._versions.update({CONTENT_VERSION: "1", EVENTS_VERSION: "1"})
+        search = ContentSearch()
+        assert await _search(factory, search, UserType.RETAIL, "скидка") == ["promotions:1"]
+        statements.clear()
+        # Версии не менялись — ответ из памяти, без запросов к БД
+        assert await _search(factory, search, UserType.RETAIL, "кофе") == ["events:4", "promotions:1"]
+        assert statements == []
+
+        async with factory() as session:
+            promo = await session.get(Promotion, 1)
+            promo.title = "Распродажа кофе"
+            promo.updated_at = NOW
+            (await session.get(Promotion, 3)).is_active = True
+            await session.commit()
+        watcher._versions[CONTENT_VERSION] = "2"
+        statements.clear()
+        assert await _search(factory, search, UserType.RETAIL, "распрод") == ["promotions:1"]
+        assert await _search(factory, search, UserType.RETAIL, "скидка") == []
+        assert await _search(factory, search, UserType.RETAIL, "кофемаш") == ["promotions:3"]
+        # Дочитаны только изменённые акции (штампы + одна выборка по id)
+        loads = [s for s in statements if "description" in s]
+        assert len(loads) == 1 and "promotions" in loads[0]
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+        watcher._versions.clear()
+        watcher._versions.update(saved)
+
+
+def test_truncate_html_never_cuts_tags_or_entities():
+    assert _truncate_html("<b>коротко</b>", 10) == "<b>коротко</b>"
+    # Теги не считаются, сущность — один символ: видимых 12 ≤ 12, текст не трогается
+    assert _truncate_html('<a href="https://x.ru/very/long">ссылка</a> &amp; ещё', 12) == (
+        '<a href="https://x.ru/very/long">ссылка</a> &amp; ещё'
+    )
+    assert _truncate_html("<b>жирный <i>курсив</i> хвост</b>", 12) == "<b>жирный <i>курс…</i></b>"
+    assert _truncate_html("a &amp; b &lt;c&gt; d", 5) == "a &amp; …"
+
+
+def test_inline_card_of_long_content_is_valid_html():
+    row = SimpleNamespace(
+        id=7,
+        title="Длинная акция",
+        description="<b>" + "кофе &amp; чай " * 400 + "</b>",
+        image_url=None,
+        user_type=UserType.ALL,
+        created_at=NOW,
+        published_at=NOW,
+    )
+    text = _inline_search_text(make_doc("promotions", row))
+    assert text.startswith("🎁 Акция\n<b>Длинная акция</b>\n\n<b>кофе &amp; чай")
+    # Обрезано по видимому тексту, незакрытый тег закрыт
+    assert text.endswith("…</b>")
+    assert len(html.unescape(re.sub(r"<[^>]+>", "", text))) == 4096
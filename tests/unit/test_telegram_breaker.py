@@ -0,0 +1,54 @@
+"""Юнит-тесты circuit breaker транспорта Telegram и локального спула отправок."""
+import pytest
+
+from admin.api.telegram_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from admin.api.telegram_spool import TelegramSpool
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60.0)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert not breaker.ready()
+
+
+def test_half_open_allows_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0.0)
+    for _ in range(5):
+        breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+@pytest.mark.asyncio
+async def test_spool_fifo_roundtrip(tmp_path):
+    spool = TelegramSpool(str(tmp_path / "spool" / "tg.sqlite3"))
+    await spool.enqueue_many([{"chat_id": 1, "text": "a"}, {"chat_id": "@ch", "text": "б"}])
+    assert await spool.count() == 2
+    jobs = await spool.fetch(10)
+    assert [job["chat_id"] for _, job in jobs] == [1, "@ch"]
+    await spool.remove([jobs[0][0]])
+    remaining = await spool.fetch(10)
+    assert [job["text"] for _, job in remaining] == ["б"]
+    # Задания переживают пересоздание объекта (данные на диске)
+    assert await TelegramSpool(str(tmp_path / "spool" / "tg.sqlite3")).count() == 1
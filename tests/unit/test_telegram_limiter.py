@@ -0,0 +1,50 @@
+"""Юнит-тесты адаптивного (AIMD) лимита запросов к Telegram."""
+import asyncio
+
+import pytest
+
+from admin.api.telegram_limiter import AdaptiveConcurrencyLimiter
+
+
+def test_limit_grows_additively_on_fast_success():
+    limiter = AdaptiveConcurrencyLimiter(initial=2, minimum=1, maximum=10, latency_target=1.0)
+    # +1/limit за каждый успех: примерно +1 за «окно» из limit вызовов
+    for _ in range(3):
+        limiter.on_success(0.1)
+    assert limiter.limit == 3
+
+
+def test_slow_success_does_not_grow_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial=2, minimum=1, maximum=10, latency_target=1.0)
+    for _ in range(10):
+        limiter.on_success(5.0)
+    assert limiter.limit == 2
+
+
+def test_overload_cuts_limit_once_per_window():
+    limiter = AdaptiveConcurrencyLimiter(initial=8, minimum=1, maximum=10, latency_target=60.0, backoff_factor=0.5)
+    limiter.on_overload()
+    limiter.on_overload()
+    assert limiter.limit == 4
+
+
+def test_limit_respects_bounds():
+    limiter = AdaptiveConcurrencyLimiter(initial=50, minimum=2, maximum=5, latency_target=0.0)
+    assert limiter.limit == 5
+    for _ in range(10):
+        limiter._last_decrease = 0.0
+        limiter.on_overload()
+    assert limiter.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_acquire_blocks_above_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial=1, minimum=1, maximum=1, latency_target=1.0)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+    limiter.release()
+    await asyncio.wait_for(waiter, timeout=1.0)
+    assert limiter.in_flight == 1
+    limiter.release()
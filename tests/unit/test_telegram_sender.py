@@ -1,9 +1,13 @@
 """Юнит-тесты отправки в Telegram (мок HTTP-клиента)."""
-from unittest.mock import AsyncMock, MagicMock
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
 
 from admin.api import telegram_sender as tg
+from admin.api.content_plan_sender import _should_spool
+from admin.api.telegram_breaker import CLOSED, CircuitBreaker
 
 
 @pytest.mark.asyncio
@@ -67,3 +71,80 @@ async def test_send_photo_calls_telegram_api_with_mock_client():
     assert calls[0]["json"]["chat_id"] == "@channel"
     assert calls[0]["json"]["photo"] == "https://example.com/image.jpg"
     assert "Caption" in calls[0]["json"]["caption"]
+
+
+def test_compiled_text_template_splices_chat_id():
+    """Шаблон sendMessage собирается один раз, для каждого получателя меняется только chat_id."""
+    template = tg.compile_text("fake-bot-token", "Привет " * 1000, reply_markup={"inline_keyboard": []})
+    assert template.url.endswith("/botfake-bot-token/sendMessage")
+    for chat_id in (12345, "@channel"):
+        body = json.loads(template.body(chat_id))
+        assert body["chat_id"] == chat_id
+        assert len(body["text"]) == 4096
+        assert body["reply_markup"] == {"inline_keyboard": []}
+
+
+@pytest.mark.asyncio
+async def test_send_template_posts_prebuilt_body():
+    """send_template отправляет готовые байты с нужным Content-Type."""
+    template = tg.compile_media("fake-bot-token", "photo", "https://example.com/a.jpg", caption="cap")
+    calls = []
+
+    async def mock_post(url, **kwargs):
+        calls.append({"url": url, **kwargs})
+        res = MagicMock()
+        res.is_success = True
+        res.content = b'{"ok": true}'
+        res.json.return_value = {"ok": True}
+        return res
+
+    mock_client = MagicMock()
+    mock_client.post = AsyncMock(side_effect=mock_post)
+
+    data, err = await tg.send_template(template, 777, client=mock_client)
+    assert err is None
+    assert "sendPhoto" in calls[0]["url"]
+    assert calls[0]["headers"]["Content-Type"] == "application/json"
+    assert json.loads(calls[0]["content"]) == {
+        "chat_id": 777,
+        "photo": "https://example.com/a.jpg",
+        "caption": "cap",
+        "parse_mode": "HTML",
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("status", "payload", "spooled"),
+    [
+        (403, {"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"}, False),
+        (400, {"ok": False, "error_code": 400, "description": "Bad Request: chat not found"}, False),
+        (502, {}, True),
+        (None, httpx.ConnectError("connection refused"), True),
+    ],
+)
+async def test_only_transport_failures_are_spooled_while_breaker_probes(status, payload, spooled):
+    """Ошибки получателя (4xx) не уходят в спул и при разомкнутом breaker, сбои сети и 5xx — уходят."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+
+    async def mock_post(url, **kwargs):
+        if status is None:
+            raise payload
+        res = MagicMock()
+        res.is_success = False
+        res.status_code = status
+        res.content = json.dumps(payload).encode()
+        res.json.return_value = payload
+        return res
+
+    mock_client = MagicMock()
+    mock_client.post = AsyncMock(side_effect=mock_post)
+    with patch("admin.api.telegram_sender.get_circuit_breaker", return_value=breaker):
+        template = tg.compile_text("fake-bot-token", "hi")
+        data, err = await tg.send_template(template, 1, client=mock_client)
+        # Параллельные отправки снова разомкнули breaker — на классификацию ошибки это не влияет
+        breaker.record_failure()
+        assert breaker.state != CLOSED
+        assert data is None
+        assert _should_spool(err) is spooled
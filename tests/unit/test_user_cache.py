@@ -0,0 +1,122 @@
+"""Юнит-тесты кэша профилей пользователей бота."""
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from bot.cache_versions import CacheVersionWatcher, get_cache_versions
+from bot.read_models import UserProfile
+from bot.user_cache import UserProfileCache
+from database.cache_versions import USERS_VERSION
+from database.models import User, UserType
+
+
+@pytest.fixture
+def users_version():
+    versions = get_cache_versions()
+    saved = dict(versions._versions)
+    yield lambda v: versions._versions.__setitem__(USERS_VERSION, v)
+    versions._versions.clear()
+    versions._versions.update(saved)
+
+
+def _loader(loads: list[int], profiles: dict[int, UserProfile]):
+    def make(user_id: int):
+        async def load() -> UserProfile | None:
+            loads.append(user_id)
+            return profiles.get(user_id)
+
+        return load
+
+    return make
+
+
+@pytest.mark.asyncio
+async def test_profiles_and_unknown_users_cached_per_version(users_version):
+    loads: list[int] = []
+    profiles = {1: UserProfile(1, UserType.HORECA, "Дым", None)}
+    load = _loader(loads, profiles)
+    cache = UserProfileCache(max_entries=10, ttl_seconds=60)
+
+    # Версия неизвестна — только БД
+    assert (await cache.get(1, load(1))).establishment == "Дым"
+    assert len(cache) == 0
+
+    users_version("1")
+    await cache.get(1, load(1))
+    await cache.get(1, load(1))
+    assert await cache.get(2, load(2)) is None
+    assert await cache.get(2, load(2)) is None
+    assert loads == [1, 1, 2]
+
+    # Админка изменила пользователей — кэш сброшен целиком
+    users_version("2")
+    await cache.get(1, load(1))
+    assert loads == [1, 1, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_forget_ttl_and_lru(users_version):
+    users_version("1")
+    loads: list[int] = []
+    load = _loader(loads, {})
+    cache = UserProfileCache(max_entries=2, ttl_seconds=60)
+    for user_id in (1, 2, 1, 3):
+        await cache.get(user_id, load(user_id))
+    # 2 вытеснен как давно не используемый
+    await cache.get(1, load(1))
+    await cache.get(2, load(2))
+    assert loads == [1, 2, 3, 2]
+
+    cache.forget(2)
+    await cache.get(2, load(2))
+    assert loads[-1] == 2 and len(loads) == 5
+
+    expired = UserProfileCache(max_entries=2, ttl_seconds=0)
+    await expired.get(1, load(1))
+    await expired.get(1, load(1))
+    assert loads[-2:] == [1, 1]
+
+
+@pytest.mark.asyncio
+async def test_result_loaded_before_forget_is_not_stored(users_version):
+    users_version("1")
+    cache = UserProfileCache(max_entries=10, ttl_seconds=60)
+
+    async def stale_load() -> UserProfile | None:
+        # Регистрация завершилась, пока читался старый профиль
+        cache.forget(1)
+        return None
+
+    assert await cache.get(1, stale_load) is None
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_bot_profile_edit_forgets_only_that_user_in_other_processes(users_version, session_factory):
+    users_version("1")
+    async with session_factory() as session:
+        session.add_all([User(id=uid, user_type=UserType.RETAIL, establishment="A") for uid in (1, 2)])
+        await session.commit()
+
+    loads: list[int] = []
+    load = _loader(loads, {})
+    cache = UserProfileCache(max_entries=10, ttl_seconds=60)
+    watcher = CacheVersionWatcher([USERS_VERSION])
+    watcher.on_users_changed(cache.forget_many)
+    with patch("bot.cache_versions.SessionLocal", session_factory):
+        await watcher.refresh()
+        for user_id in (1, 2):
+            await cache.get(user_id, load(user_id))
+        # Другой процесс бота поменял профиль пользователя 1
+        async with session_factory() as session:
+            (await session.get(User, 1)).profile_updated_at = datetime.utcnow()
+            await session.commit()
+        await watcher.refresh()
+        await cache.get(1, load(1))
+        await cache.get(2, load(2))
+        assert loads == [1, 2, 1]
+        # Тот же штамп в следующем опросе (в пределах запаса) повторно не сбрасывает
+        await watcher.refresh()
+        await cache.get(1, load(1))
+        assert loads == [1, 2, 1]
@@ -0,0 +1,114 @@
+"""Юнит-тесты ленты «Что нового» (акции, новинки и приходы одним запросом, только непросмотренное)."""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from aiogram.types import User as TgUser
+
+from bot.cursors import FeedCursor, decode_feed_cursor, encode_feed_cursor
+from bot.middlewares.db_session import DbSessionMiddleware
+from bot.utils import PAGE_SIZE
+from bot.whats_new import _whats_new_page, render_whats_new
+from database.models import Delivery, News, Promotion, User, UserType
+
+T0 = datetime(2026, 10, 1, 12, 0)
+
+
+class FakeMessage:
+    def __init__(self) -> None:
+        self.sent: list[str] = []
+
+    async def answer(self, text: str, **kwargs) -> SimpleNamespace:
+        self.sent.append(text)
+        return SimpleNamespace()
+
+
+@pytest.fixture
+async def factory(session_factory):
+    async with session_factory() as session:
+        session.add(User(id=1, user_type=UserType.RETAIL, establishment="A"))
+        # Минута i: акция, новинка и приход — в ленте по времени, при равном времени по таблице
+        for i in range(3):
+            at = T0 + timedelta(minutes=i)
+            session.add_all(
+                [
+                    Promotion(id=10 + i, title=f"p{i}", user_type=UserType.ALL, is_active=True, published_at=at),
+                    News(id=20 + i, title=f"n{i}", user_type=UserType.RETAIL, is_active=True, published_at=at),
+                    Delivery(id=30 + i, title=f"d{i}", user_type=UserType.ALL, is_active=True, published_at=at),
+                ]
+            )
+        # Не для Retail и неактивная — не показываются
+        session.add(News(id=40, title="horeca", user_type=UserType.HORECA, is_active=True, published_at=T0))
+        session.add(Promotion(id=41, title="off", user_type=UserType.ALL, is_active=False, published_at=T0))
+        await session.commit()
+    return session_factory
+
+
+def _titles(page) -> list[str]:
+    return [item.text.split("<b>")[1].split("</b>")[0] for _, item in page]
+
+
+@pytest.mark.asyncio
+async def test_merged_page_after_cursor(factory):
+    async with factory() as session:
+        first = await _whats_new_page(session, UserType.RETAIL, None)
+        # Без позиции — последние PAGE_SIZE карточек по порядку публикации
+        assert _titles(first) == ["n1", "p1", "d2", "n2", "p2"]
+        page = await _whats_new_page(session, UserType.RETAIL, FeedCursor(T0, "news", 20))
+        assert _titles(page) == ["p0", "d1", "n1", "p1", "d2", "n2"]
+        assert page[0][1].text.startswith("🎁 Акция\n")
+        assert decode_feed_cursor(encode_feed_cursor(*page[0][0])) == FeedCursor(T0, "promotions", 10)
+
+
+@pytest.mark.asyncio
+async def test_seen_position_advances_and_nothing_is_resent(factory):
+    async with factory() as session:
+        user = await session.get(User, 1)
+        user.feed_seen_cursor = encode_feed_cursor(T0 - timedelta(minutes=1), "news", 0)
+        await session.commit()
+
+    async def show(more: bool = False) -> tuple[bool, list[str]]:
+        message = FakeMessage()
+
+        async def handler(event, data):
+            return await render_whats_new(message, user_id=1, more=more)
+
+        data = {"event_from_user": TgUser(id=1, is_bot=False, first_name="u")}
+        has_more = await DbSessionMiddleware(factory)(handler, object(), data)
+        return has_more, message.sent
+
+    has_more, sent = await show()
+    assert has_more is True
+    assert sent[0] == "🆕 <b>Что нового</b>"
+    assert len([s for s in sent if s.startswith(("🎁", "📰", "📦"))]) == PAGE_SIZE
+    has_more, sent = await show(more=True)
+    assert has_more is False
+    assert len([s for s in sent if s.startswith(("🎁", "📰", "📦"))]) == 9 - PAGE_SIZE
+    _, sent = await show()
+    assert sent == ["🆕 <b>Что нового</b>\nНовых публикаций нет — вы всё посмотрели."]
+
+
+@pytest.mark.asyncio
+async def test_walk_with_one_section_ahead_matches_merged_order(factory):
+    async with factory() as session:
+        # Восемь новинок позже всех остальных: каждая ветка UNION ALL ограничена своим LIMIT
+        session.add_all(
+            [
+                News(id=50 + i, title=f"late{i}", user_type=UserType.ALL, published_at=T0 + timedelta(hours=1, minutes=i))
+                for i in range(8)
+            ]
+        )
+        # Без published_at — в ленте по created_at
+        session.add(Delivery(id=60, title="draft", user_type=UserType.ALL, created_at=T0 + timedelta(seconds=30)))
+        await session.commit()
+        walked: list[str] = []
+        cursor = FeedCursor(T0 - timedelta(minutes=1), "news", 0)
+        while True:
+            page = await _whats_new_page(session, UserType.RETAIL, cursor)
+            walked += _titles(page[:PAGE_SIZE])
+            if len(page) <= PAGE_SIZE:
+                break
+            cursor = page[PAGE_SIZE - 1][0]
+    assert walked == [
+        "d0", "n0", "p0", "draft", "d1", "n1", "p1", "d2", "n2", "p2", *(f"late{i}" for i in range(8))
+    ]